@@ -0,0 +1,220 @@
+"""
+Benchmarks the MCP tools against the local fake Monzo API (monzo/fake_api.py).
+
+Reports:
+- latency percentiles of each tool called one at a time,
+- throughput of concurrent tool calls at increasing concurrency,
+- time and peak memory of syncing and listing a year of 10k and 100k transactions.
+
+Usage:
+    uv run python benchmarks/bench_tools.py [--latency-ms 30] [--error-rate 0.0] [--calls 50] [--sizes 10000,100000]
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from monzo.client import percentile  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_api(port: int, accounts: dict, latency_ms: float, error_rate: float) -> subprocess.Popen:
+    """
+    Runs the fake API in its own process, so it does not skew the timings or memory of the server.
+    """
+    command = [
+        sys.executable, "-m", "monzo.fake_api",
+        "--port", str(port),
+        "--latency-ms", str(latency_ms),
+        "--error-rate", str(error_rate),
+    ]
+    for account_id, count in accounts.items():
+        command += ["--account", f"{account_id}:{count}"]
+
+    process = subprocess.Popen(command, cwd=ROOT)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/accounts", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError("fake Monzo API did not start")
+
+
+def summary(name: str, timings: list) -> str:
+    timings = sorted(timings)
+    return (
+        f"{name:<24} {len(timings):>6} "
+        f"{percentile(timings, 50):>9.1f} {percentile(timings, 95):>9.1f} {percentile(timings, 99):>9.1f} {timings[-1]:>9.1f}"
+    )
+
+
+async def time_calls(call, count: int) -> list:
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def bench_latency(main, calls: int) -> None:
+    transactions = await main.list_transactions(since=(datetime.datetime.utcnow() - datetime.timedelta(days=7)).isoformat())
+    transaction_id = transactions[-1]["id"]
+    pot_id = (await main.get_pots_information())[0]["id"]
+    last_week = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).isoformat()
+    last_quarter = (datetime.datetime.utcnow() - datetime.timedelta(days=90)).isoformat()
+
+    tools = [
+        ("balance", lambda: main.get_balance()),
+        ("pots", lambda: main.get_pots_information()),
+        ("overview", lambda: main.overview()),
+        ("list_transactions", lambda: main.list_transactions(since=last_week, refresh=True)),
+        ("list_transactions cached", lambda: main.list_transactions(since=last_week)),
+        ("retrieve_transaction", lambda: main.retrieve_transaction(transaction_id)),
+        ("annotate_transaction", lambda: main.annotate_transaction(transaction_id, "notes", "bench")),
+        ("pot_deposit", lambda: main.pot_deposit(pot_id, 1)),
+        ("spending_summary", lambda: main.spending_summary(since=last_quarter, group_by="month,category")),
+    ]
+
+    print(f"\nLatency per call (ms)\n{'tool':<24} {'calls':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, call in tools:
+        print(summary(name, await time_calls(call, calls)))
+
+
+async def bench_throughput(main, total: int) -> None:
+    print(f"\nThroughput of concurrent balance calls\n{'concurrency':>11} {'calls/s':>9} {'p95 ms':>9}")
+    for concurrency in (1, 4, 16, 64):
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+
+        async def call():
+            async with semaphore:
+                start = time.perf_counter()
+                await main.get_balance()
+                timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>11} {total / elapsed:>9.1f} {percentile(sorted(timings), 95):>9.1f}")
+
+
+async def measure(call):
+    """
+    Returns (result, seconds, peak MB) of awaiting `call`.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await call()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+async def bench_memory(main, sizes: dict) -> None:
+    print(
+        f"\nA year of history\n{'transactions':>12} {'sync s':>9} {'sync MB':>9} "
+        f"{'full MB':>9} {'fields MB':>9}"
+    )
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=366)).isoformat()
+
+    def call(**arguments):
+        # Through the MCP server, so the peaks include converting the result into the content it sends
+        return main.mcp.call_tool("list_transactions", {"account_type": arguments.pop("account_type"), "since": since, **arguments})
+
+    for account_type, count in sizes.items():
+        # Downloading and storing the whole range, without returning it
+        _, sync_seconds, sync_peak = await measure(lambda: call(account_type=account_type, limit=1))
+        # Returning every full transaction from the store, one content block each
+        content, _, full_peak = await measure(lambda: call(account_type=account_type, limit=count + 1))
+        assert len(content) == count, f"expected {count} transactions, got {len(content)}"
+        del content
+        # Returning only a few fields of every transaction
+        _, _, fields_peak = await measure(lambda: call(account_type=account_type, limit=count + 1, fields="created,amount"))
+
+        print(f"{count:>12} {sync_seconds:>9.2f} {sync_peak:>9.1f} {full_peak:>9.1f} {fields_peak:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="latency added by the fake API")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests the fake API answers with a 429")
+    parser.add_argument("--calls", type=int, default=50, help="calls per tool for the latency percentiles")
+    parser.add_argument("--throughput-calls", type=int, default=256)
+    parser.add_argument("--sizes", default="10000,100000", help="history sizes for the memory benchmark")
+    parser.add_argument("--cache", action="store_true", help="keep the balance/pots cache enabled")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    # The memory benchmark reads each history through its own account type
+    account_types = ["rewards", "joint", "flex", "prepaid"][:len(sizes)]
+    env_names = {
+        "rewards": "MONZO_UK_REWARDS_PERSONAL_ACCOUNT_ID",
+        "joint": "MONZO_UK_RETAIL_JOINT_JOINT_ACCOUNT_ID",
+        "flex": "MONZO_UK_MONZO_FLEX_PERSONAL_ACCOUNT_ID",
+        "prepaid": "MONZO_UK_PREPAID_PERSONAL_ACCOUNT_ID",
+    }
+
+    accounts = {"acc_personal": 2000}
+    accounts.update({f"acc_{account_type}": size for account_type, size in zip(account_types, sizes)})
+
+    port = free_port()
+    state_dir = tempfile.mkdtemp(prefix="monzo-bench-")
+    fake_api = start_fake_api(port, accounts, args.latency_ms, args.error_rate)
+
+    os.environ.update({
+        "MONZO_API_URL": f"http://127.0.0.1:{port}/",
+        "MONZO_ACCESS_TOKEN": "bench",
+        "MONZO_STATE_DIR": state_dir,
+        "MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID": "acc_personal",
+        "MONZO_RATE_LIMIT_PER_SECOND": "0",
+    })
+    for account_type in account_types:
+        os.environ[env_names[account_type]] = f"acc_{account_type}"
+    if not args.cache:
+        os.environ["MONZO_CACHE_TTL_BALANCE_SECONDS"] = "0"
+        os.environ["MONZO_CACHE_TTL_POTS_SECONDS"] = "0"
+
+    try:
+        import main as server
+
+        # One log line per request would dominate the timings
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        async def run():
+            await bench_latency(server, args.calls)
+            await bench_throughput(server, args.throughput_calls)
+            await bench_memory(server, dict(zip(account_types, sizes)))
+            print(f"\nRetries: {server.get_runtime().client.rate_limit_stats()}")
+
+        asyncio.run(run())
+    finally:
+        fake_api.terminate()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Measures how much the `fields` and `compact` options of list_transactions shrink
+the serialized response on 1,000 realistic transactions.
+
+Usage:
+    uv run python benchmarks/payload_size.py
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monzo.fixtures import make_transactions
+from monzo.projection import parse_fields, shape
+
+COUNT = 1000
+
+VARIANTS = [
+    ("full payload", None, False),
+    ("compact", None, True),
+    ("fields=created,amount,description,category,merchant.name", "created,amount,description,category,merchant.name", False),
+]
+
+
+def main():
+    transactions = make_transactions(COUNT)
+    baseline = None
+
+    print(f"{'variant':<62} {'bytes':>10} {'reduction':>10}")
+    for name, fields, compact in VARIANTS:
+        shaped = [shape(transaction, parse_fields(fields), compact) for transaction in transactions]
+        size = len(json.dumps(shaped).encode())
+        baseline = baseline or size
+        print(f"{name:<62} {size:>10,} {1 - size / baseline:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures the cold-start cost of the server, i.e. what `mcp run`/`mcp dev` pay before the first answer.
+
+Reports, each in a fresh interpreter:
+- the time to import main.py, which is what happens before the server can accept requests,
+- the time of the first tool call against the local fake Monzo API, with and without MONZO_WARM_UP.
+
+Usage:
+    uv run python benchmarks/startup.py [--runs 5] [--latency-ms 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_tools import free_port, start_fake_api  # noqa: E402
+
+
+def child(mode: str) -> dict:
+    """
+    Runs in the fresh interpreter and returns its timings in milliseconds.
+    """
+    sys.path.insert(0, ROOT)
+
+    started = time.perf_counter()
+    import main
+    timings = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    if mode == "import":
+        return timings
+
+    async def first_call():
+        if mode == "warm":
+            started = time.perf_counter()
+            await main.get_runtime().warm_up()
+            timings["warm_up_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        await main.get_balance()
+        timings["first_call_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        await main.get_balance()
+        timings["second_call_ms"] = (time.perf_counter() - started) * 1000
+
+        await main.get_runtime().aclose()
+
+    asyncio.run(first_call())
+    return timings
+
+
+def run_child(mode: str, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters started per measurement")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="latency added by the fake API")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return
+
+    port = free_port()
+    state_dir = tempfile.mkdtemp(prefix="monzo-startup-")
+    fake_api = start_fake_api(port, {"acc_personal": 1000}, args.latency_ms, 0.0)
+
+    env = dict(
+        os.environ,
+        MONZO_API_URL=f"http://127.0.0.1:{port}/",
+        MONZO_ACCESS_TOKEN="bench",
+        MONZO_STATE_DIR=state_dir,
+        MONZO_RATE_LIMIT_PER_SECOND="0",
+        # So the second call measures a request over the already open connection
+        MONZO_CACHE_TTL_BALANCE_SECONDS="0",
+    )
+    # The warm-up discovers the account id, the cold run gets it from the environment
+    cold_env = dict(env, MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID="acc_personal")
+
+    try:
+        results = {
+            "import": [run_child("import", env) for _ in range(args.runs)],
+            "cold": [run_child("cold", cold_env) for _ in range(args.runs)],
+            "warm": [run_child("warm", env) for _ in range(args.runs)],
+        }
+    finally:
+        fake_api.terminate()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    def median(mode: str, key: str) -> str:
+        values = [run[key] for run in results[mode] if key in run]
+        return f"{statistics.median(values):>9.1f}" if values else f"{'-':>9}"
+
+    print(f"\nStart-up (median of {args.runs} runs, ms)\n{'':<16} {'import':>9} {'warm-up':>9} {'1st call':>9} {'2nd call':>9}")
+    print(f"{'import only':<16} {median('import', 'import_ms')}")
+    for mode, label in (("cold", "first call"), ("warm", "with warm-up")):
+        print(
+            f"{label:<16} {median(mode, 'import_ms')} {median(mode, 'warm_up_ms')} "
+            f"{median(mode, 'first_call_ms')} {median(mode, 'second_call_ms')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
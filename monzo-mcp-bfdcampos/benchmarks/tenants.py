@@ -0,0 +1,171 @@
+"""
+Load test of the multi-tenant mode: throughput of one server process as the number of tenants grows.
+
+Starts the fake Monzo API and the MCP server over streamable HTTP with a tenants file, then
+has 1, 2, 4, ... tenants call `balance` at the same time for a fixed duration, each through
+its own MCP session and API key. Each tenant has its own rate limit (as Monzo limits each
+token separately) and connection pool, so total throughput should grow with the number of
+tenants until the process itself is the bottleneck.
+
+Usage:
+    uv run python benchmarks/tenants.py [--tenants 1,2,4,8,16] [--rate 5] [--callers 4] [--seconds 5] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_tools import free_port, start_fake_api  # noqa: E402
+from monzo.client import percentile  # noqa: E402
+
+SERVER = """
+import main
+main.mcp.settings.host = "127.0.0.1"
+main.mcp.settings.port = {port}
+main.mcp.settings.log_level = "WARNING"
+main.mcp.run("streamable-http")
+"""
+
+
+def write_tenants_file(path: str, count: int, rate: float) -> None:
+    tenants = {
+        f"tenant{number}": {
+            "api_key": f"key-{number}",
+            "settings": {
+                "MONZO_ACCESS_TOKEN": f"token-{number}",
+                "MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID": f"acc_tenant{number}",
+                "MONZO_RATE_LIMIT_PER_SECOND": rate,
+                "MONZO_RATE_LIMIT_BURST": 1,
+            },
+        }
+        for number in range(count)
+    }
+    with open(path, "w") as file:
+        json.dump(tenants, file)
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(port=port)], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1)
+            return process
+        except urllib.error.HTTPError:
+            # Answered, /metrics is only served with MONZO_METRICS_TOKEN
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError("MCP server did not start")
+
+
+async def run_tenants(url: str, tenants: int, callers: int, seconds: float) -> dict:
+    """
+    `tenants` tenants with `callers` concurrent callers each call balance for `seconds`.
+    """
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    timings = []
+    errors = 0
+
+    async with contextlib.AsyncExitStack() as stack:
+        sessions = []
+        for number in range(tenants):
+            read, write, _ = await stack.enter_async_context(
+                streamablehttp_client(url, headers={"Authorization": f"Bearer key-{number}"})
+            )
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+
+        # First call of each tenant creates its runtime, leave it out of the measurement
+        await asyncio.gather(*(session.call_tool("balance", {}) for session in sessions))
+
+        deadline = time.perf_counter() + seconds
+
+        async def caller(session) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                result = await session.call_tool("balance", {})
+                timings.append((time.perf_counter() - start) * 1000)
+                errors += bool(result.isError)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller(session) for session in sessions for _ in range(callers)))
+        elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "calls_per_second": len(timings) / elapsed,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", default="1,2,4,8,16", help="comma separated tenant counts")
+    parser.add_argument("--rate", type=float, default=5, help="rate limit of each tenant, requests per second")
+    parser.add_argument("--callers", type=int, default=4, help="concurrent callers per tenant")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    counts = [int(value) for value in args.tenants.split(",")]
+    state_dir = tempfile.mkdtemp(prefix="monzo-tenants-bench-")
+    tenants_file = os.path.join(state_dir, "tenants.json")
+    write_tenants_file(tenants_file, max(counts), args.rate)
+
+    api_port = free_port()
+    api = start_fake_api(api_port, {f"acc_tenant{number}": 100 for number in range(max(counts))}, args.latency_ms, 0.0)
+
+    server_port = free_port()
+    env = {
+        **os.environ,
+        "MONZO_API_URL": f"http://127.0.0.1:{api_port}/",
+        "MONZO_TENANTS_FILE": tenants_file,
+        "MONZO_STATE_DIR": state_dir,
+        # Every call goes to the API, so the rate limits are what is being measured
+        "MONZO_CACHE_TTL_BALANCE_SECONDS": "0",
+        "MONZO_COALESCE_REQUESTS": "false",
+    }
+    env.pop("MONZO_ACCESS_TOKEN", None)
+    server = start_server(server_port, env)
+
+    try:
+        print(f"Concurrent balance calls, {args.callers} callers per tenant, each tenant limited to {args.rate:g} requests/s")
+        print(f"{'tenants':>8} {'calls/s':>9} {'per tenant':>11} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for count in counts:
+            result = asyncio.run(run_tenants(f"http://127.0.0.1:{server_port}/mcp", count, args.callers, args.seconds))
+            print(
+                f"{count:>8} {result['calls_per_second']:>9.1f} {result['calls_per_second'] / count:>11.1f} "
+                f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['errors']:>7}"
+            )
+    finally:
+        server.terminate()
+        api.terminate()
+        server.wait()
+        api.wait()
+
+
+if __name__ == "__main__":
+    main()
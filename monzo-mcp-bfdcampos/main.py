@@ -1,44 +1,287 @@
 from mcp.server.fastmcp import FastMCP
-import requests
-from dotenv import load_dotenv
+from mcp.server.fastmcp.exceptions import ToolError
+from contextlib import asynccontextmanager
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+import asyncio
+import logging
 import os
+import time
 import uuid
 import datetime
+import hmac
+import json
+
+from monzo.cache import cached_get
+from monzo.client import decode_json, raise_for_error
+from monzo.concurrency import gather_limited
+from monzo.config import load_settings
+from monzo.export import export_transactions as write_export
+from monzo.journal import BatchJournal
+from monzo.metrics import content_size, tool_metrics
+from monzo.pot_rules import parse_rules, plan_transfers, round_up_window, undo_transfer
+from monzo.profiler import SamplingProfiler
+from monzo.projection import parse_fields, shape
+from monzo.runtime import Runtime
+from monzo.store import normalise_timestamp
+from monzo.sync import sync_transactions
+from monzo.tenants import TenantRegistry
+from monzo.webhooks import WEBHOOK_PATH, create_server
+
+logger = logging.getLogger(__name__)
+
+balance_url = "balance"
+accounts_url = "accounts"
+pots_url = "pots"
+transactions_url = "transactions"
+
+_runtime = None
+_tenants = None
+
+# Sessions inside the lifespan, and how to stop the services the first of them started
+_lifespans = 0
+_stop_services = None
+
+def get_tenants() -> TenantRegistry:
+    """
+    The tenants of a multi-tenant server (MONZO_TENANTS_FILE), or None when serving a single user.
+    """
+    global _tenants
+
+    settings = load_settings()
+    if _tenants is None and settings.tenants_file:
+        _tenants = TenantRegistry(settings, accounts_path=accounts_url)
+
+    return _tenants
+
+def _http_request() -> Request:
+    """
+    HTTP request the current tool call came in with, None over stdio and outside tool calls.
+    """
+    try:
+        return mcp.get_context().request_context.request
+    except ValueError:
+        return None
+
+def _bearer_token(request: Request) -> str:
+    """
+    Token of the request's `Authorization: Bearer` header, None without one.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else None
+
+def _tenant_id() -> str:
+    """
+    Id of the tenant the current tool call is made for, None when serving a single user.
+    """
+    tenants = get_tenants()
+    if tenants is None:
+        return None
+
+    request = _http_request()
+    if request is None and load_settings().tenant:
+        # A stdio server can be pinned to one tenant, HTTP clients always need their key
+        return load_settings().tenant
+    return tenants.tenant_for_key(_bearer_token(request) if request is not None else None)
+
+def _metrics_tenant() -> str:
+    """
+    Tenant a tool call's metrics are recorded under, None for calls refused for want of a valid key.
+    """
+    try:
+        return _tenant_id()
+    except Exception:
+        return None
+
+def get_runtime() -> Runtime:
+    """
+    The client, cache and store shared by every tool, created with the configuration on the first call.
+    In multi-tenant mode, those of the tenant whose API key the current request carries.
+    """
+    global _runtime
+
+    tenants = get_tenants()
+    if tenants is not None:
+        return tenants.runtime(_tenant_id())
+
+    if _runtime is None:
+        _runtime = Runtime(load_settings(), accounts_path=accounts_url)
 
-load_dotenv()
+    return _runtime
+
+def _hours_ago(hours: int) -> str:
+    """
+    Timestamp of `hours` ago, computed per call so long-running servers don't use a stale default.
+    """
+    return (datetime.datetime.utcnow() - datetime.timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-mcp = FastMCP("Monzo")
+async def _start_services():
+    """
+    Optionally warms up, starts the webhook receiver, tracing and the profiler.
+    Returns the coroutine function that stops them and closes connections.
+    """
+    warm_up = None
+    webhook_server = None
+    webhook_task = None
+    profiler = None
+    try:
+        settings = load_settings()
+        tenants = get_tenants()
+        if settings.otel and not tool_metrics.enable_tracing():
+            logger.warning("MONZO_OTEL is set but opentelemetry-api is not installed")
+        if settings.profile_path:
+            profiler = SamplingProfiler(settings.profile_path, interval=settings.profile_interval)
+            profiler.start()
+        if settings.warm_up and tenants is not None:
+            warm_up = asyncio.create_task(
+                gather_limited([tenants.runtime(tenant_id).warm_up for tenant_id in tenants.ids()], settings.fanout_concurrency)
+            )
+        elif settings.warm_up:
+            warm_up = asyncio.create_task(get_runtime().warm_up())
+        if settings.webhook_port and tenants is not None:
+            logger.warning("Webhooks are not available in multi-tenant mode, ignoring MONZO_WEBHOOK_PORT")
+        elif settings.webhook_port:
+            webhook_server = create_server(get_runtime().webhooks, settings.webhook_host, settings.webhook_port)
+            webhook_task = asyncio.create_task(webhook_server.serve())
+    except Exception as error:
+        # Tools report configuration errors when they are called
+        logger.warning("Skipping warm-up, webhooks and profiling: %s", error)
+
+    async def stop():
+        global _runtime, _tenants
+
+        if warm_up is not None:
+            warm_up.cancel()
+        if webhook_server is not None:
+            webhook_server.should_exit = True
+            await webhook_task
+        # Closed clients cannot be reused, the next session builds new ones
+        if _runtime is not None:
+            await _runtime.aclose()
+            _runtime = None
+        if _tenants is not None:
+            await _tenants.aclose()
+            _tenants = None
+        if profiler is not None:
+            profiler.stop()
+
+    return stop
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """
+    Starts the shared services when the server starts and stops them when it stops.
+    Over SSE and streamable HTTP every client session enters the lifespan, so the
+    first open session starts them and the last one to close stops them.
+    """
+    global _lifespans, _stop_services
 
-access_token = os.getenv("MONZO_ACCESS_TOKEN")
-user_id = os.getenv("MONZO_USER_ID")
+    _lifespans += 1
+    if _lifespans == 1:
+        _stop_services = await _start_services()
 
-last_hour = (datetime.datetime.utcnow() - datetime.timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    try:
+        yield
+    finally:
+        _lifespans -= 1
+        if _lifespans == 0:
+            await _stop_services()
 
-# Get all account IDs from environment variables
-uk_prepaid_personal_account_id = os.getenv("MONZO_UK_PREPAID_PERSONAL_ACCOUNT_ID")
-uk_retail_personal_account_id = os.getenv("MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID")
-uk_monzo_flex_personal_account_id = os.getenv("MONZO_UK_MONZO_FLEX_PERSONAL_ACCOUNT_ID")
-uk_rewards_personal_account_id = os.getenv("MONZO_UK_REWARDS_PERSONAL_ACCOUNT_ID")
-uk_retail_joint_joint_account_id = os.getenv("MONZO_UK_RETAIL_JOINT_JOINT_ACCOUNT_ID")
+class MonzoMCP(FastMCP):
+    """
+    FastMCP timing how long converting each tool's result into the content sent takes, and its size.
+    """
+
+    async def call_tool(self, name: str, arguments: dict):
+        tool = self._tool_manager.get_tool(name)
+        if tool is None:
+            return await super().call_tool(name, arguments)
+
+        result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+
+        start = time.perf_counter()
+        try:
+            content = tool.fn_metadata.convert_result(result)
+        except Exception as error:
+            raise ToolError(f"Error executing tool {name}: {error}") from error
+        tool_metrics.record_serialization(name, time.perf_counter() - start, content_size(content), tenant=_metrics_tenant())
+
+        return content
+
+mcp = MonzoMCP("Monzo", lifespan=lifespan)
+
+def tool(name: str):
+    """
+    Registers an async function as the tool `name`, recording its calls and latency.
+    """
+    def register(function):
+        return mcp.tool(name)(tool_metrics.instrument(name, function, tenant=_metrics_tenant))
+    return register
 
-# Create a dictionary of account types for easier reference
-account_types = {
-    "default": uk_retail_personal_account_id,
-    "personal": uk_retail_personal_account_id,
-    "prepaid": uk_prepaid_personal_account_id,
-    "flex": uk_monzo_flex_personal_account_id,
-    "rewards": uk_rewards_personal_account_id,
-    "joint": uk_retail_joint_joint_account_id
-}
+@mcp.custom_route(WEBHOOK_PATH, methods=["POST"])
+async def monzo_webhook(request: Request) -> JSONResponse:
+    """
+    Receives Monzo webhooks when the server runs over SSE or streamable HTTP and MONZO_WEBHOOKS is true.
+    """
+    if not load_settings().webhooks or get_tenants() is not None:
+        return JSONResponse({"error": "webhooks are disabled"}, status_code=404)
 
-url = "https://api.monzo.com/"
-balance_url = f"{url}balance"
-accounts_url = f"{url}accounts"
-pots_url = f"{url}pots"
-transactions_url = f"{url}transactions"
+    return await get_runtime().webhooks.handle(request)
 
-@mcp.tool("balance")
-def get_balance(account_type: str = "personal", total_balance: bool = False) -> dict:
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """
+    Tool metrics of every tenant in the Prometheus text format, when the server runs over SSE or streamable HTTP
+    and MONZO_METRICS_TOKEN is set. Scrapers send the token as `Authorization: Bearer <token>`.
+    """
+    token = load_settings().metrics_token
+    if not token:
+        return PlainTextResponse("metrics are disabled, set MONZO_METRICS_TOKEN\n", status_code=404)
+    if not hmac.compare_digest((_bearer_token(request) or "").encode(), token.encode()):
+        return PlainTextResponse("unauthorised\n", status_code=401)
+
+    text = tool_metrics.prometheus(every_tenant=True)
+    tenants = get_tenants()
+    if tenants is not None:
+        for name, value in tenants.stats().items():
+            text += f"# HELP monzo_mcp_tenants_{name} Tenants {name}.\n# TYPE monzo_mcp_tenants_{name} gauge\n"
+            text += f"monzo_mcp_tenants_{name} {value}\n"
+
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+async def _stored_transactions(account_id: str, since: str, before: str = None, refresh: bool = False, limit: int = None):
+    """
+    Syncs the account into the local transaction store and returns an iterator over its
+    transactions created in [since, before).
+    """
+    runtime = get_runtime()
+
+    def sync():
+        return sync_transactions(
+            runtime.client,
+            runtime.transaction_store,
+            account_id,
+            since,
+            force=refresh,
+            interval=runtime.sync_interval,
+            overlap=runtime.settings.sync_overlap,
+            windows=runtime.settings.sync_windows,
+        )
+
+    if runtime.settings.coalesce_requests:
+        await runtime.sync_flights.run((account_id, normalise_timestamp(since), refresh), sync)
+    else:
+        await sync()
+
+    return runtime.transaction_store.iter_query(
+        account_id,
+        since=normalise_timestamp(since),
+        before=normalise_timestamp(before) if before else None,
+        limit=limit,
+    )
+
+@tool("balance")
+async def get_balance(account_type: str = "personal", total_balance: bool = False) -> dict:
     """
     Returns the information about an account including the balance in the lower denomination 
     of the specified Monzo account's currency. I.e. GBP, the balance is in pence. E.g. 9155 is £91.55.
@@ -66,28 +309,15 @@ def get_balance(account_type: str = "personal", total_balance: bool = False) ->
         "local_spend": array,
     }
     """
-    account_type = account_type.lower()
-    
-    selected_account_id = account_types.get(account_type)
-    
-    if not selected_account_id:
-        selected_account_id = account_types["personal"]
-        
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+    runtime = get_runtime()
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
 
     params = {
         "account_id": selected_account_id,
     }
 
-    response = requests.get(balance_url, headers=headers, params=params)
-
-    if response.status_code != 200:
-        raise Exception(f"Error: {response_data.get('error', 'Unknown error')}")
-
-    response_data = response.json()
+    response_data = await cached_get(runtime.client, runtime.response_cache, balance_url, selected_account_id, params)
 
     if total_balance:
         return response_data
@@ -97,8 +327,8 @@ def get_balance(account_type: str = "personal", total_balance: bool = False) ->
 
     return response_data
 
-@mcp.tool("pots")
-def get_pots_information(account_type: str = "personal") -> dict:
+@tool("pots")
+async def get_pots_information(account_type: str = "personal") -> dict:
     """
     Returns the pots information of the specified Monzo account including the balance
     in the lower denomination of the specified Monzo account's currency.
@@ -143,34 +373,22 @@ def get_pots_information(account_type: str = "personal") -> dict:
     }
 
     """
-    account_type = account_type.lower()
-    
-    selected_account_id = account_types.get(account_type)
-    
-    if not selected_account_id:
-        selected_account_id = account_types["personal"]
-        
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    
+    runtime = get_runtime()
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
     params = {
         "current_account_id": selected_account_id,
     }
 
-    response = requests.get(pots_url, headers=headers, params=params)
-    response_data = response.json()
-
-    if response.status_code != 200:
-        raise Exception(f"Error: {response_data.get('error', 'Unknown error')}")
+    response_data = await cached_get(runtime.client, runtime.response_cache, pots_url, selected_account_id, params)
 
     pots = response_data.get("pots", [])
 
     return pots
 
-@mcp.tool("pot_deposit")
-def pot_deposit(
+@tool("pot_deposit")
+async def pot_deposit(
         pot_id: str,
         amount: int,
         account_type: str = "personal"
@@ -220,30 +438,31 @@ def pot_deposit(
         "triggered_timestamp": str (UTC ISO 8601), # The timestamp of the deposit transaction useful to filter the list_transactions tool with `since: current_timestamp UTC minus an hour`
     }
     """
-    url = f"{pots_url}/{pot_id}/deposit"
+    runtime = get_runtime()
+
+    pot_url = f"{pots_url}/{pot_id}/deposit"
 
     triggered_by = "mcp"
 
     dedupe_id = f"{triggered_by}_{str(uuid.uuid4())}"
-        
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
-    
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
     data = {
-        "source_account_id": account_types.get(account_type, account_types["personal"]),
+        "source_account_id": selected_account_id,
         "amount": amount,
         "dedupe_id": dedupe_id,
     }
 
-    response = requests.put(url, headers=headers, data=data)
-    
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.json().get('error', 'Unknown error')}")
+    # Safe to retry: Monzo applies a transfer with the same dedupe_id only once
+    response = await runtime.client.put(pot_url, data=data, idempotent=True)
+
+    raise_for_error(response)
+
+    runtime.response_cache.invalidate(selected_account_id)
 
     # Add dedupe_id and the current timestamp to the response
-    response_data = response.json()
+    response_data = decode_json(response)
 
     response_data["dedupe_id"] = dedupe_id
     response_data["metadata"] = {
@@ -253,8 +472,8 @@ def pot_deposit(
     
     return response_data
 
-@mcp.tool("pot_withdraw")
-def pot_withdraw(
+@tool("pot_withdraw")
+async def pot_withdraw(
         pot_id: str,
         amount: int,
         account_type: str = "personal"
@@ -303,29 +522,30 @@ def pot_withdraw(
         "triggered_timestamp": str (UTC ISO 8601), # The timestamp of the withdrawal transaction useful to filter the list_transactions tool with `since: current_timestamp UTC minus an hour`
     }
     """
-    url = f"{pots_url}/{pot_id}/withdraw"
+    runtime = get_runtime()
+
+    pot_url = f"{pots_url}/{pot_id}/withdraw"
 
     triggered_by = "mcp"
 
     dedupe_id = f"{triggered_by}_{str(uuid.uuid4())}"
-        
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
-    
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
     data = {
-        "destination_account_id": account_types.get(account_type, account_types["personal"]),
+        "destination_account_id": selected_account_id,
         "amount": amount,
         "dedupe_id": dedupe_id,
     }
 
-    response = requests.put(url, headers=headers, data=data)
-    
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.json().get('error', 'Unknown error')}")
+    # Safe to retry: Monzo applies a transfer with the same dedupe_id only once
+    response = await runtime.client.put(pot_url, data=data, idempotent=True)
 
-    response_data = response.json()
+    raise_for_error(response)
+
+    runtime.response_cache.invalidate(selected_account_id)
+
+    response_data = decode_json(response)
 
     response_data["dedupe_id"] = dedupe_id
     response_data["metadata"] = {
@@ -335,15 +555,164 @@ def pot_withdraw(
     
     return response_data
 
-@mcp.tool("list_transactions")
-def list_transactions(
+@tool("apply_pot_rules")
+async def apply_pot_rules(rules: list[dict], account_type: str = "personal", dry_run: bool = False) -> dict:
+    """
+    Applies rules that move money between an account and its pots in one call, e.g. sweeping everything
+    above £1,000 into savings, splitting salary between pots, or saving the round-ups of last month's payments.
+    Use this instead of several pot_deposit and pot_withdraw calls.
+
+    The rules are evaluated in order against the current balance and pots, and their moves are combined into
+    at most one transfer per pot, made concurrently. Each rule moves money into or out of a pot once per period:
+    moves made by an earlier run in the same period are skipped, so running the rules again never moves the money twice.
+    Use dry_run=True to see the planned transfers without making them.
+
+    All amounts are in the lower denomination of the account's currency. I.e. GBP, the amount is in pence. E.g. 9155 is £91.55.
+
+    Parameters:
+    rules (list): The rules, applied in order. Each one is one of
+                  {"type": "sweep", "pot_id": str, "above": int} # move the balance above `above` into the pot
+                  {"type": "floor", "pot_id": str, "minimum": int} # withdraw from the pot to keep the balance at `minimum`
+                  {"type": "target", "pot_id": str, "target": int} # deposit until the pot holds `target`
+                  {"type": "split", "amount": int, "keep": int,
+                   "allocations": [{"pot_id": str, "percent": float}, {"pot_id": str, "amount": int}, ...]}
+                      # share `amount`, or the balance above `keep` when amount is not given, between pots
+                  {"type": "round_up", "pot_id": str, "to": int} # save the change of rounding each payment of the
+                      # previous period up to a multiple of `to` (default 100, i.e. £1)
+                  with optionally "name": str (keep it the same when changing a rule) and
+                  "period": "day", "week" or "month" (default), how often the rule may move money.
+    account_type (str): Type of account the pots belong to.
+                        Options:
+                            - "default" (default)
+                            - "personal"
+                            - "prepaid"
+                            - "flex"
+                            - "rewards"
+                            - "joint"
+    dry_run (bool): Only plan the transfers. Default is False.
+
+    Returns:
+    {
+        "dry_run": bool,
+        "rules": [
+            {
+                "rule": str, # name of the rule
+                "type": str,
+                "period": str, # e.g. "2025-05"
+                "moves": [{"pot_id": str, "amount": int}, ...], # positive amounts are deposits
+                "notes": [str], # e.g. a pot that was not found, or a move already made this period
+            },
+            ...
+        ],
+        "transfers": [
+            {
+                "pot_id": str,
+                "pot_name": str,
+                "direction": str, # "deposit" or "withdraw"
+                "amount": int,
+                "dedupe_id": str,
+                "rules": [str], # rules behind this transfer
+                "moves": [str], # the rule, period and pot of each move it makes, e.g. "savings@2025-05:pot_..."
+                "status": str, # "planned", "ok" or "error"
+                "error": str, # only if status is "error"
+            },
+            ...
+        ],
+        "balance_before": int,
+        "balance_after": int, # once the planned transfers are made, without those that failed
+        "pots_after": {"pot_...": int, ...}, # likewise
+    }
+    """
+    runtime = get_runtime()
+
+    rules = parse_rules(rules)
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
+    # Rules must see the balances as they are now, not as cached
+    runtime.response_cache.invalidate(selected_account_id)
+    balance, pots = await asyncio.gather(
+        cached_get(runtime.client, runtime.response_cache, balance_url, selected_account_id, {"account_id": selected_account_id}),
+        cached_get(runtime.client, runtime.response_cache, pots_url, selected_account_id, {"current_account_id": selected_account_id}),
+    )
+
+    now = datetime.datetime.utcnow()
+    transactions = []
+    window = round_up_window(rules, now)
+    if window:
+        since, before = (moment.strftime("%Y-%m-%dT%H:%M:%SZ") for moment in window)
+        transactions = list(await _stored_transactions(selected_account_id, since, before))
+
+    # Moves made by an earlier run, already in the balances just read
+    journal = BatchJournal(os.path.join(runtime.settings.state_dir, "pot_rules"), selected_account_id)
+    result = plan_transfers(
+        rules, selected_account_id, balance.get("balance") or 0, pots.get("pots", []), now, transactions,
+        applied=lambda key: journal.is_done(key, "applied"),
+    )
+    result = {"dry_run": dry_run, **result}
+
+    for transfer in result["transfers"]:
+        transfer["status"] = "planned"
+
+    if dry_run:
+        return result
+
+    async def make(transfer: dict) -> None:
+        account_key = "source_account_id" if transfer["direction"] == "deposit" else "destination_account_id"
+        data = {
+            account_key: selected_account_id,
+            "amount": transfer["amount"],
+            "dedupe_id": transfer["dedupe_id"],
+        }
+
+        # Safe to retry: Monzo applies a transfer with the same dedupe_id only once
+        response = await runtime.client.put(
+            f"{pots_url}/{transfer['pot_id']}/{transfer['direction']}", data=data, idempotent=True
+        )
+        raise_for_error(response)
+
+        for key in transfer["moves"]:
+            journal.mark_done(key, "applied")
+
+    # Withdrawals first, deposits may need the money they bring back to the account
+    for direction in ("withdraw", "deposit"):
+        pending = [
+            transfer for transfer in result["transfers"]
+            if transfer["direction"] == direction and transfer["status"] == "planned"
+        ]
+        outcomes = await gather_limited(
+            [lambda transfer=transfer: make(transfer) for transfer in pending],
+            runtime.settings.batch_concurrency,
+        )
+        for transfer, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                transfer["status"] = "error"
+                transfer["error"] = str(outcome)
+                undo_transfer(result, transfer)
+            else:
+                transfer["status"] = "ok"
+
+    runtime.response_cache.invalidate(selected_account_id)
+    journal.save()
+
+    return result
+
+@tool("list_transactions")
+async def list_transactions(
         account_type: str = "personal",
-        since: str = last_hour,
+        since: str = None,
         before: str = None,
-        limit: int = 1000
+        limit: int = 1000,
+        refresh: bool = False,
+        fields: str = None,
+        compact: bool = False
     ) -> dict:
     """
     Returns a list of transactions for the specified Monzo account.
+
+    Transactions are served from a local copy of the account history which is kept up to date
+    incrementally, so only new or recently changed transactions are downloaded. The whole date range
+    is always covered, however many pages of results Monzo splits it into.
     
     Parameters:
     account_type (str): Type of account to list transactions for. 
@@ -357,6 +726,10 @@ def list_transactions(
     since (str): The start date for the transactions in ISO 8601 format. Default is the last hour.
     before (str): The end date for the transactions in ISO 8601 format. Default is None.
     limit (int): The maximum number of transactions to return. Default is 1000.
+    refresh (bool): Set to True to force a live refresh from Monzo, e.g. right after a payment or pot transfer. Default is False.
+    fields (str): Optional comma separated list of the fields to return, e.g. "created,amount,description,merchant.name".
+                  Default is None (all fields). Use this whenever only a few fields are needed.
+    compact (bool): Drop null and empty values and the "can_*" flags from the result. Default is False.
 
     Returns:
     {
@@ -414,39 +787,26 @@ def list_transactions(
         ]
     }
     """
+    runtime = get_runtime()
 
-    account_type = account_type.lower()
-
-    selected_account_id = account_types.get(account_type)
-
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-
-    params = {
-        "account_id": selected_account_id,
-        "since": since,
-        "before": before,
-        "limit": limit,
-        "expand[]": "merchant",
-    }
+    since = since or _hours_ago(1)
 
-    response = requests.get(transactions_url, headers=headers, params=params)
+    selected_account_id = await runtime.accounts.resolve(account_type)
 
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.json().get('error', 'Unknown error')}")
+    transactions = await _stored_transactions(selected_account_id, since, before, refresh=refresh, limit=limit)
 
-    response_data = response.json()
-
-    transactions = response_data.get("transactions", [])
+    # Shape each transaction as it is read so only the trimmed versions are held
+    selected_fields = parse_fields(fields)
+    transactions = [shape(transaction, selected_fields, compact) for transaction in transactions]
 
     return transactions
 
-@mcp.tool("retrieve_transaction")
-def retrieve_transaction(
+@tool("retrieve_transaction")
+async def retrieve_transaction(
         transaction_id: str,
-        expand: str = "merchant"
+        expand: str = "merchant",
+        fields: str = None,
+        compact: bool = False
     ) -> dict:
     """
     Returns the details of a specific transaction.
@@ -454,6 +814,9 @@ def retrieve_transaction(
     Parameters:
     transaction_id (str): The ID of the transaction to retrieve.
     expand (str): Optional. The type of data to expand. Default is "merchant".
+    fields (str): Optional comma separated list of the fields to return, e.g. "created,amount,notes,metadata.pot_id".
+                  Default is None (all fields).
+    compact (bool): Drop null and empty values and the "can_*" flags from the result. Default is False.
 
     Returns:
     {
@@ -511,27 +874,155 @@ def retrieve_transaction(
         }
     }
     """
-
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+    runtime = get_runtime()
 
     params = {
         "expand[]": expand,
     }
 
-    response = requests.get(f"{transactions_url}/{transaction_id}", headers=headers, params=params)
+    # No need to download the merchant again when it is already in the local merchant cache
+    if expand == "merchant" and runtime.transaction_store.has_cached_merchant(transaction_id):
+        params = {}
+
+    response = await runtime.client.get(f"{transactions_url}/{transaction_id}", params=params)
+
+    raise_for_error(response)
 
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.json().get('error', 'Unknown error')}")
+    response_data = decode_json(response)
 
-    response_data = response.json()
+    if expand == "merchant":
+        runtime.transaction_store.hydrate(response_data["transaction"])
+
+    if fields or compact:
+        response_data["transaction"] = shape(response_data["transaction"], parse_fields(fields), compact)
 
     return response_data
 
-@mcp.tool("annotate_transaction")
-def annotate_transaction(
+@tool("retrieve_transactions")
+async def retrieve_transactions(
+        transaction_ids: list[str] = None,
+        external_ids: list[str] = None,
+        dedupe_ids: list[str] = None,
+        account_type: str = None,
+        since: str = None,
+        refresh: bool = False,
+        fields: str = None,
+        compact: bool = False
+    ) -> dict:
+    """
+    Returns many transactions at once, by transaction id or by the external_id or dedupe_id they were made with.
+    Use this instead of several retrieve_transaction calls, and to find the transactions of pot transfers
+    from the "dedupe_id"/"metadata.external_id" returned by pot_deposit and pot_withdraw.
+
+    Transactions are read from the local copy of the account history first. Transaction ids that are not
+    stored are then fetched from Monzo concurrently. External and dedupe ids that are not stored trigger one
+    refresh of the local copy, e.g. for a pot transfer made a moment ago, and are looked up again.
+
+    Parameters:
+    transaction_ids (list[str]): Transaction ids, e.g. ["tx_0000A1b2C3d4E5f6G7h8I9"].
+    external_ids (list[str]): Values of metadata.external_id, e.g. the dedupe_id of a pot transfer made by pot_deposit.
+    dedupe_ids (list[str]): Values of the transactions' dedupe_id field.
+    account_type (str): Only look external and dedupe ids up in this account. Default is None (every account).
+    since (str): How far back the refresh for missing external and dedupe ids reaches in an account
+                 that was never synced, in ISO 8601 format. Default is the last day.
+    refresh (bool): Fetch every transaction live from Monzo instead of using the local copy. Default is False.
+    fields (str): Optional comma separated list of the fields to return, e.g. "created,amount,notes,metadata.pot_id".
+                  Default is None (all fields).
+    compact (bool): Drop null and empty values and the "can_*" flags from the result. Default is False.
+
+    Returns:
+    {
+        "transactions": [
+            {...}, # same fields as retrieve_transaction, in the order they were asked for
+            ...
+        ],
+        "not_found": [str], # ids, external ids and dedupe ids without a transaction
+        "errors": {"tx_...": str}, # transaction ids that could not be fetched
+        "local": int, # transactions answered from the local copy
+        "fetched": int, # transactions fetched from Monzo
+    }
+    """
+    runtime = get_runtime()
+    store = runtime.transaction_store
+
+    transaction_ids = list(dict.fromkeys(transaction_ids or []))
+    external_ids = list(dict.fromkeys(external_ids or []))
+    dedupe_ids = list(dict.fromkeys(dedupe_ids or []))
+
+    if not (transaction_ids or external_ids or dedupe_ids):
+        raise Exception("Error: pass transaction_ids, external_ids or dedupe_ids")
+
+    account_ids = None
+    if account_type:
+        account_ids = [await runtime.accounts.resolve(account_type)]
+
+    by_id = {} if refresh else store.lookup("id", transaction_ids)
+    by_external_id = {} if refresh else store.lookup("external_id", external_ids, account_ids)
+    by_dedupe_id = {} if refresh else store.lookup("dedupe_id", dedupe_ids, account_ids)
+    local = len(by_id) + len(by_external_id) + len(by_dedupe_id)
+
+    # Transaction ids can be fetched directly
+    missing_ids = [transaction_id for transaction_id in transaction_ids if transaction_id not in by_id]
+
+    async def fetch(transaction_id: str) -> dict:
+        response = await runtime.client.get(f"{transactions_url}/{transaction_id}", params={"expand[]": "merchant"})
+        raise_for_error(response)
+        return decode_json(response)["transaction"]
+
+    fetched = await gather_limited(
+        [lambda transaction_id=transaction_id: fetch(transaction_id) for transaction_id in missing_ids],
+        runtime.settings.batch_concurrency,
+    )
+
+    errors = {}
+    fetched_transactions = []
+    for transaction_id, transaction in zip(missing_ids, fetched):
+        if isinstance(transaction, Exception):
+            errors[transaction_id] = str(transaction)
+        else:
+            fetched_transactions.append(transaction)
+            by_id[transaction_id] = transaction
+
+    if fetched_transactions:
+        # Keep them so the next lookup is local
+        store.upsert(fetched_transactions)
+
+    # External and dedupe ids can only be found by listing transactions: refresh the local copy once
+    if any(value not in by_external_id for value in external_ids) or any(value not in by_dedupe_id for value in dedupe_ids):
+        since = since or _hours_ago(24)
+        sync_account_ids = account_ids or list((await runtime.accounts.all()).values())
+
+        def sync(account_id: str):
+            return lambda: _stored_transactions(account_id, since, refresh=True)
+
+        results = await gather_limited([sync(account_id) for account_id in sync_account_ids], runtime.settings.fanout_concurrency)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        by_external_id.update(store.lookup("external_id", [value for value in external_ids if value not in by_external_id], account_ids))
+        by_dedupe_id.update(store.lookup("dedupe_id", [value for value in dedupe_ids if value not in by_dedupe_id], account_ids))
+
+    selected_fields = parse_fields(fields)
+    transactions = []
+    not_found = []
+    for values, found in ((transaction_ids, by_id), (external_ids, by_external_id), (dedupe_ids, by_dedupe_id)):
+        for value in values:
+            if value in found:
+                transactions.append(shape(found[value], selected_fields, compact))
+            elif value not in errors:
+                not_found.append(value)
+
+    return {
+        "transactions": transactions,
+        "not_found": not_found,
+        "errors": errors,
+        "local": local,
+        "fetched": len(fetched_transactions),
+    }
+
+@tool("annotate_transaction")
+async def annotate_transaction(
         transaction_id: str,
         metadata_key: str = "notes",
         metadata_value: str = "",
@@ -603,44 +1094,720 @@ def annotate_transaction(
         }
     }
     """
+    runtime = get_runtime()
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
-
-    data = {} 
+    data = {}
 
     data[f"metadata[{metadata_key}]"] = metadata_value
 
-    response = requests.patch(f"{transactions_url}/{transaction_id}", headers=headers, data=data)
+    response = await runtime.client.patch(f"{transactions_url}/{transaction_id}", data=data)
 
-    if response.status_code != 200:
-        raise Exception(f"Error: {response.json().get('error', 'Unknown error')}")
+    raise_for_error(response)
 
-    response_data = response.json()
+    response_data = decode_json(response)
+
+    runtime.transaction_store.apply_annotation(response_data["transaction"])
 
     return response_data
 
+@tool("annotate_transactions")
+async def annotate_transactions(annotations: list[dict], batch_id: str = None) -> dict:
+    """
+    Annotate many transactions at once. All the metadata of one transaction is written in a single request
+    and transactions are annotated concurrently. Use this instead of calling annotate_transaction repeatedly.
 
+    If some annotations fail, call the tool again with the same annotations and batch_id: the ones
+    that already succeeded are skipped and only the rest are retried.
 
+    Parameters:
+    annotations (list): The annotations to make, each one being
+                        {
+                            "transaction_id": str,
+                            "metadata": {"notes": "Team lunch", "project": "acme", ...}, # empty value deletes the key
+                        }
+    batch_id (str): Optional name of the batch, e.g. "expenses-2025-05", to be able to resume it after a partial failure.
+                    Default is None (no resuming).
 
+    Returns:
+    {
+        "batch_id": str,
+        "succeeded": int,
+        "skipped": int, # already annotated in an earlier run of the same batch_id
+        "failed": int,
+        "results": [
+            {
+                "transaction_id": str,
+                "status": str, # "ok", "skipped" or "error"
+                "error": str, # only if status is "error"
+            },
+            ...
+        ]
+    }
+    """
+    runtime = get_runtime()
 
+    journal = BatchJournal(os.path.join(runtime.settings.state_dir, "batches"), batch_id) if batch_id else None
 
+    # Merge entries for the same transaction so each one gets a single PATCH
+    merged = {}
+    for annotation in annotations:
+        merged.setdefault(annotation["transaction_id"], {}).update(annotation.get("metadata", {}))
 
+    def fingerprint(metadata: dict) -> str:
+        return json.dumps(metadata, sort_keys=True)
 
+    async def annotate(transaction_id: str, metadata: dict) -> dict:
+        data = {f"metadata[{key}]": value for key, value in metadata.items()}
 
+        response = await runtime.client.patch(f"{transactions_url}/{transaction_id}", data=data)
 
+        raise_for_error(response)
 
+        runtime.transaction_store.apply_annotation(decode_json(response)["transaction"])
 
+        if journal:
+            journal.mark_done(transaction_id, fingerprint(metadata))
 
+    pending = [
+        transaction_id for transaction_id, metadata in merged.items()
+        if not (journal and journal.is_done(transaction_id, fingerprint(metadata)))
+    ]
 
+    outcomes = await gather_limited(
+        [lambda transaction_id=transaction_id: annotate(transaction_id, merged[transaction_id]) for transaction_id in pending],
+        runtime.settings.batch_concurrency,
+    )
+    outcomes = dict(zip(pending, outcomes))
 
+    if journal:
+        journal.save()
 
+    results = []
+    for transaction_id in merged:
+        if transaction_id not in outcomes:
+            results.append({"transaction_id": transaction_id, "status": "skipped"})
+        elif isinstance(outcomes[transaction_id], Exception):
+            results.append({"transaction_id": transaction_id, "status": "error", "error": str(outcomes[transaction_id])})
+        else:
+            results.append({"transaction_id": transaction_id, "status": "ok"})
 
+    return {
+        "batch_id": batch_id,
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "skipped": sum(result["status"] == "skipped" for result in results),
+        "failed": sum(result["status"] == "error" for result in results),
+        "results": results,
+    }
 
+@tool("spending_summary")
+async def spending_summary(
+        account_type: str = "personal",
+        since: str = None,
+        before: str = None,
+        group_by: str = "category",
+        percentiles: str = "50,90",
+        spending_only: bool = True
+    ) -> dict:
+    """
+    Returns a compact table summarising transactions grouped by category, merchant, time period
+    and/or currency, computed on the server. Use this instead of list_transactions to answer questions like
+    "how much did I spend on eating out per month this year?".
+
+    Amounts are in the lower denomination of the account's currency and keep Monzo's sign convention,
+    i.e. money spent is negative. E.g. -9155 is £91.55 spent.
+
+    Parameters:
+    account_type (str): Type of account to summarise.
+                        Options:
+                            - "default" (default)
+                            - "personal"
+                            - "prepaid"
+                            - "flex"
+                            - "rewards"
+                            - "joint"
+    since (str): The start date for the transactions in ISO 8601 format. Default is the last hour.
+    before (str): The end date for the transactions in ISO 8601 format. Default is None.
+    group_by (str): Comma separated list of what to group by. Default is "category".
+                    Options:
+                        - "category"
+                        - "merchant"
+                        - "day"
+                        - "week"
+                        - "month"
+                        - "local_currency"
+                    E.g. "month,category" gives the spend of each category in each month.
+    percentiles (str): Comma separated percentiles of the size of the transaction amounts to include per group,
+                       so p90 is a larger payment than p50. They carry the sign of the group's sum, negative
+                       for spending. Default is "50,90".
+    spending_only (bool): Only include money spent (outgoing transactions counted in spending). Default is True.
+
+    Returns:
+    {
+        "columns": ["category", "sum", "count", "mean", "p50", "p90"],
+        "rows": [
+            ["eating_out", -45210, 37, -1221.89, -950.0, -2400.0],
+            ...
+        ], # chronological when grouped by a period first, otherwise biggest spend first
+    }
+    """
+    runtime = get_runtime()
+
+    since = since or _hours_ago(1)
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
+    transactions = list(await _stored_transactions(selected_account_id, since, before))
+
+    # Imported on first use, numpy adds noticeably to the server's start-up time
+    from monzo.analytics import summarise
+
+    return summarise(
+        transactions,
+        group_by=[name.strip() for name in group_by.split(",") if name.strip()],
+        percentiles=[float(value) for value in percentiles.split(",") if value.strip()],
+        spending_only=spending_only,
+    )
+
+@tool("detect_recurring")
+async def detect_recurring(
+        account_type: str = "personal",
+        since: str = None,
+        before: str = None,
+        min_occurrences: int = 3,
+        amount_tolerance: float = 0.1,
+        include_income: bool = False,
+        active_only: bool = False
+    ) -> dict:
+    """
+    Finds recurring payments such as subscriptions, bills, rent and standing orders in the transaction
+    history, computed on the server. Use this instead of reading list_transactions output to spot them.
+
+    Transactions are grouped by merchant or counterparty name, and payments of similar amounts at the
+    same merchant are matched into series that repeat weekly, fortnightly, monthly, quarterly or yearly.
+
+    Amounts are in the lower denomination of the account's currency and keep Monzo's sign convention,
+    i.e. money spent is negative. E.g. -1099 is £10.99 spent.
+
+    Parameters:
+    account_type (str): Type of account to analyse.
+                        Options:
+                            - "default" (default)
+                            - "personal"
+                            - "prepaid"
+                            - "flex"
+                            - "rewards"
+                            - "joint"
+    since (str): The start date for the transactions in ISO 8601 format. Default is one year ago.
+    before (str): The end date for the transactions in ISO 8601 format. Default is None.
+    min_occurrences (int): Fewest payments a series needs to be reported. Default is 3.
+    amount_tolerance (float): How much the amount of a payment may differ from the previous one of the series,
+                              as a fraction. Default is 0.1 (10%), raise it for variable bills.
+    include_income (bool): Also detect incoming series such as salary. Default is False.
+    active_only (bool): Leave out series that seem to have stopped. Default is False.
+
+    Returns:
+    {
+        "recurring": [
+            {
+                "name": str, # merchant or counterparty
+                "category": str,
+                "cadence": str, # "weekly", "fortnightly", "monthly", "quarterly" or "yearly"
+                "interval_days": float, # median number of days between payments
+                "typical_amount": int, # median amount
+                "min_amount": int,
+                "max_amount": int,
+                "occurrences": int,
+                "first": str (date),
+                "last": str (date),
+                "next_expected": str (date),
+                "regularity": float, # share of the intervals matching the cadence
+                "active": bool, # False if the next payment is overdue by more than half an interval
+                "monthly_amount": int, # typical amount per month, e.g. 4 x a weekly amount
+            },
+            ...
+        ], # largest monthly amount first
+        "monthly_total": int, # sum of monthly_amount of the active series
+    }
+    """
+    runtime = get_runtime()
+
+    since = since or _hours_ago(24 * 365)
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+
+    # Only syncs, the analysis reads a few columns straight from the store
+    await _stored_transactions(selected_account_id, since, before)
+
+    rows = runtime.transaction_store.counterparty_rows(
+        selected_account_id,
+        since=normalise_timestamp(since),
+        before=normalise_timestamp(before) if before else None,
+    )
+
+    # Imported on first use, numpy adds noticeably to the server's start-up time
+    import numpy as np
+    from monzo.recurring import detect
+
+    today = np.datetime64((before or datetime.datetime.utcnow().isoformat())[:10], "D")
+    recurring = detect(
+        rows,
+        today,
+        min_occurrences=min_occurrences,
+        amount_tolerance=amount_tolerance,
+        include_income=include_income,
+    )
+    if active_only:
+        recurring = [series for series in recurring if series["active"]]
+
+    return {
+        "recurring": recurring,
+        "monthly_total": sum(series["monthly_amount"] for series in recurring if series["active"]),
+    }
+
+@tool("balance_history")
+async def balance_history(
+        account_type: str = "personal",
+        since: str = None,
+        before: str = None,
+        interval: str = "day",
+        include_pots: bool = True,
+        refresh: bool = False
+    ) -> dict:
+    """
+    Returns the balance of an account and of its pots at the end of every day or week, e.g. to answer
+    "what was my balance on each day last quarter". Use this instead of adding up list_transactions output.
+
+    The history is worked out backwards from the current balance: the balance at the end of a day is the
+    current balance minus every transaction made after it, pot transfers included. A pot's history comes
+    from its current balance and the transfers between it and this account, so money that reached a pot
+    in other ways, e.g. interest, shows up on the day the history starts.
+
+    Amounts are in the lower denomination of the account's currency, e.g. 9155 is £91.55.
+
+    Parameters:
+    account_type (str): Type of account to get the history of.
+                        Options:
+                            - "default" (default)
+                            - "personal"
+                            - "prepaid"
+                            - "flex"
+                            - "rewards"
+                            - "joint"
+    since (str): The first date of the history in ISO 8601 format. Default is 90 days ago.
+    before (str): The history ends the day before this date, in ISO 8601 format. Default is None, up to today.
+    interval (str): "day" (default) for daily balances or "week" for weekly ones, weeks starting on Monday.
+    include_pots (bool): Also return the history of each pot of the account. Default is True.
+    refresh (bool): Set to True to force a live refresh from Monzo, e.g. right after a payment or pot transfer. Default is False.
+
+    Returns:
+    {
+        "account_id": str,
+        "currency": str,
+        "interval": str,
+        "account": {
+            "balance": int, # current balance
+            "opening_balance": int, # balance at the start of the first day
+            "series": [
+                {
+                    "date": str, # the day, or the Monday of the week
+                    "balance": int, # balance at the end of the day or week
+                    "net": int, # money in minus money out during the day or week
+                    "transactions": int,
+                },
+                ...
+            ], # oldest first
+        },
+        "pots": [{"pot_id": str, "name": str, "balance": int, "opening_balance": int, "series": [...]}, ...],
+    }
+    """
+    runtime = get_runtime()
+
+    # Imported on first use, numpy adds noticeably to the server's start-up time
+    import numpy as np
+    from monzo.history import INTERVALS, balance_series
+
+    if interval not in INTERVALS:
+        raise Exception(f"Error: unknown interval {interval}, use day or week")
+
+    since = since or _hours_ago(24 * 90)
+
+    selected_account_id = await runtime.accounts.resolve(account_type)
+    if refresh:
+        runtime.response_cache.invalidate(selected_account_id)
+
+    reads = [
+        _stored_transactions(selected_account_id, since, refresh=refresh),
+        cached_get(runtime.client, runtime.response_cache, balance_url, selected_account_id, {"account_id": selected_account_id}),
+    ]
+    if include_pots:
+        reads.append(
+            cached_get(runtime.client, runtime.response_cache, pots_url, selected_account_id, {"current_account_id": selected_account_id})
+        )
+    # Only syncs the store, whose daily totals are kept up to date as transactions are written
+    _, balance, *pots = await asyncio.gather(*reads)
+    pots = [pot for pot in (pots[0].get("pots", []) if pots else []) if not pot.get("deleted")]
+
+    today = np.datetime64(datetime.datetime.utcnow().date(), "D")
+    start = np.datetime64(normalise_timestamp(since)[:10], "D")
+    end = min(np.datetime64(normalise_timestamp(before)[:10], "D"), today + 1) if before else today + 1
+    if start >= end:
+        raise Exception("Error: since must be earlier than before and not after today")
+
+    history = balance_series(
+        runtime.transaction_store.daily_flows(selected_account_id, str(start)),
+        balance.get("balance") or 0,
+        {pot["id"]: pot.get("balance") or 0 for pot in pots},
+        start,
+        end,
+        today,
+        interval=interval,
+    )
+
+    return {
+        "account_id": selected_account_id,
+        "currency": balance.get("currency"),
+        "interval": interval,
+        "account": {"balance": balance.get("balance") or 0, **history["account"]},
+        "pots": [
+            {"pot_id": pot["id"], "name": pot.get("name"), "balance": pot.get("balance") or 0, **history["pots"][pot["id"]]}
+            for pot in pots
+        ],
+    }
+
+@tool("search_transactions")
+async def search_transactions(
+        text: str = None,
+        merchant: str = None,
+        notes: str = None,
+        category: str = None,
+        min_amount: int = None,
+        max_amount: int = None,
+        pot_id: str = None,
+        account_type: str = None,
+        since: str = None,
+        before: str = None,
+        limit: int = 50,
+        fields: str = None,
+        compact: bool = False
+    ) -> list:
+    """
+    Searches the locally synced transaction history, newest first, without calling the Monzo API.
+    All the given filters must match. Only history that has already been synced (e.g. by list_transactions)
+    is searched, call list_transactions first to sync an older range.
+
+    Amounts are in the lower denomination of the account's currency and keep Monzo's sign convention,
+    i.e. money spent is negative. E.g. max_amount=-5000 finds payments of £50.00 or more.
+
+    Parameters:
+    text (str): Words to find in the description, merchant name, notes or counterparty name. Words match as prefixes, e.g. "sains" finds "Sainsbury's".
+    merchant (str): Words to find in the merchant name, e.g. "tesco".
+    notes (str): Words to find in the notes, e.g. "rent".
+    category (str): Exact category, e.g. "groceries", "eating_out", "transport", "savings".
+    min_amount (int): Smallest amount to include, inclusive. Default is None.
+    max_amount (int): Largest amount to include, inclusive. Default is None.
+    pot_id (str): Only deposits to and withdrawals from this pot.
+    account_type (str): Only search this account ("personal", "prepaid", "flex", "rewards" or "joint"). Default is all accounts.
+    since (str): The start date for the transactions in ISO 8601 format. Default is None.
+    before (str): The end date for the transactions in ISO 8601 format. Default is None.
+    limit (int): The maximum number of transactions to return. Default is 50.
+    fields (str): Optional comma separated list of the fields to return, e.g. "created,amount,description,merchant.name".
+    compact (bool): Drop null and empty values and the "can_*" flags from the result. Default is False.
+
+    Returns:
+    [
+        {
+            "id": str,
+            "created": str (UTC ISO 8601),
+            "description": str,
+            "amount": int,
+            ...
+        }, # same fields as list_transactions
+        ...
+    ]
+    """
+    runtime = get_runtime()
+
+    account_ids = [await runtime.accounts.resolve(account_type)] if account_type else None
+
+    transactions = runtime.transaction_store.search(
+        account_ids=account_ids,
+        text=text,
+        merchant=merchant,
+        notes=notes,
+        category=category,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        pot_id=pot_id,
+        since=normalise_timestamp(since) if since else None,
+        before=normalise_timestamp(before) if before else None,
+        limit=limit,
+    )
+
+    selected_fields = parse_fields(fields)
+    return [shape(transaction, selected_fields, compact) for transaction in transactions]
+
+@tool("export_transactions")
+async def export_transactions(
+        path: str,
+        account_types: list[str] = None,
+        since: str = None,
+        before: str = None,
+        format: str = None,
+        refresh: bool = False,
+        overwrite: bool = False
+    ) -> dict:
+    """
+    Writes the transaction history of one or more Monzo accounts to a local CSV or Parquet file, e.g. for
+    month-end reconciliation in a spreadsheet. Only the path, row count and checksum of the file are returned,
+    so use this instead of list_transactions for long histories that are processed outside the conversation.
 
+    Nested fields are flattened into their own columns, e.g. "merchant.name", "metadata.pot_id" and
+    "counterparty.sort_code". Every row also has the "account_type" it was exported from.
 
+    Parameters:
+    path (str): File to write inside the export directory (MONZO_EXPORT_DIR, by default the exports directory
+                of the server's state directory), e.g. "monzo-2025.csv" or "2025/personal.csv". Missing
+                subdirectories are created. Paths outside the export directory are refused.
+    account_types (list[str]): Accounts to export, e.g. ["personal", "joint"]. Default is ["personal"].
+    since (str): The start date for the transactions in ISO 8601 format. Default is one year ago.
+    before (str): The end date for the transactions in ISO 8601 format. Default is None.
+    format (str): "csv" or "parquet" (needs the pyarrow package). Default is taken from the extension of `path`, otherwise csv.
+    refresh (bool): Set to True to force a live refresh from Monzo before exporting. Default is False.
+    overwrite (bool): Replace the file if it already exists. Default is False, which refuses to.
 
+    Returns:
+    {
+        "path": str, # absolute path of the file
+        "format": str,
+        "rows": int,
+        "accounts": {"personal": int, ...}, # rows per account
+        "columns": int,
+        "bytes": int,
+        "sha256": str, # checksum of the file
+    }
+    """
+    runtime = get_runtime()
+
+    since = since or _hours_ago(24 * 365)
+    format = format or ("parquet" if path.lower().endswith(".parquet") else "csv")
+
+    accounts = {}
+    for account_type in account_types or ["personal"]:
+        accounts[account_type] = await runtime.accounts.resolve(account_type)
+
+    # Bring every account's store up to date first, the export then only reads it
+    def sync(account_id: str):
+        return lambda: _stored_transactions(account_id, since, before, refresh=refresh)
+
+    results = await gather_limited([sync(account_id) for account_id in accounts.values()], runtime.settings.fanout_concurrency)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    # Writing is blocking file I/O, keep it off the event loop
+    return await asyncio.to_thread(
+        write_export,
+        runtime.transaction_store,
+        accounts,
+        path,
+        format=format,
+        since=normalise_timestamp(since),
+        before=normalise_timestamp(before) if before else None,
+        directory=runtime.settings.export_dir,
+        overwrite=overwrite,
+    )
+
+@tool("overview")
+async def overview() -> dict:
+    """
+    Returns the balance and pots of every configured Monzo account in one call, plus the total
+    across all of them. Use this for questions about overall or net worth rather than calling
+    balance and pots for each account.
 
+    All amounts are in the lower denomination of the currency. I.e. GBP, the balance is in pence. E.g. 9155 is £91.55.
+    Accounts that could not be fetched are listed in "errors" and the rest are still returned.
 
+    Returns:
+    {
+        "accounts": {
+            "personal": {
+                "account_id": str,
+                "balance": int,
+                "currency": str,
+                "spend_today": int,
+                "pots": [{"id": str, "name": str, "balance": int, "currency": str}, ...],
+                "pots_total": int,
+            },
+            ...
+        },
+        "totals": {
+            "GBP": int, # account balances plus pot balances
+        },
+        "errors": {
+            "joint": str,
+            ...
+        },
+    }
+    """
+    runtime = get_runtime()
+
+    configured = await runtime.accounts.all()
+
+    def fetch(endpoint: str, account_id: str, params: dict):
+        return lambda: cached_get(runtime.client, runtime.response_cache, endpoint, account_id, params)
+
+    calls = []
+    for account_id in configured.values():
+        calls.append(fetch(balance_url, account_id, {"account_id": account_id}))
+        calls.append(fetch(pots_url, account_id, {"current_account_id": account_id}))
+
+    results = await gather_limited(calls, runtime.settings.fanout_concurrency)
+
+    accounts = {}
+    totals = {}
+    errors = {}
+    for index, (name, account_id) in enumerate(configured.items()):
+        balance, pots = results[2 * index], results[2 * index + 1]
+
+        if isinstance(balance, Exception):
+            errors[name] = str(balance)
+            continue
+
+        account = {
+            "account_id": account_id,
+            "balance": balance.get("balance"),
+            "currency": balance.get("currency"),
+            "spend_today": balance.get("spend_today"),
+        }
+        currency = balance.get("currency", "GBP")
+        totals[currency] = totals.get(currency, 0) + (balance.get("balance") or 0)
+
+        if isinstance(pots, Exception):
+            errors[name] = f"pots: {pots}"
+        else:
+            open_pots = [pot for pot in pots.get("pots", []) if not pot.get("deleted")]
+            account["pots"] = [
+                {key: pot.get(key) for key in ("id", "name", "balance", "currency")}
+                for pot in open_pots
+            ]
+            account["pots_total"] = sum(pot.get("balance") or 0 for pot in open_pots)
+            for pot in open_pots:
+                pot_currency = pot.get("currency", currency)
+                totals[pot_currency] = totals.get(pot_currency, 0) + (pot.get("balance") or 0)
+
+        accounts[name] = account
+
+    return {
+        "accounts": accounts,
+        "totals": totals,
+        "errors": errors,
+    }
+
+@tool("server_stats")
+async def server_stats(format: str = "json") -> dict:
+    """
+    Returns performance statistics for this MCP server. Useful to measure how long calls
+    to the Monzo API are taking.
+
+    Parameters:
+    format (str): "json" (default) or "prometheus" for the per-tool metrics in the Prometheus text format,
+                  returned as {"prometheus": str}.
+
+    In multi-tenant mode, every figure is the calling tenant's own.
+
+    Returns:
+    {
+        "tools": {
+            "balance": {
+                "calls": int,
+                "errors": int,
+                "latency_ms": {"mean": float, "p50": float, "p95": float}, # running the tool; p50/p95 are histogram bucket bounds
+                "upstream_ms": {...}, # time in requests to the Monzo API
+                "parse_ms": {...}, # time decoding JSON responses
+                "serialization_ms": {...}, # time the MCP server took to convert the result into the content sent
+                "response_bytes": {"mean": int, "p95": int}, # size of the text content sent
+            },
+            ...
+        },
+        "http": {
+            "overall": {
+                "count": int,
+                "mean_ms": float,
+                "p50_ms": float,
+                "p95_ms": float,
+                "max_ms": float,
+            },
+            "endpoints": {
+                "GET /balance": {...},
+                ...
+            },
+        },
+        "rate_limit": {
+            "retries": int,
+            "budget_exhausted": int, # retries skipped because too many requests were already being retried
+            "throttled_seconds": float, # time spent waiting to stay under the request rate limit
+        },
+        "cache": {
+            "hits": int,
+            "misses": int,
+            "revalidated": int, # expired entries confirmed unchanged by Monzo with a 304
+            "evictions": int,
+            "invalidations": int,
+            "stale_puts": int, # responses not cached because the account was invalidated while they were fetched
+            "entries": int,
+            "hit_ratio": float,
+            "ttls": {"balance": int, "pots": int},
+        },
+        "accounts": {
+            "discoveries": int, # calls made to /accounts
+            "disk_loads": int, # times the accounts were read from the cache on disk instead
+            "configured": [str], # account types set in the environment
+            "discovered": [str], # account types found with /accounts
+            "age_seconds": float,
+            "ttl": int,
+        },
+        "coalescing": {
+            "http": {
+                "executed": int, # GET requests sent
+                "coalesced": int, # identical concurrent GETs that shared one of those instead of being sent
+                "in_flight": int,
+                "coalesced_ratio": float,
+            },
+            "sync": {...}, # same for concurrent syncs of the same account and date range
+        },
+        "webhooks": {
+            "received": int,
+            "ingested": int, # transaction.created events written to the local store
+            "ignored": int, # other event types
+            "rejected": int, # wrong secret or malformed payload
+        },
+        "startup": {
+            "init_ms": float, # time to create the client, cache and store on the first tool call
+            "warm_up_ms": float, # only with MONZO_WARM_UP=true
+            "accounts_discovered": int, # accounts found by the warm-up
+        },
+        "tenant": str, # id of the calling tenant in multi-tenant mode, otherwise None
+    }
+    """
+    runtime = get_runtime()
+    tenant_id = _tenant_id()
+
+    if format == "prometheus":
+        return {"prometheus": tool_metrics.prometheus(tenant_id)}
+    if format != "json":
+        raise Exception(f"Error: unknown format {format}, use json or prometheus")
+
+    return {
+        "tools": tool_metrics.summary(tenant_id),
+        "http": runtime.client.timing_summary(),
+        "rate_limit": runtime.client.rate_limit_stats(),
+        "cache": runtime.response_cache.stats(),
+        "accounts": runtime.accounts.stats(),
+        "coalescing": {
+            "http": runtime.client.coalescing_stats(),
+            "sync": runtime.sync_flights.stats(),
+        },
+        "webhooks": runtime.webhooks.stats(),
+        "startup": runtime.startup,
+        "tenant": tenant_id,
+    }
@@ -0,0 +1,3 @@
+"""
+Support code for the Monzo MCP server defined in main.py.
+"""
@@ -0,0 +1,150 @@
+"""
+Registry of the user's Monzo accounts by account type.
+
+Account ids are discovered with one call to /accounts and cached on disk for a
+TTL, so they no longer have to be copied into .env by hand and restarts don't
+call the API again. Ids set in the environment still take precedence. Every
+tool resolves its `account_type` argument here with a dictionary lookup.
+"""
+import asyncio
+import json
+import os
+import time
+
+from monzo.client import decode_json, raise_for_error
+
+# Monzo account type -> account type used by the tools
+ACCOUNT_TYPES = {
+    "uk_retail": "personal",
+    "uk_prepaid": "prepaid",
+    "uk_monzo_flex": "flex",
+    "uk_rewards": "rewards",
+    "uk_retail_joint": "joint",
+}
+
+# Names the tools accept for an account type besides the types themselves
+ALIASES = {"default": "personal"}
+
+
+class AccountRegistry:
+    """
+    Parameters:
+    client (AsyncMonzoClient): Client used to call /accounts.
+    path (str): JSON file the discovered accounts are cached in.
+    ttl (int): Seconds the cached accounts are used before /accounts is called again.
+    configured (dict): Account ids set in the environment by account type, None when not set.
+    accounts_path (str): Path of the accounts endpoint relative to the API URL.
+    """
+
+    def __init__(self, client, path: str, ttl: int, configured: dict = None, accounts_path: str = "accounts"):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.accounts_path = accounts_path
+        self.configured = {account_type: account_id for account_type, account_id in (configured or {}).items() if account_id}
+
+        self._discovered = None
+        self._discovered_at = 0.0
+        self._lock = asyncio.Lock()
+        self._counters = {"discoveries": 0, "disk_loads": 0}
+
+    def _is_fresh(self) -> bool:
+        return self._discovered is not None and time.time() - self._discovered_at < self.ttl
+
+    def _load(self) -> bool:
+        """
+        Loads the accounts cached on disk if they are recent enough.
+        """
+        try:
+            with open(self.path) as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if time.time() - cached.get("discovered_at", 0) >= self.ttl:
+            return False
+
+        self._discovered = cached.get("accounts", {})
+        self._discovered_at = cached["discovered_at"]
+        self._counters["disk_loads"] += 1
+        return True
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"discovered_at": self._discovered_at, "accounts": self._discovered}, file)
+        os.replace(temporary_path, self.path)
+
+    async def refresh(self, force: bool = False) -> dict:
+        """
+        Discovers the open accounts of each type with /accounts, unless a fresh copy is cached.
+        Concurrent callers share a single request. Returns the discovered ids by account type.
+        """
+        async with self._lock:
+            if not force and (self._is_fresh() or self._load()):
+                return self._discovered
+
+            response = await self.client.get(self.accounts_path)
+            raise_for_error(response)
+
+            discovered = {}
+            for account in decode_json(response).get("accounts", []):
+                account_type = ACCOUNT_TYPES.get(account.get("type"))
+                if account_type and not account.get("closed") and account_type not in discovered:
+                    discovered[account_type] = account["id"]
+
+            self._discovered = discovered
+            self._discovered_at = time.time()
+            self._counters["discoveries"] += 1
+            self._save()
+
+            return discovered
+
+    async def resolve(self, account_type: str = "personal") -> str:
+        """
+        The id of the account of the given type, e.g. "personal" or "joint".
+        Only calls /accounts when the type is not configured and the cached accounts are missing or expired.
+        """
+        account_type = (account_type or "personal").lower()
+        account_type = ALIASES.get(account_type, account_type)
+
+        if account_type not in ACCOUNT_TYPES.values():
+            options = ", ".join(f'"{name}"' for name in ACCOUNT_TYPES.values())
+            raise Exception(f"Error: unknown account type {account_type!r}, expected one of {options}")
+
+        account_id = self.configured.get(account_type)
+        if account_id:
+            return account_id
+
+        if not self._is_fresh():
+            await self.refresh()
+
+        account_id = self._discovered.get(account_type)
+        if not account_id:
+            raise Exception(f"Error: no open {account_type} account was found for this Monzo user")
+
+        return account_id
+
+    async def all(self) -> dict:
+        """
+        Ids of every known account by account type. Falls back to the configured ids if /accounts can't be reached.
+        """
+        try:
+            discovered = self._discovered if self._is_fresh() else await self.refresh()
+        except Exception:
+            if not self.configured:
+                raise
+            discovered = {}
+
+        known = {**discovered, **self.configured}
+        return {account_type: known[account_type] for account_type in ACCOUNT_TYPES.values() if account_type in known}
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "configured": sorted(self.configured),
+            "discovered": sorted(self._discovered or {}),
+            "age_seconds": round(time.time() - self._discovered_at, 1) if self._discovered is not None else None,
+            "ttl": self.ttl,
+        }
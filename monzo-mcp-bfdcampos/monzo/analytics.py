@@ -0,0 +1,145 @@
+"""
+Grouped aggregations over transactions, computed with numpy.
+
+Transactions are turned into columns once and every grouping, sum, count and
+percentile is computed on those arrays, so a summary of thousands of
+transactions is a compact table instead of the raw records.
+"""
+import numpy as np
+
+GROUP_BY_OPTIONS = ("category", "merchant", "day", "week", "month", "local_currency")
+TIME_GROUPS = ("day", "week", "month")
+
+
+def merchant_name(transaction: dict) -> str:
+    """
+    Best human readable name of who the transaction was with: the expanded merchant name,
+    the counterparty name or, failing that, the description.
+    """
+    merchant = transaction.get("merchant")
+    if isinstance(merchant, dict) and merchant.get("name"):
+        return merchant["name"]
+
+    counterparty = transaction.get("counterparty") or {}
+    if counterparty.get("name"):
+        return counterparty["name"]
+
+    return transaction.get("description") or "unknown"
+
+
+def transaction_columns(transactions: list) -> dict:
+    """
+    Column arrays of the fields used by the aggregations.
+    """
+    created = np.array([t["created"].rstrip("Z") for t in transactions], dtype="datetime64[ms]")
+
+    return {
+        "amount": np.array([t.get("amount", 0) for t in transactions], dtype=np.int64),
+        "created": created,
+        "category": np.array([t.get("category") or "unknown" for t in transactions], dtype=object),
+        "merchant": np.array([merchant_name(t) for t in transactions], dtype=object),
+        "local_currency": np.array([t.get("local_currency") or t.get("currency") or "unknown" for t in transactions], dtype=object),
+        "include_in_spending": np.array([t.get("include_in_spending", True) is not False for t in transactions], dtype=bool),
+    }
+
+
+def _group_column(columns: dict, group_by: str) -> np.ndarray:
+    created = columns["created"]
+
+    if group_by == "day":
+        return created.astype("datetime64[D]").astype(str)
+    if group_by == "week":
+        days = created.astype("datetime64[D]")
+        # 1970-01-01 was a Thursday, shift so weeks start on Monday
+        week_start = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+        return week_start.astype(str)
+    if group_by == "month":
+        return created.astype("datetime64[M]").astype(str)
+
+    return columns[group_by].astype(str)
+
+
+def summarise(transactions: list, group_by: list, percentiles: list = (50, 90), spending_only: bool = True) -> dict:
+    """
+    Sum, count, mean and percentiles of transaction amounts for each group.
+
+    Parameters:
+    transactions (list): Transactions as returned by the Monzo API.
+    group_by (list): One or more of GROUP_BY_OPTIONS.
+    percentiles (list): Percentiles of the size of the amounts to compute per group, so p90 is a larger
+                        payment than p50. They carry the sign of the group's sum, negative for spending.
+    spending_only (bool): Only aggregate outgoing transactions that count towards spending.
+
+    Returns:
+    {
+        "columns": [*group_by, "sum", "count", "mean", "p50", ...],
+        "rows": [[...], ...], # chronological if grouped by a period first, otherwise biggest spend first
+    }
+    """
+    for name in group_by:
+        if name not in GROUP_BY_OPTIONS:
+            raise Exception(f"Error: cannot group by {name}, options are {', '.join(GROUP_BY_OPTIONS)}")
+
+    percentile_columns = [f"p{int(p) if float(p).is_integer() else p}" for p in percentiles]
+    header = [*group_by, "sum", "count", "mean", *percentile_columns]
+
+    if not transactions:
+        return {"columns": header, "rows": []}
+
+    columns = transaction_columns(transactions)
+
+    mask = np.ones(len(transactions), dtype=bool)
+    if spending_only:
+        mask = (columns["amount"] < 0) & columns["include_in_spending"]
+
+    amount = columns["amount"][mask]
+    if amount.size == 0:
+        return {"columns": header, "rows": []}
+
+    # Encode every group column as integer codes and combine them into one group id per row
+    labels = []
+    codes = []
+    for name in group_by:
+        values, inverse = np.unique(_group_column(columns, name)[mask], return_inverse=True)
+        labels.append(values)
+        codes.append(inverse.reshape(-1))
+
+    if codes:
+        combined = np.ravel_multi_index(codes, [len(values) for values in labels])
+        group_ids, group_index = np.unique(combined, return_inverse=True)
+        group_index = group_index.reshape(-1)
+        group_codes = np.unravel_index(group_ids, [len(values) for values in labels])
+    else:
+        group_ids = np.zeros(1, dtype=np.int64)
+        group_index = np.zeros(amount.size, dtype=np.int64)
+        group_codes = ()
+
+    sums = np.bincount(group_index, weights=amount, minlength=group_ids.size).astype(np.int64)
+    counts = np.bincount(group_index, minlength=group_ids.size)
+    means = sums / counts
+
+    # Sort sizes within each group once, then every group is a contiguous slice
+    size = np.abs(amount)
+    order = np.lexsort((size, group_index))
+    sorted_sizes = size[order]
+    boundaries = np.concatenate(([0], np.cumsum(counts)))
+    group_percentiles = np.array([
+        np.percentile(sorted_sizes[boundaries[i]:boundaries[i + 1]], percentiles)
+        for i in range(group_ids.size)
+    ]).reshape(group_ids.size, len(percentiles))
+    group_percentiles *= np.where(sums < 0, -1, 1)[:, None]
+
+    if group_by and group_by[0] in TIME_GROUPS:
+        # group ids are ordered by their sorted labels, so this is chronological
+        row_order = np.arange(group_ids.size)
+    else:
+        row_order = np.argsort(sums, kind="stable")
+
+    rows = []
+    for i in row_order:
+        row = [str(labels[j][group_codes[j][i]]) for j in range(len(group_by))]
+        row += [int(sums[i]), int(counts[i]), round(float(means[i]), 2)]
+        row += [round(float(value), 2) for value in group_percentiles[i]]
+        rows.append(row)
+
+    return {"columns": header, "rows": rows}
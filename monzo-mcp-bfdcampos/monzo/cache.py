@@ -0,0 +1,140 @@
+"""
+In-process cache of API responses for read endpoints such as /balance and /pots.
+
+Entries are keyed by endpoint and account id, expire after a per-endpoint TTL
+and are evicted least-recently-used first once the cache is full. Expired
+entries that came with an ETag are revalidated with If-None-Match, so an
+unchanged response costs a 304 instead of a full download.
+
+Every invalidation of an account starts a new generation. A response is only
+cached if no invalidation happened while it was being fetched, so a GET that
+was in flight during a pot transfer cannot put the old balance back.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from monzo.client import decode_json, raise_for_error
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class ResponseCache:
+    """
+    LRU cache of decoded JSON responses with a TTL per endpoint.
+
+    Parameters:
+    ttls (dict): Seconds each endpoint's responses stay fresh, e.g. {"balance": 30}. Endpoints not listed are not cached.
+    max_entries (int): Maximum number of responses kept before the least recently used is evicted.
+    """
+
+    def __init__(self, ttls: dict, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0, "invalidations": 0, "stale_puts": 0}
+
+    def lookup(self, endpoint: str, account_id: str):
+        """
+        Returns (data, etag, is_fresh) for the cached response, or None if there is none.
+        """
+        with self._lock:
+            entry = self._entries.get((endpoint, account_id))
+            if entry is None:
+                return None
+
+            self._entries.move_to_end((endpoint, account_id))
+            expires_at, etag, data = entry
+
+        return data, etag, time.monotonic() < expires_at
+
+    def generation(self, account_id: str) -> int:
+        """
+        Number of times the account was invalidated, to pass to put() for a response fetched from now on.
+        """
+        with self._lock:
+            return self._generations.get(account_id, 0)
+
+    def put(self, endpoint: str, account_id: str, data, etag: str = None, generation: int = None) -> None:
+        """
+        Caches a response. With `generation`, as returned by generation() before the request was sent,
+        the response is dropped if the account was invalidated since.
+        """
+        if endpoint not in self.ttls:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(account_id, 0):
+                self._counters["stale_puts"] += 1
+                return
+
+            self._entries[(endpoint, account_id)] = (time.monotonic() + self.ttls[endpoint], etag, data)
+            self._entries.move_to_end((endpoint, account_id))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, account_id: str) -> None:
+        """
+        Drops every cached response of the account, e.g. after money moved in or out of it.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == account_id]:
+                del self._entries[key]
+            self._generations[account_id] = self._generations.get(account_id, 0) + 1
+            self._counters["invalidations"] += 1
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and hit ratio, to help tune the TTLs.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0.0
+        stats["ttls"] = dict(self.ttls)
+
+        return stats
+
+
+async def cached_get(client, cache: ResponseCache, endpoint: str, account_id: str, params: dict):
+    """
+    GET `endpoint` through the cache. Returns a copy of the decoded JSON response so callers can modify it.
+    """
+    # Read first: an invalidation between the two calls then also discards what lookup returned
+    generation = cache.generation(account_id)
+    cached = cache.lookup(endpoint, account_id)
+
+    if cached is not None and cached[2]:
+        cache.count("hits")
+        return copy.deepcopy(cached[0])
+
+    headers = {}
+    if cached is not None and cached[1]:
+        headers["If-None-Match"] = cached[1]
+
+    response = await client.get(endpoint, params=params, headers=headers)
+
+    if response.status_code == 304 and cached is not None:
+        cache.count("revalidated")
+        cache.put(endpoint, account_id, cached[0], etag=cached[1], generation=generation)
+        return copy.deepcopy(cached[0])
+
+    raise_for_error(response)
+
+    cache.count("misses")
+    data = decode_json(response)
+    cache.put(endpoint, account_id, data, etag=response.headers.get("ETag"), generation=generation)
+
+    return copy.deepcopy(data)
@@ -0,0 +1,263 @@
+"""
+Shared HTTP client for the Monzo API.
+
+Every tool goes through one AsyncMonzoClient so the TCP+TLS connection to the
+API is kept alive (and multiplexed over HTTP/2) between tool calls instead of
+being re-established each time, and the Authorization header is built once
+rather than on every call.
+"""
+import threading
+import time
+from collections import deque
+
+import asyncio
+import contextlib
+
+import httpx
+
+from monzo.concurrency import SingleFlight
+from monzo.metrics import add_time, timed, tool_metrics
+from monzo.ratelimit import RETRY_STATUSES, RetryPolicy, TokenBucket
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Number of recent requests kept for timing_summary()
+TIMINGS_KEPT = 1000
+
+
+def raise_for_error(response) -> None:
+    """
+    Raise an Exception carrying the Monzo error message if the response is not a 200.
+    """
+    if response.status_code == 200:
+        return
+
+    try:
+        error = response.json().get("error", "Unknown error")
+    except ValueError:
+        error = f"HTTP {response.status_code}"
+
+    raise Exception(f"Error: {error}")
+
+
+def decode_json(response):
+    """
+    The decoded JSON body of `response`, timed as the parse phase of the current tool call.
+    """
+    with timed("parse"):
+        return response.json()
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _TimedClient:
+    """
+    Records the latency of every request so it can be summarised by timing_summary().
+    """
+
+    def __init__(self):
+        self._timings = deque(maxlen=TIMINGS_KEPT)
+        self._lock = threading.Lock()
+
+    def _record(self, method: str, path: str, status_code: int, elapsed_ms: float) -> None:
+        with self._lock:
+            self._timings.append((method, path.split("/")[0], status_code, elapsed_ms))
+
+    def timing_summary(self) -> dict:
+        """
+        Latency summary of the recent requests, overall and per endpoint, in milliseconds.
+        """
+        with self._lock:
+            timings = list(self._timings)
+
+        by_endpoint = {}
+        for method, endpoint, _status, elapsed_ms in timings:
+            by_endpoint.setdefault(f"{method} /{endpoint}", []).append(elapsed_ms)
+
+        return {
+            "overall": _summarise([t[3] for t in timings]),
+            "endpoints": {name: _summarise(values) for name, values in by_endpoint.items()},
+        }
+
+
+class AsyncMonzoClient(_TimedClient):
+    """
+    Asynchronous keep-alive, pooled client for the Monzo API.
+
+    Concurrent tool calls share the same connections; with HTTP/2 they are
+    multiplexed over a single connection instead of queueing behind each other.
+
+    Parameters:
+    base_url (str): Root of the API, e.g. "https://api.monzo.com/".
+    access_token (str): Bearer token sent with every request.
+    pool_size (int): Maximum number of connections kept open to the API.
+    connect_timeout (float): Seconds to wait for a connection to be established.
+    read_timeout (float): Seconds to wait for the API to send a response.
+    http2 (bool): Negotiate HTTP/2 with the API. Needs the `h2` package, falls back to HTTP/1.1 without it.
+    rate_limiter (TokenBucket): Spaces requests out to stay within the API quota. Default is None (no limit).
+    retry_policy (RetryPolicy): How idempotent requests are retried on 429, 5xx and connection errors.
+    coalesce (bool): Concurrent identical GETs share one request. Default is True.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            access_token: str,
+            pool_size: int = DEFAULT_POOL_SIZE,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            http2: bool = True,
+            rate_limiter: TokenBucket = None,
+            retry_policy: RetryPolicy = None,
+            coalesce: bool = True,
+    ):
+        super().__init__()
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.coalesce = coalesce
+        self.single_flight = SingleFlight()
+
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            http2=http2 and _h2_available(),
+        )
+
+    async def request(self, method: str, path: str, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """
+        Send a request to `path` (relative to base_url) and record how long it took.
+
+        GETs, and other requests flagged `idempotent` (e.g. pot transfers carrying a dedupe_id), are
+        retried with the exact same parameters on 429, 5xx and connection errors.
+
+        Identical GETs made while one is already in flight wait for it and get the same response
+        instead of being sent again. Writes are always sent.
+        """
+        if method != "GET" or not self.coalesce:
+            return await self._send(method, path, idempotent, stream=False, **kwargs)
+
+        key = self._flight_key(path, kwargs)
+        return await self.single_flight.run(
+            key, lambda: self._send(method, path, idempotent, stream=False, **kwargs)
+        )
+
+    def _flight_key(self, path: str, kwargs: dict) -> tuple:
+        """
+        What makes two GETs identical: the path, the params, the headers and the token they are sent with.
+        """
+        def items(mapping):
+            return tuple(sorted((str(key), str(value)) for key, value in (mapping or {}).items() if value is not None))
+
+        headers = {**self.http.headers, **(kwargs.get("headers") or {})}
+        return path, items(kwargs.get("params")), items(headers)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, path: str, idempotent: bool = None, **kwargs):
+        """
+        Like request(), but the body is not read up front: iterate over `response.aiter_bytes()`
+        to process it as it arrives. Use as `async with client.stream(...) as response:`.
+        """
+        response = await self._send(method, path, idempotent, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _send(self, method: str, path: str, idempotent: bool, stream: bool, **kwargs) -> httpx.Response:
+        if idempotent is None:
+            idempotent = method == "GET"
+
+        for name in ("params", "data"):
+            if kwargs.get(name):
+                # requests silently dropped None values, httpx would send them as empty strings
+                kwargs[name] = {key: value for key, value in kwargs[name].items() if value is not None}
+
+        self.retry_policy.budget.deposit()
+        attempt = 1
+
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                with tool_metrics.span(f"{method} /{path.split('/')[0]}", attempt=attempt):
+                    response = await self.http.send(self.http.build_request(method, path, **kwargs), stream=stream)
+            except httpx.TransportError:
+                add_time("upstream", time.perf_counter() - start)
+                self._record(method, path, 0, (time.perf_counter() - start) * 1000)
+                if not (idempotent and self.retry_policy.should_retry(attempt)):
+                    raise
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            add_time("upstream", elapsed)
+            self._record(method, path, response.status_code, elapsed * 1000)
+
+            if response.status_code not in RETRY_STATUSES:
+                return response
+
+            if not (idempotent and self.retry_policy.should_retry(attempt)):
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(self.retry_policy.delay(attempt, response.headers.get("Retry-After")))
+            attempt += 1
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", path, **kwargs)
+
+    def coalescing_stats(self) -> dict:
+        return self.single_flight.stats()
+
+    def rate_limit_stats(self) -> dict:
+        return {
+            **self.retry_policy.counters,
+            "throttled_seconds": round(self.rate_limiter.waited_seconds, 3) if self.rate_limiter else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _summarise(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "max_ms": round(values[-1], 2),
+    }
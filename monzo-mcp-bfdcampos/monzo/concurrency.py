@@ -0,0 +1,66 @@
+"""
+Helpers to run many API calls concurrently without overwhelming the API, and
+to avoid making the same call several times at once.
+"""
+import asyncio
+
+
+async def gather_limited(calls: list, limit: int) -> list:
+    """
+    Awaits every coroutine function in `calls` with at most `limit` running at once.
+
+    Results are returned in the same order as `calls`; a call that raised has its exception
+    in its place instead of failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share a single execution: the first one runs and the
+    others wait for its result (or exception) instead of repeating the work.
+
+    The shared execution keeps running if one of the callers is cancelled, so the others still get it.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._counters = {"executed": 0, "coalesced": 0}
+
+    async def run(self, key, call):
+        """
+        Awaits the coroutine function `call`, or the execution of an identical call already in flight.
+        """
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self._counters["executed"] += 1
+        else:
+            self._counters["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # Marks the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        total = self._counters["executed"] + self._counters["coalesced"]
+        return {
+            **self._counters,
+            "in_flight": len(self._in_flight),
+            "coalesced_ratio": round(self._counters["coalesced"] / total, 3) if total else 0.0,
+        }
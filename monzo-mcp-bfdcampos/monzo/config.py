@@ -0,0 +1,158 @@
+"""
+Server configuration, read from environment variables (and a .env file).
+
+Nothing is read at import time: the settings are loaded and validated the
+first time they are needed, once, and every problem is reported together so
+a misconfigured server fails with one clear error instead of an odd one later.
+"""
+import datetime
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Account type used by the tools -> environment variable holding its id
+ACCOUNT_ENV_VARS = {
+    "personal": "MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID",
+    "prepaid": "MONZO_UK_PREPAID_PERSONAL_ACCOUNT_ID",
+    "flex": "MONZO_UK_MONZO_FLEX_PERSONAL_ACCOUNT_ID",
+    "rewards": "MONZO_UK_REWARDS_PERSONAL_ACCOUNT_ID",
+    "joint": "MONZO_UK_RETAIL_JOINT_JOINT_ACCOUNT_ID",
+}
+
+# Variables that belong to one Monzo user and are never inherited by the tenants of a multi-tenant server
+TENANT_ENV_VARS = ("MONZO_ACCESS_TOKEN", "MONZO_USER_ID", "MONZO_STATE_DIR", "MONZO_EXPORT_DIR", *ACCOUNT_ENV_VARS.values())
+
+
+class Settings:
+    """
+    Validated server configuration.
+
+    Parameters:
+    env (dict): Environment variables to read the settings from, e.g. os.environ.
+    """
+
+    def __init__(self, env: dict):
+        self._env = env
+        self._errors = []
+
+        # Multi-tenant mode: each tenant's token and accounts come from this file instead, see monzo/tenants.py
+        self.tenants_file = env.get("MONZO_TENANTS_FILE") or None
+        self.tenant = env.get("MONZO_TENANT") or None
+
+        self.access_token = env.get("MONZO_ACCESS_TOKEN")
+        self.user_id = env.get("MONZO_USER_ID")
+        if not self.access_token and not self.tenants_file:
+            self._errors.append("MONZO_ACCESS_TOKEN is not set")
+
+        # Optional, accounts that are not set are discovered from /accounts
+        self.account_ids = {account_type: env.get(name) for account_type, name in ACCOUNT_ENV_VARS.items()}
+        self.accounts_ttl = self._number("MONZO_ACCOUNTS_TTL_SECONDS", int, 86400)
+
+        # Overridable to point the server at a local stand-in, see monzo/fake_api.py
+        self.api_url = env.get("MONZO_API_URL", "https://api.monzo.com/").rstrip("/") + "/"
+        if not self.api_url.startswith(("http://", "https://")):
+            self._errors.append(f"MONZO_API_URL must be an http(s) URL, got {self.api_url!r}")
+
+        self.http_pool_size = self._number("MONZO_HTTP_POOL_SIZE", int, 10, minimum=1)
+        self.http_connect_timeout = self._number("MONZO_HTTP_CONNECT_TIMEOUT", float, 5)
+        self.http_read_timeout = self._number("MONZO_HTTP_READ_TIMEOUT", float, 30)
+        self.http2 = self._flag("MONZO_HTTP2", True)
+
+        self.rate_limit_per_second = self._number("MONZO_RATE_LIMIT_PER_SECOND", float, 10)
+        self.rate_limit_burst = self._number("MONZO_RATE_LIMIT_BURST", int, 20, minimum=1)
+        self.retry_max_attempts = self._number("MONZO_RETRY_MAX_ATTEMPTS", int, 4, minimum=1)
+        self.retry_budget_ratio = self._number("MONZO_RETRY_BUDGET_RATIO", float, 0.2)
+        self.coalesce_requests = self._flag("MONZO_COALESCE_REQUESTS", True)
+
+        self.fanout_concurrency = self._number("MONZO_FANOUT_CONCURRENCY", int, 6, minimum=1)
+        self.batch_concurrency = self._number("MONZO_BATCH_CONCURRENCY", int, 4, minimum=1)
+
+        self.cache_ttl_balance = self._number("MONZO_CACHE_TTL_BALANCE_SECONDS", int, 30)
+        self.cache_ttl_pots = self._number("MONZO_CACHE_TTL_POTS_SECONDS", int, 60)
+        self.cache_max_entries = self._number("MONZO_CACHE_MAX_ENTRIES", int, 256, minimum=1)
+
+        self.state_dir = env.get("MONZO_STATE_DIR") or os.path.expanduser("~/.monzo-mcp")
+        # export_transactions only writes files inside this directory
+        self.export_dir = os.path.expanduser(env.get("MONZO_EXPORT_DIR") or os.path.join(self.state_dir, "exports"))
+        self.sync_interval = datetime.timedelta(seconds=self._number("MONZO_SYNC_INTERVAL_SECONDS", int, 60))
+        self.sync_overlap = datetime.timedelta(days=self._number("MONZO_SYNC_OVERLAP_DAYS", int, 3))
+        self.sync_windows = self._number("MONZO_SYNC_PARALLEL_WINDOWS", int, 4, minimum=1)
+
+        self.warm_up = self._flag("MONZO_WARM_UP", False)
+
+        # Webhook receiver, served on its own port (stdio) or on the MCP HTTP app (SSE/streamable HTTP)
+        self.webhook_port = self._number("MONZO_WEBHOOK_PORT", int, 0)
+        self.webhook_host = env.get("MONZO_WEBHOOK_HOST") or "127.0.0.1"
+        self.webhooks = self._flag("MONZO_WEBHOOKS", False) or self.webhook_port > 0
+        self.webhook_secret = env.get("MONZO_WEBHOOK_SECRET") or None
+        if self.webhooks and not self.webhook_secret and not self.tenants_file:
+            # Pushed transactions feed search, balance history and pot rules, they must not be forgeable
+            self._errors.append("MONZO_WEBHOOK_SECRET must be set when webhooks are enabled")
+        # New transactions arrive by webhook, so the store only needs refreshing for settled/annotated ones
+        self.webhook_sync_interval = datetime.timedelta(
+            seconds=self._number("MONZO_WEBHOOK_SYNC_INTERVAL_SECONDS", int, 900)
+        )
+
+        # Observability: OpenTelemetry spans and the sampling profiler, both off by default
+        self.otel = self._flag("MONZO_OTEL", False)
+        # /metrics shows every tenant's calls, so it is only served to scrapers sending this token
+        self.metrics_token = env.get("MONZO_METRICS_TOKEN") or None
+        self.profile_path = env.get("MONZO_PROFILE") or None
+        self.profile_interval = self._number("MONZO_PROFILE_INTERVAL_MS", float, 10, minimum=1) / 1000
+
+        if self._errors:
+            raise Exception("Error: invalid configuration: " + "; ".join(self._errors))
+
+    def for_tenant(self, tenant_id: str, overrides: dict) -> "Settings":
+        """
+        Settings of one tenant: the server's shared settings with the tenant's own variables on top,
+        and a state directory of its own.
+        """
+        env = {name: value for name, value in self._env.items() if name not in TENANT_ENV_VARS}
+        env["MONZO_STATE_DIR"] = os.path.join(self.state_dir, "tenants", tenant_id)
+        env["MONZO_TENANTS_FILE"] = ""
+        # Webhooks are served for a single user only
+        env["MONZO_WEBHOOK_PORT"] = "0"
+        env["MONZO_WEBHOOKS"] = "false"
+        env.update({name: str(value) for name, value in overrides.items() if value is not None})
+        return Settings(env)
+
+    def _number(self, name: str, kind: type, default, minimum=0):
+        value = self._env.get(name)
+        if value is None or value == "":
+            return kind(default)
+
+        try:
+            number = kind(value)
+        except ValueError:
+            self._errors.append(f"{name} must be {'an integer' if kind is int else 'a number'}, got {value!r}")
+            return kind(default)
+
+        if number < minimum:
+            self._errors.append(f"{name} must be at least {minimum}, got {value!r}")
+        return number
+
+    def _flag(self, name: str, default: bool) -> bool:
+        value = self._env.get(name)
+        if value is None or value == "":
+            return default
+        return value.lower() not in ("0", "false", "no", "off")
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def load_settings() -> Settings:
+    """
+    Reads .env and the environment the first time it is called and returns the same Settings afterwards.
+    """
+    global _settings
+
+    with _settings_lock:
+        if _settings is None:
+            load_dotenv()
+            _settings = Settings(os.environ)
+
+        return _settings
@@ -0,0 +1,249 @@
+"""
+Bulk export of stored transaction history to CSV or Parquet files.
+
+Transactions are read from the local store in batches and flattened into one
+column per field, nested objects becoming dotted columns ("merchant.name",
+"metadata.pot_id", "counterparty.sort_code") and lists JSON strings. A first
+pass over the store collects the columns and their types, so every batch is
+written with the same header or schema. Only one batch of rows is held in
+memory at a time, whatever the length of the history.
+
+Files are only written inside an export directory, and an existing file is
+only replaced when the caller asks for it.
+
+Parquet needs the optional `pyarrow` package.
+"""
+import csv
+import hashlib
+import json
+import os
+
+from monzo.store import TransactionStore
+
+FORMATS = ("csv", "parquet")
+
+# Rows flattened and written at a time
+DEFAULT_BATCH_SIZE = 5000
+
+# Columns written first, in this order, when present; the others follow alphabetically
+LEADING_COLUMNS = (
+    "account_type", "account_id", "id", "created", "settled", "amount", "currency",
+    "local_amount", "local_currency", "description", "category", "notes",
+)
+
+
+def flatten(value: dict, prefix: str = "", row: dict = None) -> dict:
+    """
+    Flattens nested objects into dotted keys. Lists are kept as JSON strings.
+    """
+    row = {} if row is None else row
+
+    for key, item in value.items():
+        column = f"{prefix}{key}"
+        if isinstance(item, dict):
+            if item:
+                flatten(item, f"{column}.", row)
+        elif isinstance(item, list):
+            row[column] = json.dumps(item, separators=(",", ":")) if item else None
+        else:
+            row[column] = item
+
+    return row
+
+
+def _kind(value) -> str:
+    # bool is a subclass of int, so it is checked first
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "string"
+
+
+def _merge_kinds(current: str, new: str) -> str:
+    if current is None or current == new:
+        return new
+    if {current, new} == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def _rows(store: TransactionStore, accounts: dict, since: str, before: str):
+    """
+    Flattened transactions of every account in `accounts` ({account type: account id}), account by account.
+    """
+    # The same merchants come back again and again, flatten each of them once
+    merchant_columns = {}
+
+    for account_type, account_id in accounts.items():
+        for transaction in store.iter_query(account_id, since=since, before=before):
+            merchant = transaction.get("merchant")
+            if isinstance(merchant, dict) and merchant.get("id"):
+                columns = merchant_columns.get(merchant["id"])
+                if columns is None:
+                    columns = merchant_columns[merchant["id"]] = flatten(merchant, "merchant.")
+                row = flatten({key: value for key, value in transaction.items() if key != "merchant"})
+                row.update(columns)
+            else:
+                row = flatten(transaction)
+            row["account_type"] = account_type
+            yield row
+
+
+def resolve_path(directory: str, path: str) -> str:
+    """
+    Absolute path of `path` inside `directory`, relative paths being taken from `directory`.
+    Raises if the path, once symbolic links are resolved, points outside of it.
+    """
+    root = os.path.realpath(os.path.expanduser(directory))
+    resolved = os.path.realpath(os.path.join(root, os.path.expanduser(path)))
+
+    if not path or resolved == root or os.path.commonpath([root, resolved]) != root:
+        raise Exception(f"Error: exports can only be written inside {root}, e.g. path=\"monzo-2025.csv\"")
+    return resolved
+
+
+def _checked(rows, columns: dict):
+    """
+    Passes `rows` through, raising if one has a column the first pass did not see.
+    """
+    for row in rows:
+        if not columns.keys() >= row.keys():
+            added = sorted(row.keys() - columns.keys())
+            raise Exception(
+                f"Error: the transactions changed while they were exported (new columns {', '.join(added)}), export again"
+            )
+        yield row
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scan_columns(store: TransactionStore, accounts: dict, since: str, before: str) -> dict:
+    """
+    {column: "bool" | "int" | "float" | "string"} of every column of the export, in export order.
+    """
+    kinds = {}
+    for row in _rows(store, accounts, since, before):
+        for column, value in row.items():
+            kind = kinds.get(column)
+            if kind == "string":
+                continue
+            if value is not None:
+                kinds[column] = _merge_kinds(kind, _kind(value))
+            elif kind is None:
+                kinds[column] = None
+
+    leading = [column for column in LEADING_COLUMNS if column in kinds]
+    others = sorted(column for column in kinds if column not in LEADING_COLUMNS)
+    return {column: kinds[column] or "string" for column in leading + others}
+
+
+def _write_csv(path: str, columns: dict, batches) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(columns))
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows(batch)
+
+
+def _write_parquet(path: str, columns: dict, batches) -> None:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("Error: the parquet format needs the pyarrow package, install it or use format=csv")
+
+    types = {"bool": pyarrow.bool_(), "int": pyarrow.int64(), "float": pyarrow.float64(), "string": pyarrow.string()}
+    schema = pyarrow.schema([(column, types[kind]) for column, kind in columns.items()])
+    strings = [column for column, kind in columns.items() if kind == "string"]
+
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in batches:
+            data = {column: [row.get(column) for row in batch] for column in columns}
+            # Columns mixing types are written as text
+            for column in strings:
+                data[column] = [value if value is None or isinstance(value, str) else str(value) for value in data[column]]
+            # Each batch becomes one row group
+            writer.write_table(pyarrow.table(data, schema=schema))
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_transactions(
+        store: TransactionStore,
+        accounts: dict,
+        path: str,
+        format: str = "csv",
+        since: str = None,
+        before: str = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        directory: str = None,
+        overwrite: bool = False,
+) -> dict:
+    """
+    Writes the stored transactions of `accounts` ({account type: account id}) created in [since, before) to `path`.
+
+    With `directory`, `path` is resolved inside it and may not leave it. An existing file is only replaced
+    with `overwrite`. The file is written next to `path` and moved into place once complete, so readers
+    never see a partial export. Returns the path, row count per account, size and SHA-256 checksum of the file.
+    """
+    if format not in FORMATS:
+        raise Exception(f"Error: unknown format {format}, use csv or parquet")
+
+    path = resolve_path(directory, path) if directory else os.path.abspath(os.path.expanduser(path))
+    if os.path.exists(path) and not overwrite:
+        raise Exception(f"Error: {path} already exists, pass overwrite=True to replace it")
+
+    columns = scan_columns(store, accounts, since, before)
+
+    counts = dict.fromkeys(accounts, 0)
+
+    def counted(rows):
+        for row in rows:
+            counts[row["account_type"]] += 1
+            yield row
+
+    # Transactions written since the first pass may bring columns the header or schema does not have
+    batches = _batches(counted(_checked(_rows(store, accounts, since, before), columns)), batch_size)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+
+    try:
+        if format == "parquet":
+            _write_parquet(temporary_path, columns, batches)
+        else:
+            _write_csv(temporary_path, columns, batches)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, path)
+
+    return {
+        "path": path,
+        "format": format,
+        "rows": sum(counts.values()),
+        "accounts": counts,
+        "columns": len(columns),
+        "bytes": os.path.getsize(path),
+        "sha256": file_checksum(path),
+    }
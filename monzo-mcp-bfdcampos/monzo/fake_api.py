@@ -0,0 +1,288 @@
+"""
+Local stand-in for the Monzo API, to develop and benchmark the server offline.
+
+Serves /accounts, /balance, /pots, /pots/{id}/deposit|withdraw and
+/transactions (list, retrieve and annotate) for synthetic accounts whose
+transaction histories are generated on demand, with optional latency and
+randomly injected 429 responses.
+
+Run it with:
+    python -m monzo.fake_api --port 8765 --account acc_personal:10000 --latency-ms 40 --error-rate 0.02
+
+and point the server at it with MONZO_API_URL=http://127.0.0.1:8765/
+"""
+import argparse
+import asyncio
+import datetime
+import random
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from monzo.fixtures import TransactionHistory
+from monzo.store import parse_timestamp
+
+MAX_PAGE_SIZE = 100
+
+
+class FakeMonzo:
+    """
+    In-memory state behind the fake API.
+
+    Parameters:
+    accounts (dict): Number of transactions of each account, e.g. {"acc_personal": 10000}.
+    latency_ms (float): Average time each response is delayed by.
+    error_rate (float): Fraction of requests answered with a 429.
+    retry_after (float): Retry-After sent with the injected 429s, in seconds.
+    span_days (int): How far back the generated histories go.
+    seed (int): Seed of the random generators, so runs are reproducible.
+    """
+
+    def __init__(
+            self,
+            accounts: dict,
+            latency_ms: float = 0.0,
+            error_rate: float = 0.0,
+            retry_after: float = 0.1,
+            span_days: int = 365,
+            seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self.histories = {}
+        self.balances = {}
+        self.pots = {}
+        for number, (account_id, count) in enumerate(accounts.items(), start=1):
+            self.histories[account_id] = TransactionHistory(
+                count, account_id, span=datetime.timedelta(days=span_days), seed=seed + number,
+            )
+            self.balances[account_id] = 250000
+            self.pots[account_id] = {
+                f"pot_{account_id}_{name.lower()}": {
+                    "id": f"pot_{account_id}_{name.lower()}",
+                    "name": name,
+                    "style": "beach_ball",
+                    "balance": balance,
+                    "currency": "GBP",
+                    "type": "flexible_savings",
+                    "current_account_id": account_id,
+                    "round_up": False,
+                    "deleted": False,
+                    "locked": False,
+                    "created": "2024-01-01T00:00:00.000Z",
+                    "updated": "2024-01-01T00:00:00.000Z",
+                }
+                for name, balance in (("Savings", 500000), ("Holiday", 120000), ("Bills", 80000))
+            }
+
+        self.annotations = {}
+        self.applied_dedupe_ids = set()
+        self.requests = 0
+        self.throttled = 0
+
+    def find(self, transaction_id: str):
+        for history in self.histories.values():
+            index = history.index_of(transaction_id)
+            if index is not None:
+                return history, index
+        return None, None
+
+    def transaction(self, history: TransactionHistory, index: int, expand: bool) -> dict:
+        transaction = history[index]
+        if transaction["id"] in self.annotations:
+            transaction["metadata"].update(self.annotations[transaction["id"]])
+            transaction["notes"] = transaction["metadata"].get("notes", "")
+        if not expand and transaction["merchant"]:
+            transaction["merchant"] = transaction["merchant"]["id"]
+        return transaction
+
+
+def create_app(fake: FakeMonzo) -> Starlette:
+    """
+    Starlette application serving `fake`.
+    """
+
+    async def simulate(request: Request):
+        """
+        Applies the configured latency and returns an injected 429 response, if any.
+        """
+        fake.requests += 1
+        if fake.latency_ms:
+            await asyncio.sleep(fake.random.uniform(0.5, 1.5) * fake.latency_ms / 1000)
+        if fake.error_rate and fake.random.random() < fake.error_rate:
+            fake.throttled += 1
+            return JSONResponse(
+                {"code": "too_many_requests", "error": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(fake.retry_after)},
+            )
+        return None
+
+    def not_found(message: str) -> JSONResponse:
+        return JSONResponse({"code": "not_found", "error": message}, status_code=404)
+
+    async def accounts(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        return JSONResponse({
+            "accounts": [
+                {
+                    "id": account_id,
+                    "type": "uk_retail_joint" if "joint" in account_id else "uk_retail",
+                    "description": f"user_{account_id}",
+                    "created": "2020-01-01T00:00:00.000Z",
+                    "closed": False,
+                    "currency": "GBP",
+                }
+                for account_id in fake.histories
+            ]
+        })
+
+    async def balance(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        account_id = request.query_params.get("account_id")
+        if account_id not in fake.balances:
+            return not_found("account not found")
+        pots_total = sum(pot["balance"] for pot in fake.pots[account_id].values())
+        return JSONResponse({
+            "balance": fake.balances[account_id],
+            "total_balance": fake.balances[account_id] + pots_total,
+            "balance_including_flexible_savings": fake.balances[account_id] + pots_total,
+            "currency": "GBP",
+            "spend_today": -1250,
+            "local_currency": "",
+            "local_exchange_rate": 0,
+            "local_spend": [],
+        })
+
+    async def pots(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        account_id = request.query_params.get("current_account_id")
+        if account_id not in fake.pots:
+            return not_found("account not found")
+        return JSONResponse({"pots": list(fake.pots[account_id].values())})
+
+    async def pot_transfer(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        pot_id = request.path_params["pot_id"]
+        form = await request.form()
+        account_id = form.get("source_account_id") or form.get("destination_account_id")
+        pot = fake.pots.get(account_id, {}).get(pot_id)
+        if pot is None:
+            return not_found("pot not found")
+
+        dedupe_id = form.get("dedupe_id")
+        if dedupe_id not in fake.applied_dedupe_ids:
+            fake.applied_dedupe_ids.add(dedupe_id)
+            amount = int(form.get("amount", 0))
+            if request.path_params["direction"] == "withdraw":
+                amount = -amount
+            pot["balance"] += amount
+            fake.balances[account_id] -= amount
+        return JSONResponse(pot)
+
+    async def list_transactions(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        history = fake.histories.get(request.query_params.get("account_id"))
+        if history is None:
+            return not_found("account not found")
+
+        since = request.query_params.get("since")
+        before = request.query_params.get("before")
+        limit = min(int(request.query_params.get("limit", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        expand = request.query_params.get("expand[]") == "merchant"
+
+        start = 0
+        if since and since.startswith("tx_"):
+            index = history.index_of(since)
+            start = index + 1 if index is not None else 0
+        elif since:
+            start = history.index_at(parse_timestamp(since))
+        end = history.index_at(parse_timestamp(before)) if before else len(history)
+
+        return JSONResponse({
+            "transactions": [
+                fake.transaction(history, index, expand)
+                for index in range(start, min(end, start + limit))
+            ]
+        })
+
+    async def transaction(request: Request):
+        throttled = await simulate(request)
+        if throttled:
+            return throttled
+        history, index = fake.find(request.path_params["transaction_id"])
+        if history is None:
+            return not_found("transaction not found")
+
+        if request.method == "PATCH":
+            form = await request.form()
+            metadata = fake.annotations.setdefault(request.path_params["transaction_id"], {})
+            for key, value in form.items():
+                if key.startswith("metadata[") and key.endswith("]"):
+                    metadata[key[len("metadata["):-1]] = value
+
+        expand = request.query_params.get("expand[]") == "merchant"
+        return JSONResponse({"transaction": fake.transaction(history, index, expand)})
+
+    return Starlette(routes=[
+        Route("/accounts", accounts),
+        Route("/balance", balance),
+        Route("/pots", pots),
+        Route("/pots/{pot_id}/{direction:str}", pot_transfer, methods=["PUT"]),
+        Route("/transactions", list_transactions),
+        Route("/transactions/{transaction_id}", transaction, methods=["GET", "PATCH"]),
+    ])
+
+
+def parse_accounts(values: list) -> dict:
+    """
+    Parses "account_id:transaction_count" arguments.
+    """
+    accounts = {}
+    for value in values:
+        account_id, _, count = value.partition(":")
+        accounts[account_id] = int(count or 1000)
+    return accounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Monzo API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--account", action="append", default=[],
+        help="account_id:transaction_count, can be repeated. Default is acc_personal:1000",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--span-days", type=int, default=365)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeMonzo(
+        parse_accounts(args.account or ["acc_personal:1000"]),
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        span_days=args.span_days,
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Synthetic but realistically shaped Monzo API payloads.
+
+Used by the benchmarks to measure the server without touching a real account.
+Every transaction carries the full set of fields the real /transactions
+endpoint returns, including expanded merchants and the `can_*` flags.
+"""
+import datetime
+import random
+
+MERCHANTS = [
+    ("Pret A Manger", "eating_out", "London"),
+    ("Tesco", "groceries", "Manchester"),
+    ("Sainsbury's", "groceries", "London"),
+    ("TfL Travel Charge", "transport", "London"),
+    ("Deliveroo", "eating_out", "London"),
+    ("Amazon", "shopping", "Luton"),
+    ("Netflix", "entertainment", "Amsterdam"),
+    ("Spotify", "entertainment", "Stockholm"),
+    ("Boots", "personal_care", "Nottingham"),
+    ("Shell", "transport", "Leeds"),
+    ("Costa Coffee", "eating_out", "Bristol"),
+    ("Uber", "transport", "London"),
+]
+
+
+def make_merchant(index: int) -> dict:
+    name, category, city = MERCHANTS[index % len(MERCHANTS)]
+    merchant_id = f"merch_{index:020d}"
+
+    return {
+        "id": merchant_id,
+        "group_id": f"grp_{index % len(MERCHANTS):020d}",
+        "name": name,
+        "logo": f"https://mondo-logo-cache.appspot.com/twitter/{name.lower().replace(' ', '')}/?size=large",
+        "emoji": "",
+        "category": category,
+        "online": index % 3 == 0,
+        "atm": False,
+        "address": {
+            "short_formatted": f"1 High Street, {city}",
+            "city": city,
+            "latitude": 51.5 + (index % 10) / 100,
+            "longitude": -0.12 - (index % 10) / 100,
+            "zoom_level": 17,
+            "approximate": False,
+            "formatted": f"1 High Street, {city}, United Kingdom",
+            "address": "1 High Street",
+            "region": "",
+            "country": "GBR",
+            "postcode": "AB1 2CD",
+        },
+        "disable_feedback": False,
+        "suggested_tags": "",
+        "metadata": {},
+    }
+
+
+def make_transaction(index: int, account_id: str, created: datetime.datetime, rng: random.Random, series: int = 0) -> dict:
+    timestamp = created.strftime("%Y-%m-%dT%H:%M:%S.") + f"{created.microsecond // 1000:03d}Z"
+    is_pot_transfer = rng.random() < 0.05
+    merchant_index = rng.randrange(len(MERCHANTS) * 3)
+
+    if is_pot_transfer:
+        amount = rng.choice([-5000, -2500, 1000, 2000])
+        merchant = None
+        category = "savings"
+        description = f"pot_{merchant_index:020d}"
+        metadata = {
+            "external_id": f"mcp_{index:08d}",
+            "ledger_insertion_id": f"entryset_{index:020d}",
+            "pot_account_id": f"acc_pot_{merchant_index:016d}",
+            "pot_id": f"pot_{merchant_index:020d}",
+            "trigger": "user",
+            "user_id": "user_00000000000000000000",
+        }
+    else:
+        amount = -rng.randint(150, 12000) if rng.random() < 0.92 else rng.randint(1000, 300000)
+        merchant = make_merchant(merchant_index)
+        category = merchant["category"]
+        description = merchant["name"].upper()
+        metadata = {
+            "ledger_insertion_id": f"entryset_{index:020d}",
+            "mcc": "5814",
+            "notes": "",
+        }
+
+    return {
+        "id": transaction_id(series, index),
+        "created": timestamp,
+        "description": description,
+        "amount": amount,
+        "fees": {},
+        "currency": "GBP",
+        "merchant": merchant,
+        "merchant_feedback_uri": "",
+        "notes": "",
+        "metadata": metadata,
+        "labels": None,
+        "attachments": [],
+        "international": None,
+        "category": category,
+        "categories": {category: amount},
+        "is_load": amount > 0 and is_pot_transfer,
+        "settled": timestamp,
+        "local_amount": amount,
+        "local_currency": "GBP",
+        "updated": timestamp,
+        "account_id": account_id,
+        "user_id": "user_00000000000000000000",
+        "counterparty": {},
+        "scheme": "uk_retail_pot" if is_pot_transfer else "mastercard",
+        "dedupe_id": f"dedupe_{index:020d}",
+        "originator": False,
+        "include_in_spending": not is_pot_transfer,
+        "can_be_excluded_from_breakdown": True,
+        "can_be_made_subscription": not is_pot_transfer,
+        "can_split_the_bill": not is_pot_transfer,
+        "can_add_to_tab": not is_pot_transfer,
+        "can_match_transactions_in_categorization": True,
+        "amount_is_pending": False,
+        "atm_fees_detailed": None,
+        "parent_account_id": "",
+    }
+
+
+def transaction_id(series: int, index: int) -> str:
+    """
+    Id of the index-th transaction of a series; ids of different series never collide.
+    """
+    return f"tx_{series:04d}{index:016d}"
+
+
+class TransactionHistory:
+    """
+    `count` transactions of one account spread evenly over `span` up to `end`, oldest first.
+
+    Transactions are generated on demand from their index, so even a history of
+    hundreds of thousands of transactions takes no memory until it is read.
+    """
+
+    def __init__(
+            self,
+            count: int,
+            account_id: str = "acc_00000000000000000001",
+            end: datetime.datetime = None,
+            span: datetime.timedelta = datetime.timedelta(days=365),
+            seed: int = 0,
+    ):
+        self.count = count
+        self.account_id = account_id
+        self.seed = seed
+        self.end = end or datetime.datetime.utcnow().replace(microsecond=0)
+        self.start = self.end - span
+        self.step = span / max(count, 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def created(self, index: int) -> datetime.datetime:
+        return self.start + self.step * index
+
+    def __getitem__(self, index: int) -> dict:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        rng = random.Random(self.seed * 1_000_003 + index)
+        return make_transaction(index, self.account_id, self.created(index), rng, series=self.seed)
+
+    def index_of(self, transaction_id: str) -> int:
+        """
+        Index of a transaction of this history from its id, or None if it is not part of it.
+        """
+        if len(transaction_id) != 23 or not transaction_id.startswith(f"tx_{self.seed:04d}"):
+            return None
+        index = int(transaction_id[-16:])
+        return index if index < self.count else None
+
+    def index_at(self, moment: datetime.datetime) -> int:
+        """
+        Index of the first transaction created at or after `moment`.
+        """
+        if moment <= self.start:
+            return 0
+        index = -((self.start - moment) // self.step)
+        return min(self.count, index)
+
+
+def make_transactions(
+        count: int,
+        account_id: str = "acc_00000000000000000001",
+        end: datetime.datetime = None,
+        span: datetime.timedelta = datetime.timedelta(days=365),
+        seed: int = 0,
+) -> list:
+    """
+    `count` transactions spread evenly over `span` up to `end`, oldest first.
+    """
+    history = TransactionHistory(count, account_id, end=end, span=span, seed=seed)
+    return [history[index] for index in range(count)]
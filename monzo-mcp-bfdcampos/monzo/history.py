@@ -0,0 +1,103 @@
+"""
+Balance history of an account and its pots, reconstructed with numpy.
+
+Monzo only reports current balances. The balance at the end of a past day is
+the current balance minus everything that happened after that day, so the
+history is a reverse cumulative sum over daily net amounts, computed for the
+account and all of its pots at once as the rows of one matrix.
+
+The daily net amounts come from TransactionStore.daily_flows, which keeps them
+up to date as transactions are written: a history reads one row per day and
+pot, however many transactions there are. A pot's flows are the pot transfers
+of the account with the opposite sign, a deposit taking money out of the
+account and into the pot.
+"""
+import numpy as np
+
+INTERVALS = ("day", "week")
+
+
+def _week_starts(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday, shift so weeks start on Monday
+    return days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+
+
+def _points(dates: np.ndarray, closing: np.ndarray, net: np.ndarray, counts: np.ndarray) -> list:
+    return [
+        {"date": str(date), "balance": int(balance), "net": int(amount), "transactions": int(count)}
+        for date, balance, amount, count in zip(dates, closing, net, counts)
+    ]
+
+
+def balance_series(
+        rows: list,
+        balance: int,
+        pots: dict,
+        start: np.datetime64,
+        end: np.datetime64,
+        today: np.datetime64,
+        interval: str = "day",
+) -> dict:
+    """
+    Closing balances of the account and its pots for every day or week in [start, end).
+
+    Parameters:
+    rows (list): (day, pot_id, amount, transactions) from TransactionStore.daily_flows, from `start` on.
+    balance (int): Current balance of the account.
+    pots (dict): Current balance of each pot, {pot_id: balance}.
+    start (np.datetime64): First day of the series.
+    end (np.datetime64): Day after the last day of the series, at most the day after `today`.
+    today (np.datetime64): Day the current balances were read.
+    interval (str): "day", or "week" for one point per week starting on Monday.
+
+    Returns:
+    {"account": {"opening_balance": int, "series": [...]}, "pots": {pot_id: {"opening_balance": int, "series": [...]}}},
+    each series a list of {"date", "balance", "net", "transactions"}, "balance" being the balance at the end of the day or week.
+    """
+    if interval not in INTERVALS:
+        raise Exception(f"Error: unknown interval {interval}, use day or week")
+
+    days = np.arange(start, today + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    pot_ids = list(pots)
+    flows = np.zeros((len(pot_ids) + 1, days.size), dtype=np.int64)
+    counts = np.zeros_like(flows)
+
+    if rows:
+        day, pot_id, amount, count = zip(*rows)
+        amount = np.array(amount, dtype=np.int64)
+        count = np.array(count, dtype=np.int64)
+        # Transactions dated after `today` (clocks differ) already count in the current balance, as if made today
+        index = np.clip((np.array(day, dtype="datetime64[D]") - start).astype(np.int64), 0, days.size - 1)
+
+        np.add.at(flows[0], index, amount)
+        np.add.at(counts[0], index, count)
+
+        # Row of each pot transfer's pot, 0 for other transactions and pots that no longer exist
+        positions = {pot: row for row, pot in enumerate(pot_ids, start=1)}
+        pot_rows = np.array([positions.get(pot, 0) for pot in pot_id], dtype=np.int64)
+        transfer = pot_rows > 0
+        np.add.at(flows, (pot_rows[transfer], index[transfer]), -amount[transfer])
+        np.add.at(counts, (pot_rows[transfer], index[transfer]), count[transfer])
+
+    current = np.array([balance] + [pots[pot] for pot in pot_ids], dtype=np.int64)
+    # Everything that happened after each day, then the balance left at the end of it
+    later = np.cumsum(flows[:, ::-1], axis=1)[:, ::-1] - flows
+    closing = current[:, None] - later
+    opening = closing[:, 0] - flows[:, 0]
+
+    keep = max(int((end - start).astype(np.int64)), 0)
+    days, flows, counts, closing = days[:keep], flows[:, :keep], counts[:, :keep], closing[:, :keep]
+
+    if interval == "week" and days.size:
+        weeks = _week_starts(days)
+        firsts = np.flatnonzero(np.concatenate(([True], weeks[1:] != weeks[:-1])))
+        lasts = np.concatenate((firsts[1:], [days.size])) - 1
+        days, closing = weeks[firsts], closing[:, lasts]
+        flows = np.add.reduceat(flows, firsts, axis=1)
+        counts = np.add.reduceat(counts, firsts, axis=1)
+
+    series = [
+        {"opening_balance": int(opening[row]), "series": _points(days, closing[row], flows[row], counts[row])}
+        for row in range(len(pot_ids) + 1)
+    ]
+    return {"account": series[0], "pots": dict(zip(pot_ids, series[1:]))}
@@ -0,0 +1,48 @@
+"""
+Progress journal for batch operations, so a batch that partially failed can be
+re-run and only the items that did not complete are sent again.
+"""
+import json
+import os
+import re
+import threading
+
+
+class BatchJournal:
+    """
+    Records which items of a batch completed, in a JSON file under `directory`.
+
+    Parameters:
+    directory (str): Where journals are kept.
+    batch_id (str): Identifies the batch across runs.
+    """
+
+    def __init__(self, directory: str, batch_id: str):
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", batch_id):
+            raise Exception("Error: batch_id may only contain letters, digits, '_', '-' and '.'")
+
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{batch_id}.json")
+        self._lock = threading.Lock()
+
+        self._completed = {}
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                self._completed = json.load(file)
+
+    def is_done(self, key: str, fingerprint: str) -> bool:
+        """
+        True if the item completed in an earlier run with the same content.
+        """
+        return self._completed.get(key) == fingerprint
+
+    def mark_done(self, key: str, fingerprint: str) -> None:
+        with self._lock:
+            self._completed[key] = fingerprint
+
+    def save(self) -> None:
+        with self._lock:
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(self._completed, file)
+            os.replace(temporary_path, self.path)
@@ -0,0 +1,265 @@
+"""
+Per-tool metrics: calls, errors, latency histograms and response sizes.
+
+Every tool call is timed as a whole and split into phases:
+
+- upstream: time spent in HTTP requests to Monzo (summed when they run concurrently),
+- parse: time spent decoding JSON responses.
+
+The phases are collected through a context variable, so the HTTP client and
+the JSON decoders add to the call they run in without being passed anything.
+
+Once a tool returns, the MCP server converts its result into the content sent
+to the client. That conversion is timed on its own as the serialization phase,
+with the size of the text it produced, so results are only ever encoded once.
+Metrics can be exported in the Prometheus text format. When the optional
+`opentelemetry-api` package is installed and MONZO_OTEL is true, tool calls and
+API requests are also recorded as spans.
+
+In multi-tenant mode every tenant's calls are recorded apart, so a tenant
+only ever sees its own metrics.
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds of the response size histogram buckets, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PHASES = ("upstream", "parse", "serialization")
+
+_current_call = contextvars.ContextVar("monzo_tool_call", default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, as Prometheus expects them.
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-th quantile, an estimate good to the bucket resolution.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> list:
+        """
+        [(upper bound, observations at or below it)], ending with +Inf.
+        """
+        result = []
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            result.append((bound, seen))
+        return result
+
+
+def add_time(phase: str, seconds: float) -> None:
+    """
+    Adds `seconds` to a phase of the tool call running in the current context, if any.
+    """
+    call = _current_call.get()
+    if call is not None:
+        call[phase] += seconds
+
+
+@contextlib.contextmanager
+def timed(phase: str):
+    """
+    Times the block as part of a phase of the current tool call.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(phase, time.perf_counter() - start)
+
+
+def content_size(content) -> int:
+    """
+    Size in bytes of the text of converted tool `content`: content blocks, or (content blocks, structured content).
+    """
+    if isinstance(content, tuple):
+        content = content[0]
+    return sum(len(block.text.encode()) for block in content if getattr(block, "text", None) is not None)
+
+
+class ToolMetrics:
+    """
+    Metrics of every tool, keyed by tenant (None when serving a single user) and tool name.
+    """
+
+    def __init__(self):
+        self._tools = {}
+        self._lock = threading.Lock()
+        self.tracer = None
+
+    def _tool(self, tenant: str, name: str) -> dict:
+        tool = self._tools.get((tenant, name))
+        if tool is None:
+            tool = self._tools.setdefault((tenant, name), {
+                "calls": 0,
+                "errors": 0,
+                "latency": Histogram(LATENCY_BUCKETS),
+                **{phase: Histogram(LATENCY_BUCKETS) for phase in PHASES},
+                "response_bytes": Histogram(SIZE_BUCKETS),
+            })
+        return tool
+
+    def record(self, name: str, seconds: float, phases: dict, error: bool = False, tenant: str = None) -> None:
+        with self._lock:
+            tool = self._tool(tenant, name)
+            tool["calls"] += 1
+            tool["errors"] += error
+            tool["latency"].observe(seconds)
+            for phase, phase_seconds in phases.items():
+                tool[phase].observe(phase_seconds)
+
+    def record_serialization(self, name: str, seconds: float, response_bytes: int, tenant: str = None) -> None:
+        """
+        Records how long the server took to convert a result of `name` into content, and the size of that content.
+        """
+        with self._lock:
+            tool = self._tool(tenant, name)
+            tool["serialization"].observe(seconds)
+            tool["response_bytes"].observe(response_bytes)
+
+    def instrument(self, name: str, function, tenant=None):
+        """
+        Wraps an async tool function so each call is recorded under `name`, and under the
+        tenant returned by the `tenant` callable when given.
+        """
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            phases = {"upstream": 0.0, "parse": 0.0}
+            token = _current_call.set(phases)
+            start = time.perf_counter()
+            error = False
+
+            try:
+                with self.span(f"tool {name}"):
+                    return await function(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                _current_call.reset(token)
+                self.record(name, time.perf_counter() - start, phases, error, tenant=tenant() if tenant else None)
+
+        return wrapper
+
+    def enable_tracing(self) -> bool:
+        """
+        Records spans with OpenTelemetry from now on. Returns False if opentelemetry-api is not installed.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            return False
+
+        self.tracer = trace.get_tracer("monzo-mcp")
+        return True
+
+    def span(self, name: str, **attributes):
+        """
+        An OpenTelemetry span when tracing is enabled, otherwise a no-op context manager.
+        """
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+    def summary(self, tenant: str = None) -> dict:
+        """
+        Per-tool counts and p50/p95 of each latency phase in milliseconds, plus response sizes, of `tenant`'s calls.
+        """
+        with self._lock:
+            result = {}
+            for (tool_tenant, name), tool in sorted(self._tools.items(), key=lambda item: item[0][1]):
+                if tool_tenant != tenant:
+                    continue
+                result[name] = {
+                    "calls": tool["calls"],
+                    "errors": tool["errors"],
+                    **{
+                        f"{phase}_ms": {
+                            "mean": round(tool[phase].sum / tool[phase].count * 1000, 2) if tool[phase].count else 0.0,
+                            "p50": tool[phase].quantile(0.5) * 1000,
+                            "p95": tool[phase].quantile(0.95) * 1000,
+                        }
+                        for phase in ("latency",) + PHASES
+                    },
+                    "response_bytes": {
+                        "mean": round(tool["response_bytes"].sum / tool["response_bytes"].count) if tool["response_bytes"].count else 0,
+                        "p95": tool["response_bytes"].quantile(0.95),
+                    },
+                }
+            return result
+
+    def prometheus(self, tenant: str = None, every_tenant: bool = False) -> str:
+        """
+        Metrics of `tenant`'s calls, or with `every_tenant` of all calls labelled with their tenant,
+        in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP monzo_mcp_tool_calls_total Tool calls.",
+            "# TYPE monzo_mcp_tool_calls_total counter",
+        ]
+        with self._lock:
+            tools = [
+                (f'tenant="{tool_tenant}",tool="{name}"' if tool_tenant is not None else f'tool="{name}"', tool)
+                for (tool_tenant, name), tool in sorted(self._tools.items(), key=lambda item: (item[0][0] or "", item[0][1]))
+                if every_tenant or tool_tenant == tenant
+            ]
+
+            for labels, tool in tools:
+                lines.append(f'monzo_mcp_tool_calls_total{{{labels}}} {tool["calls"]}')
+
+            lines += ["# HELP monzo_mcp_tool_errors_total Tool calls that raised.", "# TYPE monzo_mcp_tool_errors_total counter"]
+            for labels, tool in tools:
+                lines.append(f'monzo_mcp_tool_errors_total{{{labels}}} {tool["errors"]}')
+
+            histograms = [
+                ("monzo_mcp_tool_duration_seconds", "Tool call latency.", "latency"),
+                *((f"monzo_mcp_tool_{phase}_seconds", f"Time of tool calls spent in {phase}.", phase) for phase in PHASES),
+                ("monzo_mcp_tool_response_bytes", "Size of tool results encoded as JSON.", "response_bytes"),
+            ]
+            for metric, description, key in histograms:
+                lines += [f"# HELP {metric} {description}", f"# TYPE {metric} histogram"]
+                for labels, tool in tools:
+                    histogram = tool[key]
+                    for bound, count in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every tool of the server
+tool_metrics = ToolMetrics()
@@ -0,0 +1,150 @@
+"""
+Pagination over Monzo's /transactions endpoint.
+
+The API returns at most `limit` transactions per request (100 is the documented
+maximum) and accepts a transaction id as `since`, so a date range is walked by
+repeatedly asking for the transactions after the last id of the previous page.
+Responses are parsed as they stream in and transactions are yielded as soon as
+they are decoded, so callers never hold more than they choose to buffer.
+"""
+import asyncio
+import datetime
+
+from monzo.store import normalise_timestamp, parse_timestamp
+from monzo.streaming import stream_array
+
+transactions_url = "transactions"
+
+PAGE_SIZE = 100
+
+
+async def iter_transactions(
+        client,
+        account_id: str,
+        since: str,
+        before: str = None,
+        page_size: int = PAGE_SIZE,
+        expand: str = "merchant",
+):
+    """
+    Yields every transaction created in [since, before), oldest first, one at a time as
+    each response is parsed.
+
+    Parameters:
+    client (AsyncMonzoClient): Client used to reach the API.
+    account_id (str): The account to list transactions for.
+    since (str): Start of the range as an ISO 8601 timestamp or a transaction id.
+    before (str): End of the range as an ISO 8601 timestamp. Default is None (now).
+    page_size (int): Number of transactions asked for per request.
+    expand (str): Data to expand in each transaction. Default is "merchant", None to disable.
+    """
+    cursor = since
+
+    while True:
+        params = {
+            "account_id": account_id,
+            "since": cursor,
+            "before": before,
+            "limit": page_size,
+            "expand[]": expand,
+        }
+
+        received = 0
+        async for transaction in stream_array(client, transactions_url, "transactions", params=params):
+            received += 1
+            cursor = transaction["id"]
+            yield transaction
+
+        if received < page_size:
+            return
+
+
+async def iter_transaction_pages(
+        client,
+        account_id: str,
+        since: str,
+        before: str = None,
+        page_size: int = PAGE_SIZE,
+        expand: str = "merchant",
+):
+    """
+    Same as iter_transactions, but yields lists of up to `page_size` transactions.
+    """
+    page = []
+    async for transaction in iter_transactions(client, account_id, since, before, page_size=page_size, expand=expand):
+        page.append(transaction)
+        if len(page) == page_size:
+            yield page
+            page = []
+
+    if page:
+        yield page
+
+
+def split_range(since: str, before: str, windows: int) -> list:
+    """
+    Splits [since, before) into `windows` contiguous (since, before) sub-ranges of equal length.
+    """
+    start = parse_timestamp(since)
+    end = parse_timestamp(before)
+    step = (end - start) / windows
+
+    edges = [normalise_timestamp((start + step * i).isoformat()) for i in range(windows)]
+    edges.append(normalise_timestamp(end.isoformat()))
+
+    return list(zip(edges[:-1], edges[1:]))
+
+
+async def iter_transaction_pages_parallel(
+        client,
+        account_id: str,
+        since: str,
+        before: str = None,
+        windows: int = 4,
+        page_size: int = PAGE_SIZE,
+        expand: str = "merchant",
+):
+    """
+    Same as iter_transaction_pages, but splits the range into `windows` sub-ranges which are
+    paged through concurrently. Pages are yielded in the order they arrive, not oldest first,
+    and at most two pages per window are buffered while the caller is busy.
+    """
+    if before is None:
+        before = datetime.datetime.utcnow().isoformat()
+
+    queue = asyncio.Queue(maxsize=2 * windows)
+    finished = object()
+
+    async def produce(window_since: str, window_before: str) -> None:
+        try:
+            async for page in iter_transaction_pages(
+                client, account_id, window_since, window_before, page_size=page_size, expand=expand
+            ):
+                await queue.put(page)
+        except asyncio.CancelledError:
+            # The consumer stopped reading, so nothing may wait on the full queue after this
+            raise
+        except Exception as error:
+            await queue.put(error)
+        else:
+            await queue.put(finished)
+
+    tasks = [
+        asyncio.create_task(produce(window_since, window_before))
+        for window_since, window_before in split_range(since, before, windows)
+    ]
+
+    try:
+        running = len(tasks)
+        while running:
+            item = await queue.get()
+            if item is finished:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
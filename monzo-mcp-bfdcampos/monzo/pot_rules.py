@@ -0,0 +1,256 @@
+"""
+Declarative rules that move money between an account and its pots.
+
+Rules are evaluated in order against the current balance and pots, each one
+seeing the balances left by the rules before it. Their moves are then netted
+per pot, so the plan makes at most one transfer per pot whatever the number of
+rules. A deposit never takes the account below zero and a withdrawal never
+takes more than the pot holds.
+
+Every move is identified by its rule, period (e.g. the month) and pot. Moves
+made by an earlier run are recorded by the caller and skipped before netting,
+so a rule cannot move money twice for one period, even when rules with other
+periods share its pot or the rule set changes. Every transfer gets a dedupe id
+derived from the account, the pot and the moves it makes: a run that failed
+before recording its moves plans the same transfers again with the same dedupe
+ids, which Monzo applies only once.
+
+Rule types, amounts in minor units:
+
+- {"type": "sweep", "pot_id": ..., "above": 100000}: moves the balance above `above` into the pot.
+- {"type": "floor", "pot_id": ..., "minimum": 20000}: withdraws from the pot to bring the balance back up to `minimum`.
+- {"type": "target", "pot_id": ..., "target": 50000}: deposits until the pot holds `target`.
+- {"type": "split", "allocations": [{"pot_id": ..., "percent": 20}, {"pot_id": ..., "amount": 5000}],
+   "amount": 250000}: shares `amount` (or the balance above `keep`, default 0) between pots.
+- {"type": "round_up", "pot_id": ..., "to": 100}: deposits the spare change of rounding every payment
+   of the previous period up to a multiple of `to`.
+
+Every rule can also have a "name", which should stay the same when its other settings
+change, and a "period": "day", "week" or "month" (default).
+"""
+import datetime
+import hashlib
+import json
+
+RULE_TYPES = ("sweep", "floor", "target", "split", "round_up")
+PERIODS = ("day", "week", "month")
+
+# Required settings of each rule type besides "type"
+_REQUIRED = {
+    "sweep": ("pot_id", "above"),
+    "floor": ("pot_id", "minimum"),
+    "target": ("pot_id", "target"),
+    "split": ("allocations",),
+    "round_up": ("pot_id",),
+}
+
+
+def parse_rules(rules: list) -> list:
+    """
+    Validated copies of `rules`, each with a "name" and a "period".
+    """
+    if not rules:
+        raise Exception("Error: no rules given")
+
+    parsed = []
+    names = set()
+    for position, rule in enumerate(rules, start=1):
+        if not isinstance(rule, dict) or rule.get("type") not in RULE_TYPES:
+            raise Exception(f"Error: rule {position} must have a type, one of {', '.join(RULE_TYPES)}")
+
+        missing = [key for key in _REQUIRED[rule["type"]] if rule.get(key) in (None, "", [])]
+        if missing:
+            raise Exception(f"Error: rule {position} ({rule['type']}) needs {', '.join(missing)}")
+
+        rule = dict(rule)
+        rule.setdefault("period", "month")
+        if rule["period"] not in PERIODS:
+            raise Exception(f"Error: rule {position} has period {rule['period']}, options are {', '.join(PERIODS)}")
+
+        if rule["type"] == "split":
+            for allocation in rule["allocations"]:
+                if not allocation.get("pot_id") or (allocation.get("percent") is None) == (allocation.get("amount") is None):
+                    raise Exception(f"Error: rule {position} allocations need a pot_id and either percent or amount")
+
+        if not rule.get("name"):
+            content = json.dumps({key: value for key, value in rule.items() if key != "name"}, sort_keys=True)
+            rule["name"] = f"{rule['type']}-{hashlib.sha256(content.encode()).hexdigest()[:8]}"
+        if rule["name"] in names:
+            raise Exception(f"Error: two rules are named {rule['name']}")
+        names.add(rule["name"])
+
+        parsed.append(rule)
+
+    return parsed
+
+
+def period_bounds(period: str, now: datetime.datetime, previous: bool = False) -> tuple:
+    """
+    (key, start, end) of the period containing `now`, or of the one before it, e.g. ("2025-05", May 1st, June 1st).
+    """
+    day = datetime.datetime(now.year, now.month, now.day)
+
+    if period == "day":
+        start = day - datetime.timedelta(days=1) if previous else day
+        return start.strftime("%Y-%m-%d"), start, start + datetime.timedelta(days=1)
+
+    if period == "week":
+        start = day - datetime.timedelta(days=day.weekday() + (7 if previous else 0))
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}", start, start + datetime.timedelta(days=7)
+
+    start = day.replace(day=1)
+    if previous:
+        start = (start - datetime.timedelta(days=1)).replace(day=1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start.strftime("%Y-%m"), start, end
+
+
+def round_up_window(rules: list, now: datetime.datetime):
+    """
+    Earliest start and latest end of the periods the round_up rules look at, or None without round_up rules.
+    """
+    windows = [period_bounds(rule["period"], now, previous=True) for rule in rules if rule["type"] == "round_up"]
+    if not windows:
+        return None
+    return min(window[1] for window in windows), max(window[2] for window in windows)
+
+
+def _spare_change(transactions: list, start: str, end: str, to: int) -> int:
+    total = 0
+    for transaction in transactions:
+        amount = transaction.get("amount") or 0
+        if amount >= 0 or not (start <= transaction["created"] < end):
+            continue
+        # Only card payments and the like, not pot transfers or transactions left out of spending
+        if transaction.get("include_in_spending") is False or (transaction.get("metadata") or {}).get("pot_id"):
+            continue
+        # e.g. -345 % 100 is 55, the change left from paying 4.00 for 3.45
+        total += amount % to
+    return total
+
+
+def move_key(rule_name: str, period: str, pot_id: str) -> str:
+    """
+    Identifies the move of one rule into or out of one pot for one period, e.g. "savings@2025-05:pot_123".
+    """
+    return f"{rule_name}@{period}:{pot_id}"
+
+
+def plan_transfers(
+        rules: list,
+        account_id: str,
+        balance: int,
+        pots: list,
+        now: datetime.datetime,
+        transactions: list = (),
+        applied=None,
+) -> dict:
+    """
+    Evaluates parsed `rules` and returns the transfers that apply them.
+
+    Parameters:
+    rules (list): Rules returned by parse_rules.
+    account_id (str): Account the pots belong to, part of the dedupe ids.
+    balance (int): Current balance of the account.
+    pots (list): Pots of the account, as returned by the /pots endpoint.
+    now (datetime.datetime): Current time in UTC, which decides the periods.
+    transactions (list): Transactions of the window given by round_up_window(), for round_up rules.
+    applied (callable): Takes a move_key() and returns True if an earlier run made that move. Default is None (none did).
+    """
+    pots_by_id = {pot["id"]: pot for pot in pots if not pot.get("deleted")}
+    pot_balances = {pot_id: pot.get("balance") or 0 for pot_id, pot in pots_by_id.items()}
+    available = balance
+
+    evaluated = []
+    # pot id -> [net amount, [(rule name, move key), ...]], positive amounts are deposits
+    net = {}
+
+    for rule in rules:
+        key, start, end = period_bounds(rule["period"], now, previous=rule["type"] == "round_up")
+        notes = []
+        moves = []
+
+        def move(pot_id: str, amount: int) -> None:
+            nonlocal available
+            if pot_id not in pots_by_id:
+                notes.append(f"pot {pot_id} not found")
+                return
+            if applied is not None and applied(move_key(rule["name"], key, pot_id)):
+                # Already in the balances read from Monzo
+                notes.append(f"already moved money for pot {pot_id} in {key}")
+                return
+            if amount > 0:
+                amount = min(amount, max(available, 0))
+            elif amount < 0:
+                if pots_by_id[pot_id].get("locked"):
+                    notes.append(f"pot {pot_id} is locked")
+                    return
+                amount = -min(-amount, pot_balances[pot_id])
+            if amount == 0:
+                return
+            available -= amount
+            pot_balances[pot_id] += amount
+            moves.append({"pot_id": pot_id, "amount": amount})
+            entry = net.setdefault(pot_id, [0, []])
+            entry[0] += amount
+            entry[1].append((rule["name"], move_key(rule["name"], key, pot_id)))
+
+        if rule["type"] == "sweep":
+            move(rule["pot_id"], max(available - int(rule["above"]), 0))
+        elif rule["type"] == "floor":
+            move(rule["pot_id"], -max(int(rule["minimum"]) - available, 0))
+        elif rule["type"] == "target":
+            move(rule["pot_id"], max(int(rule["target"]) - pot_balances.get(rule["pot_id"], 0), 0))
+        elif rule["type"] == "split":
+            base = int(rule["amount"]) if rule.get("amount") is not None else available - int(rule.get("keep") or 0)
+            for allocation in rule["allocations"]:
+                if allocation.get("amount") is not None:
+                    move(allocation["pot_id"], max(int(allocation["amount"]), 0))
+                else:
+                    move(allocation["pot_id"], int(max(base, 0) * float(allocation["percent"]) / 100))
+        elif rule["type"] == "round_up":
+            change = _spare_change(
+                transactions, start.strftime("%Y-%m-%dT%H:%M:%S.000Z"), end.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                int(rule.get("to") or 100),
+            )
+            move(rule["pot_id"], change)
+
+        evaluated.append({"rule": rule["name"], "type": rule["type"], "period": key, "moves": moves, "notes": notes})
+
+    transfers = []
+    for pot_id, (amount, sources) in net.items():
+        if amount == 0:
+            continue
+        direction = "deposit" if amount > 0 else "withdraw"
+        moves = sorted({move for _name, move in sources})
+        content = json.dumps([account_id, pot_id, direction, moves])
+        transfers.append({
+            "pot_id": pot_id,
+            "pot_name": pots_by_id[pot_id].get("name"),
+            "direction": direction,
+            "amount": abs(amount),
+            "dedupe_id": f"rule_{hashlib.sha256(content.encode()).hexdigest()[:32]}",
+            "rules": [name for name, _move in sources],
+            "moves": moves,
+        })
+
+    # Withdrawals first, so deposits relying on the money they free up do not fail
+    transfers.sort(key=lambda transfer: transfer["direction"] != "withdraw")
+
+    return {
+        "rules": evaluated,
+        "transfers": transfers,
+        "balance_before": balance,
+        "balance_after": available,
+        "pots_after": {pot_id: pot_balances[pot_id] for pot_id in net},
+    }
+
+
+def undo_transfer(result: dict, transfer: dict) -> None:
+    """
+    Takes a transfer that was not made back out of the balance_after and pots_after of plan_transfers' `result`.
+    """
+    amount = transfer["amount"] if transfer["direction"] == "deposit" else -transfer["amount"]
+    result["balance_after"] += amount
+    result["pots_after"][transfer["pot_id"]] -= amount
@@ -0,0 +1,82 @@
+"""
+Low-overhead sampling profiler for the running server.
+
+A background thread samples the Python stack of every other thread at a fixed
+interval and counts identical stacks. The result is written in the "collapsed
+stacks" format understood by flamegraph.pl, speedscope and inferno, e.g.
+
+    main.py:list_transactions;monzo/sync.py:sync_transactions;... 42
+
+Enabled with MONZO_PROFILE=/path/to/profile.folded, see main.py.
+"""
+import collections
+import os
+import sys
+import threading
+
+
+class SamplingProfiler:
+    """
+    Parameters:
+    path (str): File the collapsed stacks are written to by stop() and write().
+    interval (float): Seconds between samples.
+    """
+
+    def __init__(self, path: str, interval: float = 0.01):
+        self.path = path
+        self.interval = interval
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="monzo-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+
+    def _sample(self, own_id: int) -> None:
+        # A method of its own, so the frames are released before the next wait: a frame
+        # kept alive keeps its locals alive too, e.g. sqlite cursors that should be finalised
+        frames = sys._current_frames()
+
+        with self._lock:
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                self._stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def write(self) -> None:
+        """
+        Writes the stacks sampled so far, most frequent first.
+        """
+        with self._lock:
+            stacks = self._stacks.most_common()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            for stack, count in stacks:
+                file.write(f"{stack} {count}\n")
+        os.replace(temporary_path, self.path)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
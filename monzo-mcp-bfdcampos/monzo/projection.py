@@ -0,0 +1,75 @@
+"""
+Trimming of transaction payloads before they are returned to the MCP client.
+
+A Monzo transaction carries dozens of fields the client rarely needs. `fields`
+keeps only the named ones (dotted paths reach into nested objects, e.g.
+"merchant.name"), and compact mode drops nulls, empty strings/objects/arrays
+and the boolean `can_*` capability flags.
+"""
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == {} or value == []
+
+
+def compact(value):
+    """
+    Recursively removes null and empty values and the `can_*` capability flags.
+    """
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key.startswith("can_") and isinstance(item, bool):
+                continue
+            item = compact(item)
+            if not _is_empty(item):
+                result[key] = item
+        return result
+
+    if isinstance(value, list):
+        return [item for item in (compact(item) for item in value) if not _is_empty(item)]
+
+    return value
+
+
+def parse_fields(fields: str) -> list:
+    """
+    Splits a comma separated `fields` parameter into a list of dotted paths.
+    """
+    if not fields:
+        return []
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def project(transaction: dict, fields: list) -> dict:
+    """
+    Keeps only the given dotted paths of a transaction. "id" is always kept.
+    """
+    result = {"id": transaction.get("id")}
+
+    for field in fields:
+        parts = field.split(".")
+
+        value = transaction
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+
+    return result
+
+
+def shape(transaction: dict, fields: list = None, compact_output: bool = False) -> dict:
+    """
+    Applies the field projection and compact mode to one transaction.
+    """
+    if fields:
+        transaction = project(transaction, fields)
+    if compact_output:
+        transaction = compact(transaction)
+    return transaction
@@ -0,0 +1,135 @@
+"""
+Client-side rate limiting and retries for the Monzo API.
+
+A token bucket spaces requests out so bursts of tool calls stay within the API
+quota. Requests that are safe to repeat are retried on 429 and 5xx responses
+(and connection errors) with exponential backoff and jitter, honouring
+Retry-After. A retry budget caps retries to a fraction of the traffic, so an
+API outage does not turn into a retry storm.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def acquire(self) -> None:
+        """
+        Waits until a request may be sent.
+        """
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+
+            self._tokens -= 1
+
+
+class RetryBudget:
+    """
+    Every request earns `ratio` of a retry, and every retry spends one, on top of
+    `minimum` retries that are always available.
+    """
+
+    def __init__(self, ratio: float = 0.2, minimum: int = 10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self._balance = float(minimum)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.minimum + 100 * self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Takes one retry out of the budget, returns False if there is none left.
+        """
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Parameters:
+    max_attempts (int): Maximum number of times a request is sent, including the first one.
+    base_delay (float): Backoff before the first retry, in seconds. Doubles on every retry.
+    max_delay (float): Longest backoff or Retry-After honoured, in seconds.
+    budget (RetryBudget): Shared budget retries are taken from.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0, budget: RetryBudget = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.counters = {"retries": 0, "budget_exhausted": 0}
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (starting at 1).
+        """
+        if retry_after:
+            seconds = parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.max_delay)
+
+        # Full jitter: spread retries of concurrent calls so they don't all come back at once
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def should_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+
+        if not self.budget.withdraw():
+            self.counters["budget_exhausted"] += 1
+            return False
+
+        self.counters["retries"] += 1
+        return True
+
+
+def parse_retry_after(value: str):
+    """
+    Seconds to wait according to a Retry-After header given either in seconds or as an HTTP date.
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,171 @@
+"""
+Detection of recurring payments and subscriptions, computed with numpy.
+
+Transactions are grouped by normalised merchant or counterparty name and
+direction, then split into amount clusters: sorted by size, a new cluster
+starts wherever the next amount is more than the tolerance larger than the
+previous one. A Netflix subscription and one-off purchases at the same
+merchant therefore end up in different series.
+
+The intervals between consecutive transactions of each series are binned into
+cadence windows (weekly, fortnightly, monthly, quarterly, yearly), giving an
+interval histogram per series. A series is recurring when most of its
+intervals fall into the same window. Every step runs on whole arrays, so only
+the series that are reported are handled one at a time.
+"""
+import re
+
+import numpy as np
+
+# (name, typical interval in days, smallest and largest interval counted as this cadence)
+CADENCES = (
+    ("weekly", 7, 6, 8),
+    ("fortnightly", 14, 13, 15),
+    ("monthly", 30.44, 26, 35),
+    ("quarterly", 91.31, 84, 98),
+    ("yearly", 365.25, 350, 380),
+)
+
+# Words that tell nothing about who was paid
+_NOISE_WORDS = {"ltd", "limited", "plc", "uk", "gb", "com", "co", "www", "the", "dd", "so", "payment", "ref", "card"}
+_WORD = re.compile(r"[a-z]+|[0-9]+")
+
+
+def normalise_name(name: str) -> str:
+    """
+    Lower case words of a merchant or counterparty name without references, numbers and noise
+    such as "Ltd" or "www", e.g. "NETFLIX.COM 866-579-7172" and "Netflix" are both "netflix".
+    """
+    words = [word for word in _WORD.findall((name or "").lower()) if not word.isdigit() and word not in _NOISE_WORDS]
+    return " ".join(words) or (name or "unknown").strip().lower()
+
+
+def _cadence_bins():
+    """
+    Edges for np.searchsorted: odd bins are the cadence windows, even bins the gaps between them.
+    """
+    edges = []
+    for _name, _days, low, high in CADENCES:
+        edges += [low - 0.5, high + 0.5]
+    return np.array(edges)
+
+
+def detect(
+        rows: list,
+        today: np.datetime64,
+        min_occurrences: int = 3,
+        amount_tolerance: float = 0.1,
+        regularity: float = 0.6,
+        include_income: bool = False,
+) -> list:
+    """
+    Recurring series in `rows` of (created, amount, category, name), as stored by TransactionStore.counterparty_rows.
+
+    Parameters:
+    rows (list): Transactions in any order.
+    today (np.datetime64): Day the series are considered active or lapsed against.
+    min_occurrences (int): Fewest transactions a series needs.
+    amount_tolerance (float): Relative difference between amounts still counted as the same payment, e.g. 0.1 for 10%.
+    regularity (float): Share of the intervals of a series that must match its cadence.
+    include_income (bool): Also detect incoming series, e.g. salary. Default is outgoing payments only.
+
+    Returns:
+    [{"name", "category", "cadence", "interval_days", "typical_amount", "min_amount", "max_amount",
+      "occurrences", "first", "last", "next_expected", "regularity", "active", "monthly_amount"}, ...],
+    largest monthly amount first.
+    """
+    if not rows:
+        return []
+
+    created, amount, category, name = zip(*rows)
+    amount = np.array([value or 0 for value in amount], dtype=np.int64)
+    days = np.array([value[:10] for value in created], dtype="datetime64[D]")
+
+    keep = amount != 0 if include_income else amount < 0
+    if not keep.any():
+        return []
+    index = np.flatnonzero(keep)
+    amount, days = amount[index], days[index]
+
+    # Normalise each distinct name once, names repeat a lot
+    names, name_codes = np.unique(np.array(name, dtype=object)[index].astype(str), return_inverse=True)
+    keys, key_of_name = np.unique([normalise_name(value) for value in names], return_inverse=True)
+    group = key_of_name[name_codes.reshape(-1)] * 2 + (amount > 0)
+
+    # Amount clusters: sorted by size within each group, so payments (negative) grow the same way as
+    # income does, break where the gap exceeds the tolerance
+    order = np.lexsort((np.abs(amount), group))
+    sorted_group = group[order]
+    magnitude = np.abs(amount[order])
+    breaks = np.ones(order.size, dtype=bool)
+    breaks[1:] = (sorted_group[1:] != sorted_group[:-1]) | (
+        magnitude[1:] - magnitude[:-1] > amount_tolerance * magnitude[:-1]
+    )
+    series = np.empty(order.size, dtype=np.int64)
+    series[order] = np.cumsum(breaks) - 1
+
+    counts = np.bincount(series)
+    candidates = counts >= min_occurrences
+    if not candidates.any():
+        return []
+
+    # Chronological order within each candidate series
+    in_candidate = candidates[series]
+    positions = np.flatnonzero(in_candidate)
+    order = positions[np.lexsort((days[positions], series[positions]))]
+    series_sorted, day_numbers = series[order], days[order].astype(np.int64)
+
+    same_series = series_sorted[1:] == series_sorted[:-1]
+    intervals = np.diff(day_numbers)[same_series]
+    interval_series = series_sorted[1:][same_series]
+
+    # Interval histogram per series over the cadence windows
+    bins = np.searchsorted(_cadence_bins(), intervals, side="right")
+    in_window = bins % 2 == 1
+    cadence = (bins - 1) // 2
+    histogram = np.zeros((counts.size, len(CADENCES)), dtype=np.int64)
+    np.add.at(histogram, (interval_series[in_window], cadence[in_window]), 1)
+
+    interval_counts = np.bincount(interval_series, minlength=counts.size)
+    dominant = histogram.argmax(axis=1)
+    matched = histogram[np.arange(counts.size), dominant]
+    share = np.divide(matched, interval_counts, out=np.zeros(counts.size), where=interval_counts > 0)
+    recurring = np.flatnonzero(candidates & (matched >= min_occurrences - 1) & (share >= regularity))
+
+    boundaries = np.concatenate(([0], np.cumsum(np.bincount(series_sorted, minlength=counts.size))))
+    categories = np.array(category, dtype=object)[index]
+
+    detected = []
+    for series_id in recurring:
+        members = order[boundaries[series_id]:boundaries[series_id + 1]]
+        member_days = day_numbers[boundaries[series_id]:boundaries[series_id + 1]]
+        member_amounts = amount[members]
+        cadence_name, cadence_days, low, high = CADENCES[dominant[series_id]]
+
+        gaps = np.diff(member_days)
+        interval = float(np.median(gaps[(gaps >= low) & (gaps <= high)]))
+        typical = int(np.median(member_amounts))
+        last = days[members[-1]]
+        next_expected = last + np.timedelta64(int(round(interval)), "D")
+
+        detected.append({
+            # Most recent spelling of the name
+            "name": str(names[name_codes.reshape(-1)[members[-1]]]),
+            "category": categories[members[-1]],
+            "cadence": cadence_name,
+            "interval_days": round(interval, 1),
+            "typical_amount": typical,
+            "min_amount": int(member_amounts.min()),
+            "max_amount": int(member_amounts.max()),
+            "occurrences": int(members.size),
+            "first": str(days[members[0]]),
+            "last": str(last),
+            "next_expected": str(next_expected),
+            "regularity": round(float(share[series_id]), 2),
+            # Not lapsed: the next payment is due, or overdue by less than half an interval
+            "active": bool(today <= next_expected + np.timedelta64(int(round(interval / 2)), "D")),
+            "monthly_amount": int(round(typical * 30.44 / cadence_days)),
+        })
+
+    detected.sort(key=lambda item: abs(item["monthly_amount"]), reverse=True)
+    return detected
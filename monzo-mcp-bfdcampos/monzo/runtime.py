@@ -0,0 +1,94 @@
+"""
+The long-lived objects the tools share: the HTTP client, the response cache and
+the local transaction store, built from the settings on first use rather than
+when the server module is imported.
+"""
+import os
+import time
+
+from monzo.accounts import AccountRegistry
+from monzo.cache import ResponseCache
+from monzo.client import AsyncMonzoClient
+from monzo.concurrency import SingleFlight
+from monzo.config import Settings
+from monzo.ratelimit import RetryBudget, RetryPolicy, TokenBucket
+from monzo.store import TransactionStore
+from monzo.webhooks import WebhookReceiver
+
+
+class Runtime:
+    """
+    Parameters:
+    settings (Settings): Validated configuration.
+    accounts_path (str): Path of the accounts endpoint relative to the API URL.
+    """
+
+    def __init__(self, settings: Settings, accounts_path: str = "accounts"):
+        started = time.perf_counter()
+        self.settings = settings
+
+        # One pooled, keep-alive client shared by every tool
+        self.client = AsyncMonzoClient(
+            settings.api_url,
+            settings.access_token,
+            pool_size=settings.http_pool_size,
+            connect_timeout=settings.http_connect_timeout,
+            read_timeout=settings.http_read_timeout,
+            http2=settings.http2,
+            rate_limiter=TokenBucket(rate=settings.rate_limit_per_second, burst=settings.rate_limit_burst),
+            retry_policy=RetryPolicy(
+                max_attempts=settings.retry_max_attempts,
+                budget=RetryBudget(ratio=settings.retry_budget_ratio),
+            ),
+            coalesce=settings.coalesce_requests,
+        )
+
+        # Short-lived cache of balance and pots responses, invalidated by pot transfers
+        self.response_cache = ResponseCache(
+            ttls={"balance": settings.cache_ttl_balance, "pots": settings.cache_ttl_pots},
+            max_entries=settings.cache_max_entries,
+        )
+
+        # Local copy of transaction history, synced incrementally by list_transactions
+        self.transaction_store = TransactionStore(os.path.join(settings.state_dir, "transactions.sqlite3"))
+
+        # Concurrent syncs of the same account and range share one run
+        self.sync_flights = SingleFlight()
+
+        # Account ids by account type, from the environment or discovered from /accounts
+        self.accounts = AccountRegistry(
+            self.client,
+            os.path.join(settings.state_dir, "accounts.json"),
+            ttl=settings.accounts_ttl,
+            configured=settings.account_ids,
+            accounts_path=accounts_path,
+        )
+
+        # Pushed transaction.created events, when webhooks are enabled
+        self.webhooks = WebhookReceiver(self.transaction_store, self.response_cache, secret=settings.webhook_secret)
+
+        self.startup = {"init_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    @property
+    def sync_interval(self):
+        """
+        How long a sync of the store is considered fresh. Longer with webhooks, which push new transactions as they happen.
+        """
+        if self.settings.webhooks:
+            return max(self.settings.sync_interval, self.settings.webhook_sync_interval)
+        return self.settings.sync_interval
+
+    async def warm_up(self) -> None:
+        """
+        Opens the connection to the API and discovers the accounts, so the first tool call does not pay for either.
+        """
+        started = time.perf_counter()
+
+        discovered = await self.accounts.refresh(force=True)
+
+        self.startup["warm_up_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.startup["accounts_discovered"] = len(discovered)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        self.transaction_store.close()
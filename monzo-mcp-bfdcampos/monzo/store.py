@@ -0,0 +1,623 @@
+"""
+Local SQLite store of Monzo transactions.
+
+Transactions are kept on disk keyed by id and account, together with the range
+of history that has already been synced for each account. list_transactions
+only asks the API for what is missing or may have changed since the last sync
+and answers date-range queries from here.
+
+Expanded merchants are stored once in their own table and transactions only
+keep the merchant id. When transactions are read back they all point to the
+same in-memory merchant object instead of one copy each.
+
+Stored history can be searched without calling the API: a full-text index over
+description, merchant name, notes and counterparty name is kept up to date by
+every write, and amount, category and pot id are indexed columns. Transactions
+can also be looked up directly by their external_id (e.g. the dedupe_id a pot
+transfer was made with) or dedupe_id.
+
+The net amount of each account's transactions per day and pot is materialised
+in daily_flows as transactions are written, so balance histories read one row
+per day instead of every transaction.
+"""
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    created TEXT NOT NULL,
+    updated TEXT,
+    amount INTEGER,
+    category TEXT,
+    pot_id TEXT,
+    external_id TEXT,
+    dedupe_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_account_created ON transactions (account_id, created);
+
+CREATE TABLE IF NOT EXISTS merchants (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    high_water TEXT,
+    last_synced TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release, with the JSON path they are filled from in older stores
+SEARCH_FIELDS = {
+    "amount": ("INTEGER", "$.amount"),
+    "category": ("TEXT", "$.category"),
+    "pot_id": ("TEXT", "$.metadata.pot_id"),
+    "external_id": ("TEXT", "$.metadata.external_id"),
+    "dedupe_id": ("TEXT", "$.dedupe_id"),
+}
+
+# Columns transactions can be looked up by, each with an index
+LOOKUP_COLUMNS = ("id", "external_id", "dedupe_id")
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS transactions_created ON transactions (created);
+CREATE INDEX IF NOT EXISTS transactions_amount ON transactions (amount);
+CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category);
+CREATE INDEX IF NOT EXISTS transactions_pot ON transactions (pot_id);
+CREATE INDEX IF NOT EXISTS transactions_external_id ON transactions (external_id);
+CREATE INDEX IF NOT EXISTS transactions_dedupe_id ON transactions (dedupe_id);
+"""
+
+# Text of a transaction row `row` that is searchable, in the column order of transactions_search
+SEARCH_COLUMNS = """
+    json_extract({row}.data, '$.description'),
+    COALESCE(
+        json_extract({row}.data, '$.merchant.name'),
+        (SELECT json_extract(merchants.data, '$.name') FROM merchants WHERE merchants.id = json_extract({row}.data, '$.merchant'))
+    ),
+    json_extract({row}.data, '$.notes'),
+    json_extract({row}.data, '$.counterparty.name')
+"""
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_search USING fts5 (
+    description, merchant, notes, counterparty,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Net amount and number of the transactions of each account per day, and per pot for pot transfers
+# (pot_id is '' for the others). Declined transactions never moved any money and are left out.
+FLOWS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_flows (
+    account_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    pot_id TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    transactions INTEGER NOT NULL,
+    PRIMARY KEY (account_id, day, pot_id)
+);
+"""
+
+# Adds the transactions matching {where}, with {sign} -1 to take them away again
+ADD_FLOWS = """
+INSERT INTO daily_flows (account_id, day, pot_id, amount, transactions)
+SELECT account_id, substr(created, 1, 10), COALESCE(pot_id, ''), {sign} * SUM(COALESCE(amount, 0)), {sign} * COUNT(*)
+FROM transactions
+WHERE {where} AND json_extract(data, '$.decline_reason') IS NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (account_id, day, pot_id) DO UPDATE SET
+    amount = amount + excluded.amount,
+    transactions = transactions + excluded.transactions
+"""
+
+# Searchable text fields and the expression each one is matched against when FTS5 is not available
+TEXT_FIELDS = {
+    "description": "json_extract(transactions.data, '$.description')",
+    "merchant": "COALESCE(json_extract(transactions.data, '$.merchant.name'), "
+                "(SELECT json_extract(merchants.data, '$.name') FROM merchants WHERE merchants.id = json_extract(transactions.data, '$.merchant')))",
+    "notes": "json_extract(transactions.data, '$.notes')",
+    "counterparty": "json_extract(transactions.data, '$.counterparty.name')",
+}
+
+
+def fts_query(text: str, column: str = None) -> str:
+    """
+    FTS5 query matching every word of `text` as a prefix, optionally only in one column.
+    Words are quoted so user input can't be read as FTS5 syntax.
+    """
+    words = [word.replace('"', '""') for word in re.findall(r"\w+", text)]
+    query = " AND ".join(f'"{word}"*' for word in words)
+    if column and query:
+        query = f"{column} : ({query})"
+    return query
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """
+    Parses an ISO 8601 date or timestamp into a naive UTC datetime.
+    """
+    if value.endswith("Z"):
+        value = f"{value[:-1]}+00:00"
+
+    # Python 3.10 only accepts 3 or 6 fractional digits
+    value = re.sub(r"\.(\d+)", lambda match: f".{match.group(1)[:6]:0<6}", value)
+
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    return parsed
+
+
+def normalise_timestamp(value: str) -> str:
+    """
+    Converts an ISO 8601 date or timestamp to the UTC millisecond format Monzo uses
+    for `created`, e.g. "2025-05-20T10:11:12.000Z", so stored values compare correctly as strings.
+    """
+    parsed = parse_timestamp(value)
+
+    return f"{parsed.strftime('%Y-%m-%dT%H:%M:%S')}.{parsed.microsecond // 1000:03d}Z"
+
+
+class TransactionStore:
+    """
+    On-disk transaction store.
+
+    Parameters:
+    path (str): Location of the SQLite database file. Use ":memory:" for a throwaway store.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._add_search_fields()
+        self._db.executescript(INDEXES)
+        self._create_daily_flows()
+        self._lock = threading.Lock()
+        self._merchants = {}
+        self.full_text = self._create_search_index()
+
+    def _add_search_fields(self) -> None:
+        """
+        Adds the amount, category and pot_id columns to stores created before they existed.
+        """
+        existing = {row["name"] for row in self._db.execute("PRAGMA table_info(transactions)")}
+
+        with self._db:
+            for name, (column_type, path) in SEARCH_FIELDS.items():
+                if name not in existing:
+                    self._db.execute(f"ALTER TABLE transactions ADD COLUMN {name} {column_type}")
+                    self._db.execute(f"UPDATE transactions SET {name} = json_extract(data, ?)", (path,))
+
+    def _create_daily_flows(self) -> None:
+        """
+        Creates the daily_flows table, filling it from stores created before it existed.
+        """
+        exists = self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_flows'").fetchone()
+
+        with self._db:
+            self._db.executescript(FLOWS_SCHEMA)
+            if not exists:
+                self._db.execute(ADD_FLOWS.format(sign=1, where="1"))
+
+    def _count_flows(self, ids: list, sign: int) -> None:
+        """
+        Adds the given transactions to daily_flows, or takes them away with `sign` -1. Must be called within a transaction.
+        """
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            self._db.execute(ADD_FLOWS.format(sign=sign, where=f"id IN ({placeholders})"), chunk)
+
+    def _create_search_index(self) -> bool:
+        """
+        Creates the full-text index, filling it from stores created before it existed.
+        Returns False if this SQLite build has no FTS5, in which case search falls back to LIKE.
+        """
+        try:
+            with self._db:
+                self._db.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+
+        with self._db:
+            if self._db.execute("SELECT NOT EXISTS (SELECT 1 FROM transactions_search)").fetchone()[0]:
+                self._db.execute(
+                    f"""
+                    INSERT INTO transactions_search (rowid, description, merchant, notes, counterparty)
+                    SELECT transactions.rowid, {SEARCH_COLUMNS.format(row="transactions")} FROM transactions
+                    """
+                )
+        return True
+
+    def _index(self, ids: list) -> None:
+        """
+        Refreshes the full-text index entries of the given transactions. Must be called within a transaction.
+        Done with one statement per chunk rather than triggers, which are several times slower on bulk upserts.
+        """
+        if not self.full_text:
+            return
+
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            self._db.execute(
+                f"DELETE FROM transactions_search WHERE rowid IN (SELECT rowid FROM transactions WHERE id IN ({placeholders}))",
+                chunk,
+            )
+            self._db.execute(
+                f"""
+                INSERT INTO transactions_search (rowid, description, merchant, notes, counterparty)
+                SELECT transactions.rowid, {SEARCH_COLUMNS.format(row="transactions")}
+                FROM transactions WHERE id IN ({placeholders})
+                """,
+                chunk,
+            )
+
+    def upsert(self, transactions: list) -> int:
+        """
+        Insert new transactions and replace stored ones whose `updated` timestamp moved on.
+        Expanded merchants are moved to the merchant cache. Returns the number of transactions written.
+        """
+        merchants = {}
+        rows = []
+        for transaction in transactions:
+            merchant = transaction.get("merchant")
+            if isinstance(merchant, dict) and merchant.get("id"):
+                merchants[merchant["id"]] = merchant
+                transaction = {**transaction, "merchant": merchant["id"]}
+
+            rows.append((
+                transaction["id"],
+                transaction["account_id"],
+                transaction["created"],
+                transaction.get("updated"),
+                transaction.get("amount"),
+                transaction.get("category"),
+                (transaction.get("metadata") or {}).get("pot_id"),
+                (transaction.get("metadata") or {}).get("external_id"),
+                transaction.get("dedupe_id"),
+                json.dumps(transaction, separators=(",", ":")),
+            ))
+
+        with self._lock, self._db:
+            if merchants:
+                self._db.executemany(
+                    "INSERT INTO merchants (id, data) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET data = excluded.data",
+                    [(merchant_id, json.dumps(merchant, separators=(",", ":"))) for merchant_id, merchant in merchants.items()],
+                )
+                self._merchants.update(merchants)
+
+            # Transactions written again may have changed amount or been declined since
+            ids = [row[0] for row in rows]
+            self._count_flows(ids, -1)
+
+            cursor = self._db.executemany(
+                """
+                INSERT INTO transactions (id, account_id, created, updated, amount, category, pot_id, external_id, dedupe_id, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    updated = excluded.updated,
+                    amount = excluded.amount,
+                    category = excluded.category,
+                    pot_id = excluded.pot_id,
+                    external_id = excluded.external_id,
+                    dedupe_id = excluded.dedupe_id,
+                    data = excluded.data
+                WHERE COALESCE(excluded.updated, '') >= COALESCE(transactions.updated, '')
+                """,
+                rows,
+            )
+            written = cursor.rowcount
+            # Reset the cached INSERT statement now rather than when the cursor is collected,
+            # which a profiler holding this frame can delay past the next upsert
+            cursor.close()
+            self._count_flows(ids, 1)
+            self._index(ids)
+            return written
+
+    def merchant(self, merchant_id: str) -> dict:
+        """
+        The cached merchant, or None if it was never seen expanded.
+        """
+        with self._lock:
+            if merchant_id not in self._merchants:
+                row = self._db.execute("SELECT data FROM merchants WHERE id = ?", (merchant_id,)).fetchone()
+                if row is None:
+                    return None
+                self._merchants[merchant_id] = json.loads(row["data"])
+
+            return self._merchants[merchant_id]
+
+    def hydrate(self, transaction: dict) -> dict:
+        """
+        Replaces the merchant id of a transaction by the cached merchant, when there is one.
+        The merchant object is shared with every other transaction at that merchant, do not modify it.
+        """
+        merchant = transaction.get("merchant")
+        if isinstance(merchant, str) and merchant:
+            cached = self.merchant(merchant)
+            if cached is not None:
+                transaction["merchant"] = cached
+        return transaction
+
+    def has_cached_merchant(self, transaction_id: str) -> bool:
+        """
+        True if the transaction is stored and its merchant is cached, so it can be fetched without expanding it.
+        """
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT 1 FROM transactions
+                JOIN merchants ON merchants.id = json_extract(transactions.data, '$.merchant')
+                WHERE transactions.id = ?
+                """,
+                (transaction_id,),
+            ).fetchone()
+
+        return row is not None
+
+    def apply_annotation(self, transaction: dict) -> None:
+        """
+        Copies the notes and metadata of an annotated transaction onto the stored copy, keeping
+        the rest (e.g. the expanded merchant, which the annotate response does not include).
+        """
+        with self._lock, self._db:
+            row = self._db.execute("SELECT data FROM transactions WHERE id = ?", (transaction["id"],)).fetchone()
+            if row is None:
+                return
+
+            stored = json.loads(row["data"])
+            for key in ("notes", "metadata", "updated"):
+                if key in transaction:
+                    stored[key] = transaction[key]
+
+            self._db.execute(
+                "UPDATE transactions SET updated = ?, data = ? WHERE id = ?",
+                (stored.get("updated"), json.dumps(stored, separators=(",", ":")), transaction["id"]),
+            )
+            self._index([transaction["id"]])
+
+    def lookup(self, column: str, values: list, account_ids: list = None) -> dict:
+        """
+        {value: transaction} of the stored transactions whose `column` ("id", "external_id" or "dedupe_id")
+        is one of `values`, optionally only in the given accounts. Values not stored are left out.
+        """
+        if column not in LOOKUP_COLUMNS:
+            raise Exception(f"Error: cannot look transactions up by {column}")
+
+        values = list(dict.fromkeys(value for value in values if value))
+        account_filter = ""
+        if account_ids:
+            account_filter = f" AND account_id IN ({', '.join('?' for _ in account_ids)})"
+
+        found = {}
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT {column} AS value, data FROM transactions WHERE {column} IN ({placeholders}){account_filter}",
+                    chunk + list(account_ids or []),
+                ).fetchall()
+            for row in rows:
+                found[row["value"]] = self.hydrate(json.loads(row["data"]))
+
+        return found
+
+    def iter_query(self, account_id: str, since: str = None, before: str = None, limit: int = None, batch_size: int = 500):
+        """
+        Yields stored transactions of an account created in [since, before), oldest first.
+        Rows are read `batch_size` at a time, so the whole result is never held in memory.
+        """
+        remaining = limit
+        after = None
+
+        while remaining is None or remaining > 0:
+            sql = "SELECT created, id, data FROM transactions WHERE account_id = ?"
+            args = [account_id]
+
+            if since:
+                sql += " AND created >= ?"
+                args.append(since)
+            if before:
+                sql += " AND created < ?"
+                args.append(before)
+            if after:
+                sql += " AND (created, id) > (?, ?)"
+                args.extend(after)
+
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            sql += " ORDER BY created, id LIMIT ?"
+            args.append(size)
+
+            with self._lock:
+                rows = self._db.execute(sql, args).fetchall()
+
+            for row in rows:
+                yield self.hydrate(json.loads(row["data"]))
+
+            if len(rows) < size:
+                return
+
+            after = (rows[-1]["created"], rows[-1]["id"])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def search(
+            self,
+            account_ids: list = None,
+            text: str = None,
+            merchant: str = None,
+            notes: str = None,
+            category: str = None,
+            min_amount: int = None,
+            max_amount: int = None,
+            pot_id: str = None,
+            since: str = None,
+            before: str = None,
+            limit: int = 50,
+    ) -> list:
+        """
+        Stored transactions matching every given filter, newest first.
+
+        Parameters:
+        account_ids (list): Only search these accounts. Default is all of them.
+        text (str): Words that must all appear (as prefixes) in the description, merchant name, notes or counterparty.
+        merchant (str): Words that must all appear in the merchant name.
+        notes (str): Words that must all appear in the notes.
+        category (str): Exact category, e.g. "groceries".
+        min_amount (int), max_amount (int): Inclusive bounds of the amount, in minor units.
+        pot_id (str): Only transfers to or from this pot.
+        since (str), before (str): Range of `created`, in the store's timestamp format.
+        limit (int): Maximum number of transactions returned.
+        """
+        conditions = []
+        args = []
+
+        if account_ids:
+            conditions.append(f"account_id IN ({', '.join('?' for _ in account_ids)})")
+            args.extend(account_ids)
+        if since:
+            conditions.append("created >= ?")
+            args.append(since)
+        if before:
+            conditions.append("created < ?")
+            args.append(before)
+        if category:
+            conditions.append("category = ?")
+            args.append(category)
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            args.append(min_amount)
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            args.append(max_amount)
+        if pot_id:
+            conditions.append("pot_id = ?")
+            args.append(pot_id)
+
+        text_filters = [(None, text), ("merchant", merchant), ("notes", notes)]
+        if self.full_text:
+            match = " AND ".join(query for query in (fts_query(value, column) for column, value in text_filters if value) if query)
+            if match:
+                conditions.append("rowid IN (SELECT rowid FROM transactions_search WHERE transactions_search MATCH ?)")
+                args.append(match)
+        else:
+            for column, value in text_filters:
+                if not value:
+                    continue
+                columns = [TEXT_FIELDS[column]] if column else list(TEXT_FIELDS.values())
+                conditions.append(
+                    "(" + " OR ".join(f"COALESCE({expression}, '') LIKE ?" for expression in columns) + ")"
+                )
+                args.extend([f"%{value}%"] * len(columns))
+
+        sql = "SELECT data FROM transactions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created DESC, id DESC LIMIT ?"
+        args.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+
+        return [self.hydrate(json.loads(row["data"])) for row in rows]
+
+    def counterparty_rows(self, account_id: str, since: str = None, before: str = None) -> list:
+        """
+        (created, amount, category, name) of the stored transactions of an account created in [since, before),
+        oldest first, where name is the merchant name, else the counterparty name, else the description.
+        Read with SQLite's JSON functions instead of decoding every transaction, for analyses over long histories.
+        """
+        sql = """
+            SELECT transactions.created, transactions.amount, transactions.category, COALESCE(
+                json_extract(merchants.data, '$.name'),
+                json_extract(transactions.data, '$.merchant.name'),
+                json_extract(transactions.data, '$.counterparty.name'),
+                json_extract(transactions.data, '$.description')
+            )
+            FROM transactions
+            LEFT JOIN merchants ON merchants.id = json_extract(transactions.data, '$.merchant')
+            WHERE transactions.account_id = ?
+        """
+        args = [account_id]
+        if since:
+            sql += " AND transactions.created >= ?"
+            args.append(since)
+        if before:
+            sql += " AND transactions.created < ?"
+            args.append(before)
+        sql += " ORDER BY transactions.created"
+
+        with self._lock:
+            return [tuple(row) for row in self._db.execute(sql, args)]
+
+    def daily_flows(self, account_id: str, since_day: str) -> list:
+        """
+        (day, pot_id, amount, transactions) of the account per day from `since_day` (YYYY-MM-DD) on, oldest first.
+        pot_id is '' for all but pot transfers. Summed up as transactions are written, see upsert.
+        """
+        with self._lock:
+            return [
+                tuple(row) for row in self._db.execute(
+                    "SELECT day, pot_id, amount, transactions FROM daily_flows WHERE account_id = ? AND day >= ? ORDER BY day",
+                    (account_id, since_day),
+                )
+            ]
+
+    def get_sync_state(self, account_id: str) -> dict:
+        """
+        Returns {"covered_from", "high_water", "last_synced"} for the account, or None if it was never synced.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT covered_from, high_water, last_synced FROM sync_state WHERE account_id = ?",
+                (account_id,),
+            ).fetchone()
+
+        return dict(row) if row else None
+
+    def set_sync_state(self, account_id: str, covered_from: str, high_water: str, last_synced: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO sync_state (account_id, covered_from, high_water, last_synced)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (account_id) DO UPDATE SET
+                    covered_from = excluded.covered_from,
+                    high_water = excluded.high_water,
+                    last_synced = excluded.last_synced
+                """,
+                (account_id, covered_from, high_water, last_synced),
+            )
+
+    def latest_created(self, account_id: str) -> str:
+        """
+        The `created` timestamp of the newest stored transaction of the account.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(created) AS created FROM transactions WHERE account_id = ?",
+                (account_id,),
+            ).fetchone()
+
+        return row["created"]
+
+    def close(self) -> None:
+        self._db.close()
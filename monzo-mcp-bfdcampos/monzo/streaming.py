@@ -0,0 +1,113 @@
+"""
+Incremental parsing of JSON array responses.
+
+`response.json()` holds the raw body, the decoded text and the whole object tree
+in memory at once. iter_json_array instead decodes the elements of one array in
+the response (e.g. "transactions") as the bytes arrive and yields them one by
+one, so only a single element is ever fully materialised.
+
+Elements are decoded with the standard library's `json.JSONDecoder.raw_decode`,
+whose scanner is written in C. Faster decoders such as orjson only decode whole
+documents, not one value at an offset of a partly received buffer, so they would
+need a second pass in Python to find where each element ends.
+
+Waiting for chunks counts as the upstream phase of the current tool call and
+decoding them as its parse phase, but not the time the caller spends on each element.
+"""
+import codecs
+import json
+import re
+import time
+
+from monzo.client import raise_for_error
+from monzo.metrics import add_time
+
+_WHITESPACE_AND_COMMAS = re.compile(r"[\s,]*")
+
+# Drop already parsed text from the buffer once this many characters were consumed
+_COMPACT_AFTER = 1 << 16
+
+
+async def iter_json_array(chunks, key: str):
+    """
+    Yields the elements of the array stored under `key` in a JSON object streamed as byte `chunks`.
+    The elements must be objects (or arrays), whose end can be told apart from a chunk boundary.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    start_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+
+    buffer = ""
+    position = 0
+    in_array = False
+
+    async for chunk in chunks:
+        start = time.perf_counter()
+        buffer += text_decoder.decode(chunk)
+
+        if not in_array:
+            match = start_pattern.search(buffer)
+            if match is None:
+                # Keep enough of the tail for a key split across two chunks
+                buffer = buffer[-(len(key) + 16):]
+                add_time("parse", time.perf_counter() - start)
+                continue
+            in_array = True
+            position = match.end()
+
+        while True:
+            position = _WHITESPACE_AND_COMMAS.match(buffer, position).end()
+
+            if position < len(buffer) and buffer[position] == "]":
+                add_time("parse", time.perf_counter() - start)
+                return
+
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is not complete yet, wait for more bytes
+                break
+
+            add_time("parse", time.perf_counter() - start)
+            yield element
+            start = time.perf_counter()
+
+        if position > _COMPACT_AFTER:
+            buffer = buffer[position:]
+            position = 0
+
+        add_time("parse", time.perf_counter() - start)
+
+    if not in_array:
+        return
+
+    raise ValueError(f"Truncated JSON response: the {key} array was not closed")
+
+
+async def stream_array(client, path: str, key: str, params: dict = None):
+    """
+    GETs `path` and yields the elements of the `key` array of the response one at a time.
+    """
+    async with client.stream("GET", path, params=params) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise_for_error(response)
+
+        async for element in iter_json_array(_timed_chunks(response.aiter_bytes()), key):
+            yield element
+
+
+async def _timed_chunks(chunks):
+    """
+    Passes `chunks` through, adding the time spent waiting for each one to the upstream phase.
+    """
+    iterator = chunks.__aiter__()
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            add_time("upstream", time.perf_counter() - start)
+            return
+        add_time("upstream", time.perf_counter() - start)
+        yield chunk
@@ -0,0 +1,142 @@
+"""
+Incremental sync of Monzo transactions into the local TransactionStore.
+
+The first sync of an account downloads its history from the requested start
+date. After that only two kinds of request are made:
+
+- a backfill when a query reaches further back than anything synced so far, and
+- a refresh from a little before the newest stored transaction, so new
+  transactions are picked up along with recent ones that settled or were
+  annotated since (Monzo can only filter on `created`, not `updated`).
+"""
+import datetime
+
+from monzo.client import decode_json, raise_for_error
+from monzo.concurrency import gather_limited
+from monzo.pagination import iter_transaction_pages, iter_transaction_pages_parallel
+from monzo.store import TransactionStore, normalise_timestamp, parse_timestamp
+
+# Ranges longer than this are split into sub-windows fetched in parallel
+PARALLEL_THRESHOLD = datetime.timedelta(days=30)
+
+# Concurrent requests made to expand merchants missing from the cache
+MERCHANT_FETCH_CONCURRENCY = 4
+
+
+async def fill_merchants(client, store: TransactionStore, page: list) -> list:
+    """
+    Expands the merchants of a page fetched without expansion: from the merchant cache when
+    possible, otherwise by fetching the transaction again with its merchant expanded.
+    """
+    missing = [
+        index for index, transaction in enumerate(page)
+        if isinstance(transaction.get("merchant"), str)
+        and transaction["merchant"]
+        and store.merchant(transaction["merchant"]) is None
+    ]
+
+    async def expand(transaction_id: str) -> dict:
+        response = await client.get(f"transactions/{transaction_id}", params={"expand[]": "merchant"})
+        raise_for_error(response)
+        return decode_json(response)["transaction"]
+
+    expanded = await gather_limited(
+        [lambda transaction_id=page[index]["id"]: expand(transaction_id) for index in missing],
+        MERCHANT_FETCH_CONCURRENCY,
+    )
+
+    for index, transaction in zip(missing, expanded):
+        if isinstance(transaction, Exception):
+            raise transaction
+        page[index] = transaction
+
+    return page
+
+
+async def download_range(
+        client,
+        store: TransactionStore,
+        account_id: str,
+        since: str,
+        before: str = None,
+        windows: int = 1,
+        expand: str = "merchant",
+) -> int:
+    """
+    Page through every transaction of the account created in [since, before) and store it.
+    With `expand` None merchants are not downloaded again when they are already cached.
+    Returns the number of transactions downloaded.
+    """
+    end = parse_timestamp(before) if before else datetime.datetime.utcnow()
+    start = parse_timestamp(since)
+
+    if windows > 1 and end - start > PARALLEL_THRESHOLD:
+        pages = iter_transaction_pages_parallel(client, account_id, since, before, windows=windows, expand=expand)
+    else:
+        pages = iter_transaction_pages(client, account_id, since, before, expand=expand)
+
+    downloaded = 0
+    async for page in pages:
+        if expand is None:
+            page = await fill_merchants(client, store, page)
+        store.upsert(page)
+        downloaded += len(page)
+
+    return downloaded
+
+
+async def sync_transactions(
+        client,
+        store: TransactionStore,
+        account_id: str,
+        since: str,
+        force: bool = False,
+        interval: datetime.timedelta = datetime.timedelta(seconds=60),
+        overlap: datetime.timedelta = datetime.timedelta(days=3),
+        windows: int = 1,
+) -> None:
+    """
+    Make sure the store holds every transaction of the account created since `since`.
+
+    Parameters:
+    client (AsyncMonzoClient): Client used to reach the API.
+    store (TransactionStore): Store to sync into.
+    account_id (str): The account to sync.
+    since (str): Oldest point in time the store must cover, in ISO 8601 format.
+    force (bool): Refresh recent transactions even if the last sync is more recent than `interval`.
+    interval (timedelta): How long a sync is considered fresh.
+    overlap (timedelta): How far before the newest stored transaction a refresh starts.
+    windows (int): Number of sub-windows long ranges are split into and downloaded in parallel.
+    """
+    since = normalise_timestamp(since)
+    now = datetime.datetime.utcnow()
+    now_timestamp = normalise_timestamp(now.isoformat())
+
+    state = store.get_sync_state(account_id)
+
+    if state is None:
+        await download_range(client, store, account_id, since, windows=windows)
+        store.set_sync_state(account_id, since, store.latest_created(account_id), now_timestamp)
+        return
+
+    covered_from = state["covered_from"]
+    last_synced = state["last_synced"]
+
+    if since < covered_from:
+        # Backfill history older than anything synced so far
+        await download_range(client, store, account_id, since, before=covered_from, windows=windows)
+        covered_from = since
+
+    is_stale = last_synced < normalise_timestamp((now - interval).isoformat())
+
+    if force or is_stale:
+        resume_from = covered_from
+        if state["high_water"]:
+            high_water = parse_timestamp(state["high_water"])
+            resume_from = max(covered_from, normalise_timestamp((high_water - overlap).isoformat()))
+
+        # Mostly transactions at merchants seen before, so take their merchants from the cache
+        await download_range(client, store, account_id, resume_from, windows=windows, expand=None)
+        last_synced = now_timestamp
+
+    store.set_sync_state(account_id, covered_from, store.latest_created(account_id), last_synced)
@@ -0,0 +1,117 @@
+"""
+Multi-tenant mode: one server process serving many Monzo users.
+
+Tenants are listed in a JSON file named by MONZO_TENANTS_FILE:
+
+    {
+        "alice": {
+            "api_key": "a-long-random-string",
+            "settings": {
+                "MONZO_ACCESS_TOKEN": "...",
+                "MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID": "acc_...",
+                "MONZO_RATE_LIMIT_PER_SECOND": 5
+            }
+        },
+        "bob": {...}
+    }
+
+Each MCP client sends its tenant's `api_key` as `Authorization: Bearer ...`
+over SSE or streamable HTTP. Each tenant gets its own Runtime, built on first
+use from the server's settings with the tenant's `settings` on top. A tenant
+therefore has its own connection pool, rate limiter, response cache, account
+registry and transaction store (under state_dir/tenants/<tenant id>). Nothing
+is shared between tenants but the process.
+"""
+import hashlib
+import json
+import re
+import threading
+
+from monzo.config import Settings
+from monzo.runtime import Runtime
+
+
+def _digest(api_key: str) -> str:
+    # Keys are looked up by digest, so comparing them does not depend on how much of a key matches
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class TenantRegistry:
+    """
+    Parameters:
+    settings (Settings): The server's settings, shared by every tenant unless a tenant overrides them.
+    accounts_path (str): Path of the accounts endpoint relative to the API URL.
+    """
+
+    def __init__(self, settings: Settings, accounts_path: str = "accounts"):
+        self.settings = settings
+        self.accounts_path = accounts_path
+        self._tenants = self._load(settings.tenants_file)
+        self._keys = {_digest(tenant["api_key"]): tenant_id for tenant_id, tenant in self._tenants.items()}
+        self._runtimes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(path: str) -> dict:
+        try:
+            with open(path) as file:
+                tenants = json.load(file)
+        except (OSError, ValueError) as error:
+            raise Exception(f"Error: cannot read MONZO_TENANTS_FILE {path}: {error}")
+
+        if not isinstance(tenants, dict) or not tenants:
+            raise Exception("Error: MONZO_TENANTS_FILE must map tenant ids to their settings")
+
+        keys = set()
+        for tenant_id, tenant in tenants.items():
+            if not re.fullmatch(r"[A-Za-z0-9_.-]+", tenant_id):
+                raise Exception(f"Error: tenant id {tenant_id!r} may only contain letters, digits, '_', '-' and '.'")
+            if not isinstance(tenant, dict) or not tenant.get("api_key"):
+                raise Exception(f"Error: tenant {tenant_id} has no api_key")
+            if tenant["api_key"] in keys:
+                raise Exception(f"Error: tenant {tenant_id} shares its api_key with another tenant")
+            keys.add(tenant["api_key"])
+
+        return tenants
+
+    def tenant_for_key(self, api_key: str) -> str:
+        """
+        Id of the tenant the API key belongs to.
+        """
+        tenant_id = self._keys.get(_digest(api_key or ""))
+        if tenant_id is None:
+            raise Exception("Error: unknown or missing tenant API key, send it as 'Authorization: Bearer <api_key>'")
+        return tenant_id
+
+    def runtime(self, tenant_id: str) -> Runtime:
+        """
+        The tenant's Runtime, created on first use.
+        """
+        runtime = self._runtimes.get(tenant_id)
+        if runtime is not None:
+            return runtime
+
+        if tenant_id not in self._tenants:
+            raise Exception(f"Error: unknown tenant {tenant_id}")
+
+        with self._lock:
+            if tenant_id not in self._runtimes:
+                settings = self.settings.for_tenant(tenant_id, self._tenants[tenant_id].get("settings") or {})
+                self._runtimes[tenant_id] = Runtime(settings, accounts_path=self.accounts_path)
+            return self._runtimes[tenant_id]
+
+    def ids(self) -> list:
+        return list(self._tenants)
+
+    def active(self) -> list:
+        """
+        Runtimes of the tenants that made a call since the server started.
+        """
+        return list(self._runtimes.values())
+
+    def stats(self) -> dict:
+        return {"configured": len(self._tenants), "active": len(self._runtimes)}
+
+    async def aclose(self) -> None:
+        for runtime in self.active():
+            await runtime.aclose()
@@ -0,0 +1,94 @@
+"""
+Replays recorded Monzo webhook payloads against a running webhook receiver.
+
+Payloads are read from JSON files holding one payload or a list of them, or
+from JSON Lines files with one payload per line. Without files, synthetic
+`transaction.created` payloads are generated from monzo/fixtures.py.
+
+Run it with:
+    python -m monzo.webhook_replay --url http://127.0.0.1:8790/webhooks/monzo --secret s3cret recorded.jsonl
+    python -m monzo.webhook_replay --url http://127.0.0.1:8790/webhooks/monzo --generate 100 --account acc_personal
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+import httpx
+
+from monzo.fixtures import TransactionHistory
+
+
+def load_payloads(paths: list) -> list:
+    """
+    Payloads recorded in JSON or JSON Lines files, in file order.
+    """
+    payloads = []
+    for path in paths:
+        with open(path) as file:
+            content = file.read()
+
+        try:
+            loaded = json.loads(content)
+        except ValueError:
+            loaded = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+        payloads.extend(loaded if isinstance(loaded, list) else [loaded])
+
+    return payloads
+
+
+def generate_payloads(count: int, account_id: str, seed: int = 7) -> list:
+    """
+    `count` transaction.created payloads for transactions made over the last `count` minutes.
+    """
+    history = TransactionHistory(
+        count, account_id, end=datetime.datetime.utcnow(), span=datetime.timedelta(minutes=count), seed=seed,
+    )
+    return [{"type": "transaction.created", "data": history[index]} for index in range(count)]
+
+
+async def replay(url: str, payloads: list, secret: str = None, concurrency: int = 1, delay: float = 0.0) -> dict:
+    """
+    POSTs every payload to `url` and returns the number of responses per status code and the elapsed time.
+    """
+    params = {"secret": secret} if secret else None
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async with httpx.AsyncClient(timeout=10) as client:
+        async def send(payload: dict) -> None:
+            async with semaphore:
+                response = await client.post(url, params=params, json=payload)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if delay:
+                    await asyncio.sleep(delay)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(payload) for payload in payloads))
+
+    return {"sent": len(payloads), "statuses": statuses, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Monzo webhook payloads against a webhook receiver.")
+    parser.add_argument("files", nargs="*", help="JSON or JSON Lines files of recorded payloads")
+    parser.add_argument("--url", default="http://127.0.0.1:8790/webhooks/monzo")
+    parser.add_argument("--secret", help="value of MONZO_WEBHOOK_SECRET")
+    parser.add_argument("--generate", type=int, default=0, help="send this many synthetic payloads instead of files")
+    parser.add_argument("--account", default="acc_personal", help="account id of the synthetic payloads")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait after each payload")
+    args = parser.parse_args()
+
+    if args.files:
+        payloads = load_payloads(args.files)
+    else:
+        payloads = generate_payloads(args.generate or 10, args.account)
+
+    print(json.dumps(asyncio.run(replay(args.url, payloads, args.secret, args.concurrency, args.delay))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Receiver for Monzo `transaction.created` webhooks.
+
+Monzo POSTs every new transaction to a registered URL. Each one is written to
+the local transaction store and the cached balance and pots of its account are
+dropped, so reads stay local and up to date without polling list_transactions.
+
+The receiver can be served on its own port next to a stdio server (see
+`create_server`), or mounted on the MCP server's own HTTP app when it runs
+over SSE or streamable HTTP. Requests must carry the configured secret as
+`?secret=...`, since Monzo does not sign webhook payloads.
+
+Recorded payloads can be replayed against a running receiver with
+`python -m monzo.webhook_replay`.
+"""
+import contextlib
+import hmac
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from monzo.cache import ResponseCache
+from monzo.store import TransactionStore, normalise_timestamp
+
+WEBHOOK_PATH = "/webhooks/monzo"
+
+
+class WebhookReceiver:
+    """
+    Parameters:
+    store (TransactionStore): Store the pushed transactions are written to.
+    cache (ResponseCache): Cache whose entries for the transaction's account are invalidated.
+    secret (str): Value the `secret` query parameter must match. Without one every request is refused.
+    """
+
+    def __init__(self, store: TransactionStore, cache: ResponseCache, secret: str = None):
+        self.store = store
+        self.cache = cache
+        self.secret = secret
+        self._counters = {"received": 0, "ingested": 0, "ignored": 0, "rejected": 0}
+
+    def authorised(self, secret: str) -> bool:
+        if not self.secret:
+            return False
+        return hmac.compare_digest((secret or "").encode(), self.secret.encode())
+
+    def ingest(self, payload: dict) -> str:
+        """
+        Applies one webhook payload. Returns "ingested" or "ignored" for event types other than transaction.created.
+        """
+        self._counters["received"] += 1
+
+        if not isinstance(payload, dict):
+            self._counters["rejected"] += 1
+            raise Exception("Error: webhook payload must be a JSON object")
+
+        if payload.get("type") != "transaction.created":
+            self._counters["ignored"] += 1
+            return "ignored"
+
+        transaction = payload.get("data") or {}
+        if not transaction.get("id") or not transaction.get("account_id") or not transaction.get("created"):
+            self._counters["rejected"] += 1
+            raise Exception("Error: transaction.created payload without id, account_id or created")
+
+        # Webhooks may send whole-second timestamps, the store compares them in Monzo's millisecond format
+        transaction = {**transaction, "created": normalise_timestamp(transaction["created"])}
+
+        self.store.upsert([transaction])
+        self.cache.invalidate(transaction["account_id"])
+
+        self._counters["ingested"] += 1
+        return "ingested"
+
+    async def handle(self, request: Request) -> JSONResponse:
+        """
+        Starlette endpoint for webhook POSTs.
+        """
+        if not self.authorised(request.query_params.get("secret")):
+            self._counters["rejected"] += 1
+            return JSONResponse({"error": "invalid secret"}, status_code=403)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            self._counters["rejected"] += 1
+            return JSONResponse({"error": "body is not JSON"}, status_code=400)
+
+        try:
+            status = self.ingest(payload)
+        except Exception as error:
+            return JSONResponse({"error": str(error)}, status_code=400)
+
+        # Monzo retries webhooks until it gets a 200
+        return JSONResponse({"status": status})
+
+    def stats(self) -> dict:
+        return dict(self._counters)
+
+
+def create_app(receiver: WebhookReceiver) -> Starlette:
+    """
+    Standalone Starlette application serving the receiver at WEBHOOK_PATH.
+    """
+    return Starlette(routes=[Route(WEBHOOK_PATH, receiver.handle, methods=["POST"])])
+
+
+def create_server(receiver: WebhookReceiver, host: str, port: int):
+    """
+    uvicorn server for the receiver, to run next to a stdio MCP server. Stop it by setting `should_exit`.
+    """
+    import uvicorn
+
+    class Server(uvicorn.Server):
+        # Leave SIGINT/SIGTERM to the MCP server this one runs in
+        def capture_signals(self):
+            return contextlib.nullcontext()
+
+    return Server(uvicorn.Config(create_app(receiver), host=host, port=port, log_level="warning"))
@@ -0,0 +1,73 @@
+"""
+Fixtures running the server's tools against the fake Monzo API (monzo/fake_api.py).
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from monzo import config  # noqa: E402
+from monzo.fake_api import FakeMonzo, create_app  # noqa: E402
+
+ACCOUNT_ID = "acc_personal"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fake_api():
+    """
+    A FakeMonzo with one personal account, served on a local port for the duration of the test.
+    """
+    fake = FakeMonzo({ACCOUNT_ID: 600}, span_days=90)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(fake), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake API did not start")
+        time.sleep(0.01)
+
+    fake.url = f"http://127.0.0.1:{port}/"
+    yield fake
+
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def server(fake_api, tmp_path, monkeypatch):
+    """
+    The main module configured for the fake API, with a fresh state directory and no shared state left
+    from other tests. Tool calls must run inside `main.lifespan(main.mcp)`.
+    """
+    for name in list(os.environ):
+        if name.startswith("MONZO_"):
+            monkeypatch.delenv(name)
+
+    monkeypatch.setenv("MONZO_API_URL", fake_api.url)
+    monkeypatch.setenv("MONZO_ACCESS_TOKEN", "test-token")
+    monkeypatch.setenv("MONZO_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("MONZO_UK_RETAIL_PERSONAL_ACCOUNT_ID", ACCOUNT_ID)
+    monkeypatch.setenv("MONZO_RATE_LIMIT_PER_SECOND", "0")
+    # A .env in the working directory must not override the test's configuration
+    monkeypatch.setattr(config, "load_dotenv", lambda: None)
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(main, "_runtime", None)
+    monkeypatch.setattr(main, "_tenants", None)
+
+    yield main
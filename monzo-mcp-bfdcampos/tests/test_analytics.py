@@ -0,0 +1,55 @@
+import pytest
+
+from monzo.analytics import summarise
+
+
+def transaction(created: str, amount: int, category: str, merchant: str = None, **fields) -> dict:
+    return {
+        "created": f"{created}T12:00:00.000Z",
+        "amount": amount,
+        "category": category,
+        "merchant": {"name": merchant} if merchant else None,
+        "local_currency": "GBP",
+        **fields,
+    }
+
+
+TRANSACTIONS = [
+    *(transaction("2025-03-03", -100 * pence, "eating_out", "Pret") for pence in range(1, 11)),
+    transaction("2025-03-04", -5000, "groceries", "Tesco"),
+    transaction("2025-04-01", -3000, "groceries", "Tesco"),
+    transaction("2025-04-02", 250000, "income", description="Salary"),
+    transaction("2025-04-03", -2000, "savings", include_in_spending=False),
+]
+
+
+def test_percentiles_grow_with_the_size_of_the_spend():
+    result = summarise(TRANSACTIONS, ["category"])
+
+    assert result["columns"] == ["category", "sum", "count", "mean", "p50", "p90"]
+    assert result["rows"] == [
+        ["groceries", -8000, 2, -4000.0, -4000.0, -4800.0],
+        ["eating_out", -5500, 10, -550.0, -550.0, -910.0],
+    ]
+
+
+def test_income_keeps_positive_percentiles():
+    rows = summarise(TRANSACTIONS, ["category"], spending_only=False)["rows"]
+
+    assert ["income", 250000, 1, 250000.0, 250000.0, 250000.0] in rows
+    assert ["savings", -2000, 1, -2000.0, -2000.0, -2000.0] in rows
+
+
+def test_periods_come_first_in_chronological_order():
+    rows = summarise(TRANSACTIONS, ["month", "category"], percentiles=[50])["rows"]
+
+    assert [row[:4] for row in rows] == [
+        ["2025-03", "eating_out", -5500, 10],
+        ["2025-03", "groceries", -5000, 1],
+        ["2025-04", "groceries", -3000, 1],
+    ]
+
+
+def test_unknown_group_is_refused():
+    with pytest.raises(Exception, match="cannot group by"):
+        summarise(TRANSACTIONS, ["colour"])
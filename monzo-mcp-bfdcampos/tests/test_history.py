@@ -0,0 +1,86 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from monzo.fixtures import make_transactions
+from monzo.history import balance_series
+from monzo.store import TransactionStore
+
+START = np.datetime64("2025-03-01")
+TODAY = np.datetime64("2025-03-05")
+
+# (day, pot_id, amount, transactions): spending, a salary, then 3000 moved into pot_1
+ROWS = [
+    ("2025-03-01", "", -1000, 2),
+    ("2025-03-03", "", 200000, 1),
+    ("2025-03-04", "pot_1", -3000, 1),
+]
+
+
+def balances(series: dict) -> list:
+    return [point["balance"] for point in series["series"]]
+
+
+def test_daily_balances_are_walked_back_from_the_current_ones():
+    history = balance_series(ROWS, 50000, {"pot_1": 8000}, START, TODAY + 1, TODAY)
+    account, pot = history["account"], history["pots"]["pot_1"]
+
+    assert [point["date"] for point in account["series"]] == [
+        "2025-03-01", "2025-03-02", "2025-03-03", "2025-03-04", "2025-03-05",
+    ]
+    assert account["opening_balance"] == -146000
+    assert balances(account) == [-147000, -147000, 53000, 50000, 50000]
+    assert [point["net"] for point in account["series"]] == [-1000, 0, 200000, -3000, 0]
+    assert [point["transactions"] for point in account["series"]] == [2, 0, 1, 1, 0]
+
+    assert pot["opening_balance"] == 5000
+    assert balances(pot) == [5000, 5000, 5000, 8000, 8000]
+
+
+def test_weekly_points_close_on_the_last_day_of_each_week():
+    rows = ROWS + [("2025-03-10", "", -500, 1)]
+    today = np.datetime64("2025-03-11")
+
+    history = balance_series(rows, 10000, {}, START, today + 1, today, interval="week")
+
+    # 2025-03-01 is a Saturday
+    assert [point["date"] for point in history["account"]["series"]] == ["2025-02-24", "2025-03-03", "2025-03-10"]
+    assert balances(history["account"]) == [-186500, 10500, 10000]
+    assert [point["net"] for point in history["account"]["series"]] == [-1000, 197000, -500]
+    assert history["pots"] == {}
+
+
+def test_series_can_end_before_today():
+    history = balance_series(ROWS, 50000, {}, START, np.datetime64("2025-03-03"), TODAY)
+
+    assert balances(history["account"]) == [-147000, -147000]
+
+
+def test_unknown_interval_is_refused():
+    with pytest.raises(Exception, match="unknown interval"):
+        balance_series(ROWS, 0, {}, START, TODAY + 1, TODAY, interval="month")
+
+
+def test_store_keeps_daily_flows_up_to_date_as_transactions_change(tmp_path):
+    store = TransactionStore(str(tmp_path / "transactions.sqlite3"))
+    transactions = make_transactions(3, "acc_1", end=datetime.datetime(2025, 3, 4), span=datetime.timedelta(days=3))
+    for transaction in transactions:
+        transaction["metadata"] = {}
+    transactions[2]["metadata"] = {"pot_id": "pot_1"}
+    store.upsert(transactions)
+
+    def flows() -> dict:
+        return {(day, pot): (amount, count) for day, pot, amount, count in store.daily_flows("acc_1", "2025-03-01")}
+
+    assert flows() == {
+        ("2025-03-01", ""): (transactions[0]["amount"], 1),
+        ("2025-03-02", ""): (transactions[1]["amount"], 1),
+        ("2025-03-03", "pot_1"): (transactions[2]["amount"], 1),
+    }
+
+    # An edited transaction replaces its old amount instead of adding to it
+    edited = dict(transactions[1], amount=-1234, updated="2030-01-01T00:00:00.000Z")
+    store.upsert([edited])
+
+    assert flows()[("2025-03-02", "")] == (-1234, 1)
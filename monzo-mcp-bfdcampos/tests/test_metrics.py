@@ -0,0 +1,31 @@
+import asyncio
+
+
+def test_serialization_is_measured_on_the_content_the_server_sends(server, monkeypatch):
+    monkeypatch.setattr(server.tool_metrics, "_tools", {})
+
+    async def run():
+        async with server.lifespan(server.mcp):
+            return await server.mcp.call_tool("pots", {})
+
+    content = asyncio.run(run())
+
+    tool = server.tool_metrics.summary()["pots"]
+    assert (tool["calls"], tool["errors"]) == (1, 0)
+    assert tool["response_bytes"]["mean"] == sum(len(block.text.encode()) for block in content)
+    assert tool["serialization_ms"]["p50"] > 0
+
+
+def test_direct_calls_record_no_serialization(server, monkeypatch):
+    monkeypatch.setattr(server.tool_metrics, "_tools", {})
+
+    async def run():
+        async with server.lifespan(server.mcp):
+            return await server.get_pots_information()
+
+    asyncio.run(run())
+
+    tool = server.tool_metrics.summary()["pots"]
+    assert tool["calls"] == 1
+    assert tool["response_bytes"]["mean"] == 0
+    assert tool["serialization_ms"]["mean"] == 0.0
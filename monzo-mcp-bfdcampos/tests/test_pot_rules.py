@@ -0,0 +1,65 @@
+import asyncio
+
+from conftest import ACCOUNT_ID
+
+SAVINGS = f"pot_{ACCOUNT_ID}_savings"
+HOLIDAY = f"pot_{ACCOUNT_ID}_holiday"
+
+RULES = [
+    {"type": "sweep", "name": "sweep", "pot_id": SAVINGS, "above": 100000, "period": "day"},
+    {"type": "round_up", "name": "round-up", "pot_id": SAVINGS, "to": 100},
+]
+
+
+def apply(server, rules: list, dry_run: bool = False) -> dict:
+    """
+    One run of apply_pot_rules, in its own server session like a separate invocation.
+    """
+    async def run():
+        async with server.lifespan(server.mcp):
+            return await server.apply_pot_rules(rules, dry_run=dry_run)
+
+    return asyncio.run(run())
+
+
+def test_rules_sharing_a_pot_move_money_once_per_period(server, fake_api):
+    first = apply(server, RULES)
+
+    assert [transfer["status"] for transfer in first["transfers"]] == ["ok"]
+    assert len(first["transfers"][0]["moves"]) == 2
+    savings = fake_api.pots[ACCOUNT_ID][SAVINGS]["balance"]
+    assert fake_api.balances[ACCOUNT_ID] == first["balance_after"] == 100000 - first["rules"][1]["moves"][0]["amount"]
+
+    second = apply(server, RULES)
+
+    assert second["transfers"] == []
+    assert all(rule["moves"] == [] and rule["notes"] for rule in second["rules"])
+    assert second["balance_after"] == second["balance_before"] == fake_api.balances[ACCOUNT_ID]
+    assert fake_api.pots[ACCOUNT_ID][SAVINGS]["balance"] == savings
+
+
+def test_new_rule_only_moves_its_own_money(server, fake_api):
+    apply(server, RULES)
+    savings = fake_api.pots[ACCOUNT_ID][SAVINGS]["balance"]
+    holiday = fake_api.pots[ACCOUNT_ID][HOLIDAY]["balance"]
+
+    result = apply(server, RULES + [{"type": "target", "name": "holiday", "pot_id": HOLIDAY, "target": holiday + 5000}])
+
+    assert [(transfer["pot_id"], transfer["amount"]) for transfer in result["transfers"]] == [(HOLIDAY, 5000)]
+    assert result["pots_after"] == {HOLIDAY: holiday + 5000}
+    assert fake_api.pots[ACCOUNT_ID][SAVINGS]["balance"] == savings
+    assert fake_api.pots[ACCOUNT_ID][HOLIDAY]["balance"] == holiday + 5000
+
+
+def test_dry_run_moves_nothing_and_records_nothing(server, fake_api):
+    balance = fake_api.balances[ACCOUNT_ID]
+
+    planned = apply(server, RULES, dry_run=True)
+
+    assert [transfer["status"] for transfer in planned["transfers"]] == ["planned"]
+    assert fake_api.balances[ACCOUNT_ID] == balance
+
+    applied = apply(server, RULES)
+
+    assert [transfer["dedupe_id"] for transfer in applied["transfers"]] == [planned["transfers"][0]["dedupe_id"]]
+    assert fake_api.balances[ACCOUNT_ID] == planned["balance_after"]
@@ -0,0 +1,52 @@
+import numpy as np
+
+from monzo.recurring import detect, normalise_name
+
+TODAY = np.datetime64("2025-07-10")
+MONTHS = ["2025-01-05", "2025-02-05", "2025-03-05", "2025-04-05", "2025-05-05", "2025-06-05"]
+
+
+def netflix_with_one_offs(sign: int = 1) -> list:
+    rows = [(f"{day}T08:00:00.000Z", sign * -1099, "entertainment", "NETFLIX.COM") for day in MONTHS]
+    rows += [
+        ("2025-02-17T12:00:00.000Z", sign * -5000, "entertainment", "Netflix"),
+        ("2025-04-02T12:00:00.000Z", sign * -7000, "entertainment", "Netflix"),
+        ("2025-05-20T12:00:00.000Z", sign * -300, "entertainment", "Netflix"),
+    ]
+    return rows
+
+
+def test_subscription_is_found_among_one_off_payments_at_the_same_merchant():
+    detected = detect(netflix_with_one_offs(), TODAY)
+
+    assert len(detected) == 1
+    series = detected[0]
+    assert (series["cadence"], series["typical_amount"], series["occurrences"]) == ("monthly", -1099, 6)
+    assert (series["first"], series["last"], series["next_expected"]) == ("2025-01-05", "2025-06-05", "2025-07-06")
+    assert series["active"] is True
+
+
+def test_income_is_only_detected_when_asked_for():
+    rows = netflix_with_one_offs(sign=-1)
+
+    assert detect(rows, TODAY) == []
+    assert [(series["cadence"], series["typical_amount"]) for series in detect(rows, TODAY, include_income=True)] == [
+        ("monthly", 1099),
+    ]
+
+
+def test_irregular_payments_are_not_recurring():
+    days = ["2025-01-03", "2025-01-09", "2025-02-20", "2025-02-22", "2025-04-30", "2025-05-01"]
+    rows = [(f"{day}T08:00:00.000Z", -1500, "eating_out", "Pret") for day in days]
+
+    assert detect(rows, TODAY) == []
+
+
+def test_lapsed_series_is_inactive():
+    rows = [(f"{day}T08:00:00.000Z", -999, "entertainment", "Spotify") for day in MONTHS[:3]]
+
+    assert detect(rows, TODAY)[0]["active"] is False
+
+
+def test_names_are_normalised():
+    assert normalise_name("NETFLIX.COM 866-579-7172") == normalise_name("Netflix") == "netflix"
@@ -0,0 +1,62 @@
+import asyncio
+
+from conftest import ACCOUNT_ID
+
+MISSING_ID = "tx_9999" + "0" * 16
+
+
+def test_transactions_are_fetched_once_then_read_locally(server, fake_api):
+    history = fake_api.histories[ACCOUNT_ID]
+    ids = [history[5]["id"], history[2]["id"], history[5]["id"]]
+
+    async def run():
+        async with server.lifespan(server.mcp):
+            first = await server.retrieve_transactions(transaction_ids=ids + [MISSING_ID], fields="id")
+
+            requests = fake_api.requests
+            second = await server.retrieve_transactions(transaction_ids=ids, fields="id")
+            assert fake_api.requests == requests
+
+            return first, second
+
+    first, second = asyncio.run(run())
+
+    # Duplicates are looked up once, and results keep the order they were asked for
+    assert first["transactions"] == [{"id": history[5]["id"]}, {"id": history[2]["id"]}]
+    assert (first["local"], first["fetched"], first["not_found"]) == (0, 2, [])
+    assert list(first["errors"]) == [MISSING_ID]
+
+    assert second["transactions"] == first["transactions"]
+    assert (second["local"], second["fetched"], second["errors"]) == (2, 0, {})
+
+
+def test_external_and_dedupe_ids_refresh_the_local_copy_once(server, fake_api):
+    history = fake_api.histories[ACCOUNT_ID]
+    pot_transfer = next(history[index] for index in range(len(history)) if history[index]["metadata"].get("external_id"))
+    payment = history[len(history) - 1]
+
+    async def run():
+        async with server.lifespan(server.mcp):
+            requests = fake_api.requests
+            found = await server.retrieve_transactions(
+                external_ids=[pot_transfer["metadata"]["external_id"], "mcp_missing"],
+                dedupe_ids=[payment["dedupe_id"]],
+                since=history[0]["created"],
+                fields="id",
+            )
+            refresh_requests = fake_api.requests - requests
+
+            requests = fake_api.requests
+            again = await server.retrieve_transactions(dedupe_ids=[payment["dedupe_id"]], fields="id")
+            assert fake_api.requests == requests
+
+            return found, refresh_requests, again
+
+    found, refresh_requests, again = asyncio.run(run())
+
+    assert found["transactions"] == [{"id": pot_transfer["id"]}, {"id": payment["id"]}]
+    assert (found["local"], found["fetched"], found["not_found"]) == (0, 0, ["mcp_missing"])
+    assert refresh_requests > 0
+
+    assert again["transactions"] == [{"id": payment["id"]}]
+    assert again["local"] == 1
@@ -0,0 +1,81 @@
+import pytest
+
+from monzo.fixtures import make_merchant
+from monzo.store import TransactionStore
+
+
+def transaction(index: int, amount: int, category: str, merchant: int = None, account_id: str = "acc_1", **fields) -> dict:
+    return {
+        "id": f"tx_{index:04d}",
+        "account_id": account_id,
+        "created": f"2025-03-{index:02d}T12:00:00.000Z",
+        "updated": f"2025-03-{index:02d}T12:00:01.000Z",
+        "amount": amount,
+        "category": category,
+        "description": "",
+        "merchant": make_merchant(merchant) if merchant is not None else None,
+        "notes": "",
+        "metadata": {},
+        **fields,
+    }
+
+
+TRANSACTIONS = [
+    transaction(1, -450, "eating_out", merchant=0),  # Pret A Manger
+    transaction(2, -6200, "groceries", merchant=1),  # Tesco
+    transaction(3, -2300, "groceries", merchant=2, notes="Dinner party"),  # Sainsbury's
+    transaction(4, -85000, "bills", description="RENT", notes="March rent", counterparty={"name": "Jane Landlord"}),
+    transaction(5, -5000, "savings", description="pot_1", metadata={"pot_id": "pot_1"}),
+    transaction(6, -1800, "groceries", merchant=1, account_id="acc_2"),  # Tesco, joint account
+    transaction(7, 2000, "savings", description="pot_1", metadata={"pot_id": "pot_1"}),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def store(request, tmp_path):
+    store = TransactionStore(str(tmp_path / "transactions.sqlite3"))
+    store.full_text = store.full_text and request.param
+    store.upsert(TRANSACTIONS)
+    return store
+
+
+def ids(transactions: list) -> list:
+    return [transaction["id"] for transaction in transactions]
+
+
+def test_text_matches_any_searchable_field(store):
+    assert ids(store.search(text="sains")) == ["tx_0003"]
+    assert ids(store.search(text="dinner")) == ["tx_0003"]
+    assert ids(store.search(text="landlord")) == ["tx_0004"]
+    assert ids(store.search(text="rent")) == ["tx_0004"]
+
+
+def test_merchant_and_notes_only_match_their_own_field(store):
+    assert ids(store.search(merchant="tesco")) == ["tx_0006", "tx_0002"]
+    assert ids(store.search(merchant="rent")) == []
+    assert ids(store.search(notes="rent")) == ["tx_0004"]
+    assert ids(store.search(notes="tesco")) == []
+
+
+def test_filters_are_combined(store):
+    assert ids(store.search(category="groceries", max_amount=-2000)) == ["tx_0003", "tx_0002"]
+    assert ids(store.search(merchant="tesco", account_ids=["acc_1"])) == ["tx_0002"]
+    assert ids(store.search(pot_id="pot_1")) == ["tx_0007", "tx_0005"]
+    assert ids(store.search(pot_id="pot_1", min_amount=0)) == ["tx_0007"]
+    assert ids(store.search(since="2025-03-02T00:00:00.000Z", before="2025-03-04T00:00:00.000Z")) == ["tx_0003", "tx_0002"]
+
+
+def test_results_are_newest_first_and_limited(store):
+    assert ids(store.search(limit=3)) == ["tx_0007", "tx_0006", "tx_0005"]
+
+
+def test_merchants_are_returned_expanded(store):
+    assert store.search(merchant="pret")[0]["merchant"]["name"] == "Pret A Manger"
+
+
+def test_search_input_is_not_read_as_query_syntax(tmp_path):
+    store = TransactionStore(str(tmp_path / "transactions.sqlite3"))
+    store.upsert(TRANSACTIONS)
+
+    assert ids(store.search(text='tesco" OR "pret')) == []
+    assert ids(store.search(text="tesco*")) == ["tx_0006", "tx_0002"]
@@ -0,0 +1,54 @@
+import asyncio
+import datetime
+
+from conftest import ACCOUNT_ID
+from monzo.store import normalise_timestamp
+from monzo.sync import sync_transactions
+
+
+def days_ago(days: int) -> str:
+    return normalise_timestamp((datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat())
+
+
+def stored(runtime, since: str) -> list:
+    return list(runtime.transaction_store.iter_query(ACCOUNT_ID, since=since))
+
+
+def test_sync_resumes_from_the_newest_transaction_after_a_backfill(server, fake_api):
+    history = fake_api.histories[ACCOUNT_ID]
+    recent, older = days_ago(10), days_ago(60)
+
+    def expected(since: str) -> int:
+        return len(history) - history.index_at(datetime.datetime.strptime(since, "%Y-%m-%dT%H:%M:%S.%fZ"))
+
+    async def run():
+        async with server.lifespan(server.mcp):
+            runtime = server.get_runtime()
+
+            def sync(since: str, force: bool = False):
+                return sync_transactions(
+                    runtime.client, runtime.transaction_store, ACCOUNT_ID, since,
+                    force=force, overlap=datetime.timedelta(days=3), windows=2,
+                )
+
+            await sync(recent)
+            assert len(stored(runtime, recent)) == expected(recent)
+
+            # Older history is backfilled, and the store then covers the whole range
+            requests = fake_api.requests
+            await sync(older)
+            backfill_requests = fake_api.requests - requests
+            state = runtime.transaction_store.get_sync_state(ACCOUNT_ID)
+            assert state["covered_from"] == older
+            assert len(stored(runtime, older)) == expected(older)
+
+            # A refresh only re-reads the overlap before the newest stored transaction, not the backfilled range
+            requests = fake_api.requests
+            await sync(older, force=True)
+            assert fake_api.requests - requests < backfill_requests
+            assert runtime.transaction_store.get_sync_state(ACCOUNT_ID)["covered_from"] == older
+
+            ids = [transaction["id"] for transaction in stored(runtime, older)]
+            assert len(ids) == len(set(ids)) == expected(older)
+
+    asyncio.run(run())
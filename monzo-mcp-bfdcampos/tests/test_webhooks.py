@@ -0,0 +1,54 @@
+import pytest
+from starlette.testclient import TestClient
+
+from conftest import ACCOUNT_ID
+from monzo.cache import ResponseCache
+from monzo.config import Settings
+from monzo.store import TransactionStore
+from monzo.webhook_replay import generate_payloads
+from monzo.webhooks import WEBHOOK_PATH, WebhookReceiver, create_app
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(str(tmp_path / "transactions.sqlite3"))
+
+
+def post(receiver: WebhookReceiver, payload: dict, secret: str = None):
+    params = {"secret": secret} if secret is not None else {}
+    with TestClient(create_app(receiver)) as client:
+        return client.post(WEBHOOK_PATH, params=params, json=payload)
+
+
+def test_webhook_with_the_secret_is_ingested(store):
+    receiver = WebhookReceiver(store, ResponseCache(ttls={"balance": 30}), secret="s3cret")
+    payload = generate_payloads(1, ACCOUNT_ID)[0]
+
+    assert post(receiver, payload, "s3cret").status_code == 200
+    assert [transaction["id"] for transaction in store.iter_query(ACCOUNT_ID)] == [payload["data"]["id"]]
+
+
+@pytest.mark.parametrize("secret", [None, "", "wrong"])
+def test_webhook_without_the_secret_is_refused(store, secret):
+    receiver = WebhookReceiver(store, ResponseCache(ttls={"balance": 30}), secret="s3cret")
+
+    assert post(receiver, generate_payloads(1, ACCOUNT_ID)[0], secret).status_code == 403
+    assert list(store.iter_query(ACCOUNT_ID)) == []
+    assert receiver.stats()["rejected"] == 1
+
+
+@pytest.mark.parametrize("secret", [None, "", "anything"])
+def test_receiver_without_a_secret_refuses_everything(store, secret):
+    receiver = WebhookReceiver(store, ResponseCache(ttls={"balance": 30}))
+
+    assert post(receiver, generate_payloads(1, ACCOUNT_ID)[0], secret).status_code == 403
+    assert list(store.iter_query(ACCOUNT_ID)) == []
+
+
+def test_webhooks_need_a_secret_to_be_enabled():
+    env = {"MONZO_ACCESS_TOKEN": "test-token", "MONZO_WEBHOOKS": "true"}
+
+    with pytest.raises(Exception, match="MONZO_WEBHOOK_SECRET"):
+        Settings(env)
+
+    assert Settings({**env, "MONZO_WEBHOOK_SECRET": "s3cret"}).webhook_secret == "s3cret"